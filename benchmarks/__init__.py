@@ -0,0 +1 @@
+"""Simulated-clock benchmarks for the Lawn Irrigation System integration."""
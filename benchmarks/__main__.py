@@ -0,0 +1,131 @@
+"""Run the coordinator benchmarks.
+
+    python -m benchmarks
+    python -m benchmarks --zones 10 100 500 2000 --workload program overlap
+    python -m benchmarks --save baseline.json
+    python -m benchmarks --compare baseline.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+from typing import Any, Dict, List
+
+from .harness import Bench, measure_memory
+from .scenarios import WORKLOAD_OPTIONS, WORKLOADS
+
+# Large zone sets are slow, ask for them with --zones 10 100 500 2000
+DEFAULT_ZONES = [10, 100]
+
+COLUMNS = [
+    ("setup_ms", "setup ms", "{:.1f}"),
+    ("mem_per_zone_kb", "KiB/zone", "{:.2f}"),
+    ("loop_lag_max_ms", "lag max ms", "{:.2f}"),
+    ("loop_lag_p99_ms", "lag p99 ms", "{:.3f}"),
+    ("transitions", "transitions", "{}"),
+    ("writes_per_transition", "writes/trans", "{:.2f}"),
+    ("service_calls_per_program", "calls/program", "{:.1f}"),
+    ("simulated_hours", "sim h", "{:.1f}"),
+    ("wall_s", "wall s", "{:.2f}"),
+]
+
+# Metrics checked against a baseline, with a floor below which a value is
+# never a regression. Wall-clock metrics get their own, looser tolerance.
+COMPARED = {
+    "writes_per_transition": 0.0,
+    "service_calls_per_program": 0.0,
+    "mem_per_zone_kb": 0.5,
+}
+COMPARED_TIMINGS = {
+    "setup_ms": 5.0,
+    "loop_lag_max_ms": 5.0,
+}
+
+
+def run(zone_counts: List[int], workloads: List[str]) -> List[Dict[str, Any]]:
+    """Run every workload at every zone count."""
+    results = []
+    for zone_count in zone_counts:
+        memory = measure_memory(zone_count) / 1024
+        for workload in workloads:
+            bench = Bench(zone_count, options=WORKLOAD_OPTIONS[workload])
+            result = bench.run(WORKLOADS[workload])
+            result["workload"] = workload
+            result["mem_per_zone_kb"] = memory
+            results.append(result)
+            print(_format_row(result), flush=True)
+    return results
+
+
+def _format_row(result: Dict[str, Any]) -> str:
+    """Format one result as a table row."""
+    cells = [f"{result['workload']:<11}", f"{result['zones']:>6}"]
+    cells.extend(
+        f"{fmt.format(result[key]):>{len(title)}}" for key, title, fmt in COLUMNS
+    )
+    return "  ".join(cells)
+
+
+def compare(
+    results: List[Dict[str, Any]],
+    baseline: List[Dict[str, Any]],
+    tolerance: float,
+    time_tolerance: float,
+) -> List[str]:
+    """Return the metrics that regressed against a baseline."""
+    previous = {(item["workload"], item["zones"]): item for item in baseline}
+    checks = [(key, floor, tolerance) for key, floor in COMPARED.items()]
+    checks.extend((key, floor, time_tolerance) for key, floor in COMPARED_TIMINGS.items())
+    regressions = []
+    for result in results:
+        base = previous.get((result["workload"], result["zones"]))
+        if base is None:
+            continue
+        for key, floor, allowed in checks:
+            limit = max(base[key] * (1 + allowed), floor)
+            if result[key] > limit:
+                regressions.append(
+                    f"{result['workload']} {result['zones']} zones: {key} "
+                    f"{result[key]:.3f} > {limit:.3f} (baseline {base[key]:.3f})"
+                )
+    return regressions
+
+
+def main() -> int:
+    """Run the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[0])
+    parser.add_argument("--zones", type=int, nargs="+", default=DEFAULT_ZONES)
+    parser.add_argument("--workload", nargs="+", choices=list(WORKLOADS), default=list(WORKLOADS))
+    parser.add_argument("--save", metavar="FILE", help="write the results as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="fail on regressions against saved results")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed relative regression")
+    parser.add_argument(
+        "--time-tolerance", type=float, default=1.0, help="allowed relative regression of timings"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    header = ["workload   ", " zones"] + [title for _, title, _ in COLUMNS]
+    print("  ".join(header))
+    results = run(args.zones, args.workload)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            regressions = compare(results, json.load(file), args.tolerance, args.time_tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
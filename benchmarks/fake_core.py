@@ -0,0 +1,775 @@
+"""Local stand-in for the parts of the Home Assistant core the integration uses.
+
+The fake core runs on an event loop with a virtual clock: whenever the loop
+would block waiting for a timer, the clock jumps to that timer instead. Hours
+of irrigation run in the time it takes to execute the callbacks, and the real
+time spent in each loop iteration is the lag a real instance would see.
+"""
+from __future__ import annotations
+
+import asyncio
+import copy
+import os
+import selectors
+import sys
+import tempfile
+import time
+import types
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+EPOCH = datetime(2026, 6, 1, 4, 0, tzinfo=timezone.utc)
+
+_LOOP: Optional[VirtualClockLoop] = None
+
+
+class _VirtualSelector(selectors.DefaultSelector):
+    """Selector that advances the virtual clock instead of sleeping."""
+
+    def __init__(self) -> None:
+        """Initialize the selector."""
+        super().__init__()
+        self.loop: Optional[VirtualClockLoop] = None
+
+    def select(self, timeout: Optional[float] = None) -> list:
+        """Poll without blocking and skip ahead to the next timer."""
+        ready = super().select(0)
+        if not ready and timeout and timeout > 0 and self.loop is not None:
+            self.loop.virtual_time += timeout
+        return ready
+
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    """Event loop whose clock only moves when there is nothing to run."""
+
+    def __init__(self) -> None:
+        """Initialize the loop."""
+        selector = _VirtualSelector()
+        super().__init__(selector)
+        selector.loop = self
+        self.virtual_time = 0.0
+        # Real seconds spent in every loop iteration
+        self.iterations: List[float] = []
+
+    def time(self) -> float:
+        """Return the virtual time."""
+        return self.virtual_time
+
+    def _run_once(self) -> None:
+        """Run one iteration and record how long it blocked the loop."""
+        start = time.perf_counter()
+        super()._run_once()
+        self.iterations.append(time.perf_counter() - start)
+
+
+def utcnow() -> datetime:
+    """Return the virtual time as a UTC datetime."""
+    return EPOCH + timedelta(seconds=_LOOP.time() if _LOOP is not None else 0)
+
+
+def callback(func: Callable) -> Callable:
+    """Mark a function as safe to run in the event loop."""
+    func._hass_callback = True
+    return func
+
+
+class State:
+    """State of an entity."""
+
+    __slots__ = ("entity_id", "state", "attributes", "last_changed", "last_updated")
+
+    def __init__(self, entity_id: str, state: str, attributes: Optional[dict] = None) -> None:
+        """Initialize the state."""
+        self.entity_id = entity_id
+        self.state = state
+        self.attributes = attributes or {}
+        self.last_changed = utcnow()
+        self.last_updated = self.last_changed
+
+
+class Event:
+    """Event fired on the bus or by the state machine."""
+
+    def __init__(self, event_type: str, data: Dict[str, Any]) -> None:
+        """Initialize the event."""
+        self.event_type = event_type
+        self.data = data
+        self.time_fired = utcnow()
+
+
+class StateMachine:
+    """State machine that counts writes."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the state machine."""
+        self._hass = hass
+        self._states: Dict[str, State] = {}
+        self._listeners: Dict[str, List[Callable]] = {}
+        self.writes = 0
+
+    def get(self, entity_id: str) -> Optional[State]:
+        """Return the state of an entity."""
+        return self._states.get(entity_id)
+
+    def async_entity_ids(self, domain: Optional[str] = None) -> List[str]:
+        """Return the entity ids, optionally of one domain."""
+        if domain is None:
+            return list(self._states)
+        return [entity_id for entity_id in self._states if entity_id.startswith(f"{domain}.")]
+
+    def async_set(self, entity_id: str, state: str, attributes: Optional[dict] = None) -> None:
+        """Write a state and notify listeners when it changed."""
+        old = self._states.get(entity_id)
+        new = State(entity_id, state, attributes)
+        self._states[entity_id] = new
+        self.writes += 1
+        if old is None or old.state != state:
+            event = Event(
+                "state_changed", {"entity_id": entity_id, "old_state": old, "new_state": new}
+            )
+            for listener in list(self._listeners.get(entity_id, ())):
+                listener(event)
+
+
+class ServiceCall:
+    """Service call."""
+
+    def __init__(self, domain: str, service: str, data: dict, return_response: bool = False) -> None:
+        """Initialize the service call."""
+        self.domain = domain
+        self.service = service
+        self.data = data
+        self.return_response = return_response
+
+
+class ServiceRegistry:
+    """Service bus whose switch services toggle states after a latency."""
+
+    def __init__(self, hass: HomeAssistant, latency: float = 0.0) -> None:
+        """Initialize the registry."""
+        self._hass = hass
+        self._services: Dict[tuple, Callable] = {}
+        self.latency = latency
+        self.calls = 0
+        self.actuations = 0
+
+    def has_service(self, domain: str, service: str) -> bool:
+        """Return if a service is registered."""
+        return (domain, service) in self._services
+
+    def async_register(
+        self, domain: str, service: str, func: Callable, schema: Any = None, supports_response: Any = None
+    ) -> None:
+        """Register a service."""
+        self._services[(domain, service)] = func
+
+    def async_remove(self, domain: str, service: str) -> None:
+        """Remove a service."""
+        self._services.pop((domain, service), None)
+
+    async def async_call(
+        self,
+        domain: str,
+        service: str,
+        data: Optional[dict] = None,
+        blocking: bool = False,
+        return_response: bool = False,
+        **kwargs: Any,
+    ) -> Any:
+        """Call a service."""
+        self.calls += 1
+        data = dict(data or {})
+        func = self._services.get((domain, service))
+        if func is not None:
+            result = func(ServiceCall(domain, service, data, return_response))
+            if asyncio.iscoroutine(result):
+                result = await result
+            return result
+
+        if domain in ("switch", "homeassistant") and service in ("turn_on", "turn_off"):
+            entity_ids = data.get("entity_id")
+            if isinstance(entity_ids, str):
+                entity_ids = [entity_ids]
+            state = "on" if service == "turn_on" else "off"
+
+            async def apply() -> None:
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                for entity_id in entity_ids or ():
+                    self.actuations += 1
+                    self._hass.states.async_set(entity_id, state)
+
+            if blocking:
+                await apply()
+            else:
+                self._hass.async_create_task(apply())
+            return None
+
+        raise KeyError(f"{domain}.{service}")
+
+
+class EventBus:
+    """Event bus."""
+
+    def __init__(self) -> None:
+        """Initialize the bus."""
+        self.listeners: Dict[str, List[Callable]] = {}
+
+    def async_listen(self, event_type: str, listener: Callable) -> Callable[[], None]:
+        """Listen for an event type."""
+        self.listeners.setdefault(event_type, []).append(listener)
+        return lambda: self.listeners[event_type].remove(listener)
+
+    async_listen_once = async_listen
+
+    def async_fire(self, event_type: str, data: Optional[dict] = None) -> None:
+        """Fire an event."""
+        for listener in list(self.listeners.get(event_type, ())):
+            result = listener(Event(event_type, data or {}))
+            if asyncio.iscoroutine(result):
+                asyncio.get_running_loop().create_task(result)
+
+
+class CoreState:
+    """Core states."""
+
+    running = "RUNNING"
+    starting = "STARTING"
+
+
+class Config:
+    """Core configuration with a throwaway config directory."""
+
+    def __init__(self) -> None:
+        """Initialize the configuration."""
+        self.config_dir = tempfile.mkdtemp(prefix="lawn_irrigation_bench_")
+        # No recorder, so statistics are never imported
+        self.components: set = set()
+
+    def path(self, *parts: str) -> str:
+        """Return a path inside the config directory."""
+        return os.path.join(self.config_dir, *parts)
+
+
+class HomeAssistant:
+    """Fake core object."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        """Initialize the core."""
+        self.loop = asyncio.get_event_loop()
+        self.states = StateMachine(self)
+        self.services = ServiceRegistry(self, latency)
+        self.bus = EventBus()
+        self.data: Dict[str, Any] = {}
+        self.state = CoreState.running
+        self.config_entries = None
+        self.config = Config()
+        self.storage: Dict[str, Any] = {}
+        self._tasks: set = set()
+
+    @property
+    def is_running(self) -> bool:
+        """Return if the core is running."""
+        return True
+
+    def async_create_task(self, coro: Any, name: Optional[str] = None, eager_start: bool = False) -> asyncio.Task:
+        """Create a task and keep a reference to it."""
+        task = self.loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def async_create_background_task(self, coro: Any, name: str, eager_start: bool = False) -> asyncio.Task:
+        """Create a background task."""
+        return self.async_create_task(coro, name)
+
+    def async_add_executor_job(self, func: Callable, *args: Any) -> asyncio.Future:
+        """Run a function right away.
+
+        A real thread would leave the loop idle while it runs, and the
+        virtual clock would jump to the next timer in the meantime.
+        """
+        future = self.loop.create_future()
+        try:
+            future.set_result(func(*args))
+        except Exception as err:  # pylint: disable=broad-except
+            future.set_exception(err)
+        return future
+
+    async def async_block_till_done(self) -> None:
+        """Let pending callbacks and tasks run."""
+        for _ in range(50):
+            await asyncio.sleep(0)
+
+
+class ConfigEntry:
+    """Config entry."""
+
+    def __init__(
+        self, data: dict, options: Optional[dict] = None, entry_id: str = "bench", title: str = "Bench"
+    ) -> None:
+        """Initialize the entry."""
+        self.data = data
+        self.options = options or {}
+        self.entry_id = entry_id
+        self.title = title
+        self._on_unload: List[Callable] = []
+
+    def async_on_unload(self, func: Callable) -> None:
+        """Register a function to call on unload."""
+        self._on_unload.append(func)
+
+    def add_update_listener(self, listener: Callable) -> Callable[[], None]:
+        """Listen for option updates."""
+        return lambda: None
+
+    def async_create_background_task(
+        self, hass: HomeAssistant, coro: Any, name: str, eager_start: bool = False
+    ) -> asyncio.Task:
+        """Create a background task bound to the entry."""
+        return hass.async_create_task(coro, name)
+
+
+def async_track_state_change_event(
+    hass: HomeAssistant, entity_ids: Any, action: Callable
+) -> Callable[[], None]:
+    """Track state changes of entities."""
+    if isinstance(entity_ids, str):
+        entity_ids = [entity_ids]
+    entity_ids = list(entity_ids)
+    for entity_id in entity_ids:
+        hass.states._listeners.setdefault(entity_id, []).append(action)
+
+    def unsubscribe() -> None:
+        for entity_id in entity_ids:
+            listeners = hass.states._listeners.get(entity_id, [])
+            if action in listeners:
+                listeners.remove(action)
+
+    return unsubscribe
+
+
+def async_track_point_in_utc_time(
+    hass: HomeAssistant, action: Callable, point_in_time: datetime
+) -> Callable[[], None]:
+    """Run an action at a point in time."""
+    delay = max(0.0, (point_in_time - utcnow()).total_seconds())
+
+    def fire() -> None:
+        result = action(point_in_time)
+        if asyncio.iscoroutine(result):
+            hass.async_create_task(result)
+
+    return hass.loop.call_at(hass.loop.time() + delay, fire).cancel
+
+
+def async_call_later(hass: HomeAssistant, delay: Any, action: Callable) -> Callable[[], None]:
+    """Run an action after a delay."""
+    if isinstance(delay, timedelta):
+        delay = delay.total_seconds()
+    return async_track_point_in_utc_time(hass, action, utcnow() + timedelta(seconds=delay))
+
+
+def async_track_time_interval(
+    hass: HomeAssistant, action: Callable, interval: timedelta, **kwargs: Any
+) -> Callable[[], None]:
+    """Run an action at every interval."""
+    handle: Dict[str, asyncio.TimerHandle] = {}
+
+    def fire() -> None:
+        result = action(utcnow())
+        if asyncio.iscoroutine(result):
+            hass.async_create_task(result)
+        handle["timer"] = hass.loop.call_later(interval.total_seconds(), fire)
+
+    handle["timer"] = hass.loop.call_later(interval.total_seconds(), fire)
+    return lambda: handle["timer"].cancel()
+
+
+def async_dispatcher_connect(hass: HomeAssistant, signal: str, target: Callable) -> Callable[[], None]:
+    """Connect a callback to a dispatcher signal."""
+    targets = hass.data.setdefault("dispatcher", {}).setdefault(signal, [])
+    targets.append(target)
+    return lambda: targets.remove(target)
+
+
+def async_dispatcher_send(hass: HomeAssistant, signal: str, *args: Any) -> None:
+    """Call every callback connected to a signal."""
+    for target in list(hass.data.get("dispatcher", {}).get(signal, ())):
+        target(*args)
+
+
+class HomeAssistantError(Exception):
+    """Error raised by the core and by integrations."""
+
+
+class UpdateFailed(Exception):
+    """Raised when a coordinator update fails."""
+
+
+class DataUpdateCoordinator:
+    """Coordinator that keeps its listeners with their context."""
+
+    def __init__(
+        self, hass: HomeAssistant, logger: Any, *, name: str, update_interval: Optional[timedelta] = None, **kwargs: Any
+    ) -> None:
+        """Initialize the coordinator."""
+        self.hass = hass
+        self.logger = logger
+        self.name = name
+        self.update_interval = update_interval
+        self.data: Any = None
+        self.last_update_success = True
+        self._listeners: Dict[object, tuple] = {}
+        self._unsub_refresh: Optional[asyncio.TimerHandle] = None
+
+    @callback
+    def async_add_listener(self, update_callback: Callable, context: Any = None) -> Callable[[], None]:
+        """Listen for data updates."""
+        key = object()
+        self._listeners[key] = (update_callback, context)
+
+        def remove_listener() -> None:
+            self._listeners.pop(key, None)
+
+        return remove_listener
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify every listener."""
+        for update_callback, _ in list(self._listeners.values()):
+            update_callback()
+
+    def _schedule_refresh(self) -> None:
+        """Schedule the next poll."""
+        if self.update_interval is None:
+            return
+        if self._unsub_refresh is not None:
+            self._unsub_refresh.cancel()
+        self._unsub_refresh = self.hass.loop.call_later(
+            self.update_interval.total_seconds(),
+            lambda: self.hass.async_create_task(self.async_refresh()),
+        )
+
+    async def async_refresh(self) -> None:
+        """Poll and notify listeners."""
+        try:
+            self.data = await self._async_update_data()
+            self.last_update_success = True
+        except UpdateFailed:
+            self.last_update_success = False
+        self._schedule_refresh()
+        self.async_update_listeners()
+
+    async def async_config_entry_first_refresh(self) -> None:
+        """Run the first poll."""
+        await self.async_refresh()
+
+    async def async_request_refresh(self) -> None:
+        """Poll now."""
+        await self.async_refresh()
+
+    @callback
+    def async_set_updated_data(self, data: Any) -> None:
+        """Push new data."""
+        self.data = data
+        self.last_update_success = True
+        self._schedule_refresh()
+        self.async_update_listeners()
+
+    async def async_shutdown(self) -> None:
+        """Stop polling."""
+        if self._unsub_refresh is not None:
+            self._unsub_refresh.cancel()
+
+
+class Entity:
+    """Entity that writes its state to the fake state machine."""
+
+    hass: Optional[HomeAssistant] = None
+    entity_id: Optional[str] = None
+    _attr_name: Optional[str] = None
+    _attr_unique_id: Optional[str] = None
+    _attr_icon: Optional[str] = None
+    _attr_available = True
+    _attr_entity_category: Optional[str] = None
+    _attr_entity_registry_enabled_default = True
+    _attr_extra_state_attributes: Optional[dict] = None
+    _unrecorded_attributes: frozenset = frozenset()
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Initialize the entity."""
+
+    @property
+    def name(self) -> Optional[str]:
+        """Return the name."""
+        return self._attr_name
+
+    @property
+    def unique_id(self) -> Optional[str]:
+        """Return the unique id."""
+        return self._attr_unique_id
+
+    @property
+    def available(self) -> bool:
+        """Return if the entity is available."""
+        return self._attr_available
+
+    @property
+    def extra_state_attributes(self) -> Optional[dict]:
+        """Return the state attributes."""
+        return self._attr_extra_state_attributes
+
+    @property
+    def state(self) -> Any:
+        """Return the state."""
+        return None
+
+    def async_on_remove(self, func: Callable) -> None:
+        """Register a function to call on removal."""
+        self.__dict__.setdefault("_on_remove", []).append(func)
+
+    async def async_added_to_hass(self) -> None:
+        """Run when the entity is added."""
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Run when the entity is removed."""
+
+    def async_write_ha_state(self) -> None:
+        """Write the state."""
+        self.hass.states.async_set(
+            self.entity_id, str(self.state), dict(self.extra_state_attributes or {})
+        )
+
+    async def async_internal_add(self, hass: HomeAssistant, entity_id: str) -> None:
+        """Add the entity the way an entity platform does."""
+        self.hass = hass
+        self.entity_id = entity_id
+        await self.async_added_to_hass()
+        self.async_write_ha_state()
+
+
+class SwitchEntity(Entity):
+    """Switch entity."""
+
+    _attr_is_on: Optional[bool] = None
+
+    @property
+    def is_on(self) -> Optional[bool]:
+        """Return if the switch is on."""
+        return self._attr_is_on
+
+    @property
+    def state(self) -> str:
+        """Return the state."""
+        return "on" if self.is_on else "off"
+
+
+class SensorEntity(Entity):
+    """Sensor entity."""
+
+    _attr_native_value: Any = None
+    _attr_native_unit_of_measurement: Optional[str] = None
+    _attr_device_class: Optional[str] = None
+    _attr_state_class: Optional[str] = None
+
+    @property
+    def native_value(self) -> Any:
+        """Return the value."""
+        return self._attr_native_value
+
+    @property
+    def state(self) -> Any:
+        """Return the state."""
+        return self.native_value
+
+
+class CalendarEntity(Entity):
+    """Calendar entity."""
+
+    @property
+    def event(self) -> Any:
+        """Return the current or next event."""
+        return None
+
+    @property
+    def state(self) -> str:
+        """Return on while an event is in progress."""
+        event = self.event
+        return "on" if event is not None and event.start <= utcnow() < event.end else "off"
+
+
+@dataclass
+class CalendarEvent:
+    """Calendar event."""
+
+    start: datetime
+    end: datetime
+    summary: str
+    description: Optional[str] = None
+    uid: Optional[str] = None
+
+
+def get_astral_event_date(hass: HomeAssistant, event: str, day: Any) -> datetime:
+    """Return a fixed sunrise at 06:00 and sunset at 20:00 UTC."""
+    return datetime(day.year, day.month, day.day, 6 if event == "sunrise" else 20, tzinfo=timezone.utc)
+
+
+class CoordinatorEntity(Entity):
+    """Entity that listens to a coordinator with a context."""
+
+    def __init__(self, coordinator: DataUpdateCoordinator, context: Any = None) -> None:
+        """Initialize the entity."""
+        self.coordinator = coordinator
+        self.coordinator_context = context
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to the coordinator."""
+        self.async_on_remove(
+            self.coordinator.async_add_listener(
+                self._handle_coordinator_update, self.coordinator_context
+            )
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state on coordinator updates."""
+        self.async_write_ha_state()
+
+    @property
+    def available(self) -> bool:
+        """Return if the last update succeeded."""
+        return self.coordinator.last_update_success
+
+
+class Store:
+    """Store that keeps its data in the fake core."""
+
+    def __init__(self, hass: HomeAssistant, version: int, key: str, **kwargs: Any) -> None:
+        """Initialize the store."""
+        self.hass = hass
+        self.key = key
+        self.version = version
+        self._pending: Optional[asyncio.TimerHandle] = None
+
+    async def async_load(self) -> Any:
+        """Load the data."""
+        return copy.deepcopy(self.hass.storage.get(self.key))
+
+    async def async_save(self, data: Any) -> None:
+        """Save the data."""
+        self.hass.storage[self.key] = copy.deepcopy(data)
+
+    def async_delay_save(self, data_func: Callable[[], Any], delay: float = 0) -> None:
+        """Save the data after a delay, dropping earlier pending saves."""
+        if self._pending is not None:
+            self._pending.cancel()
+
+        def save() -> None:
+            self._pending = None
+            self.hass.storage[self.key] = copy.deepcopy(data_func())
+
+        self._pending = self.hass.loop.call_later(delay, save)
+
+    async def async_remove(self) -> None:
+        """Remove the data."""
+        self.hass.storage.pop(self.key, None)
+
+
+def _module(name: str, **attrs: Any) -> types.ModuleType:
+    """Install a module into sys.modules."""
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    parent, _, child = name.rpartition(".")
+    if parent in sys.modules:
+        setattr(sys.modules[parent], child, module)
+    return module
+
+
+def install() -> VirtualClockLoop:
+    """Install the fake core modules and return the virtual clock loop."""
+    global _LOOP
+    _LOOP = VirtualClockLoop()
+    asyncio.set_event_loop(_LOOP)
+
+    entity_category = types.SimpleNamespace(DIAGNOSTIC="diagnostic", CONFIG="config")
+
+    _module("homeassistant")
+    _module(
+        "homeassistant.core",
+        HomeAssistant=HomeAssistant,
+        State=State,
+        Event=Event,
+        callback=callback,
+        CALLBACK_TYPE=Callable[[], None],
+        ServiceCall=ServiceCall,
+        ServiceResponse=dict,
+        SupportsResponse=types.SimpleNamespace(NONE="none", OPTIONAL="optional", ONLY="only"),
+        CoreState=CoreState,
+    )
+    _module("homeassistant.config_entries", ConfigEntry=ConfigEntry)
+    _module("homeassistant.exceptions", HomeAssistantError=HomeAssistantError)
+    _module(
+        "homeassistant.const",
+        Platform=types.SimpleNamespace(SWITCH="switch", SENSOR="sensor", CALENDAR="calendar"),
+        ATTR_ENTITY_ID="entity_id",
+        STATE_ON="on",
+        STATE_OFF="off",
+        STATE_UNAVAILABLE="unavailable",
+        STATE_UNKNOWN="unknown",
+        EVENT_HOMEASSISTANT_STARTED="homeassistant_started",
+        SUN_EVENT_SUNRISE="sunrise",
+        SUN_EVENT_SUNSET="sunset",
+        EntityCategory=entity_category,
+        UnitOfTime=types.SimpleNamespace(SECONDS="s", MINUTES="min"),
+    )
+    _module("homeassistant.util", slugify=lambda text: text.lower().replace(" ", "_"))
+    _module(
+        "homeassistant.util.dt",
+        utcnow=utcnow,
+        now=utcnow,
+        as_local=lambda value: value,
+        as_utc=lambda value: value,
+        parse_datetime=datetime.fromisoformat,
+        UTC=timezone.utc,
+        DEFAULT_TIME_ZONE=timezone.utc,
+    )
+    _module("homeassistant.helpers")
+    _module(
+        "homeassistant.helpers.event",
+        async_track_state_change_event=async_track_state_change_event,
+        async_track_point_in_utc_time=async_track_point_in_utc_time,
+        async_track_time_interval=async_track_time_interval,
+        async_call_later=async_call_later,
+    )
+    _module(
+        "homeassistant.helpers.update_coordinator",
+        DataUpdateCoordinator=DataUpdateCoordinator,
+        CoordinatorEntity=CoordinatorEntity,
+        UpdateFailed=UpdateFailed,
+    )
+    _module("homeassistant.helpers.storage", Store=Store, STORAGE_DIR=".storage")
+    _module("homeassistant.helpers.sun", get_astral_event_date=get_astral_event_date)
+    _module(
+        "homeassistant.helpers.dispatcher",
+        async_dispatcher_connect=async_dispatcher_connect,
+        async_dispatcher_send=async_dispatcher_send,
+    )
+    _module("homeassistant.helpers.entity", Entity=Entity, EntityCategory=entity_category)
+    _module("homeassistant.helpers.entity_platform", AddEntitiesCallback=Callable)
+    _module("homeassistant.components")
+    _module("homeassistant.components.switch", SwitchEntity=SwitchEntity)
+    _module(
+        "homeassistant.components.calendar",
+        CalendarEntity=CalendarEntity,
+        CalendarEvent=CalendarEvent,
+    )
+    _module(
+        "homeassistant.components.sensor",
+        SensorEntity=SensorEntity,
+        SensorDeviceClass=types.SimpleNamespace(DURATION="duration", TIMESTAMP="timestamp"),
+        SensorStateClass=types.SimpleNamespace(MEASUREMENT="measurement", TOTAL="total"),
+    )
+    return _LOOP
@@ -0,0 +1,217 @@
+"""Drive the coordinator and its entities on the fake core and measure them."""
+from __future__ import annotations
+
+import asyncio
+import gc
+import importlib
+import shutil
+import sys
+import time
+import tracemalloc
+import types
+from pathlib import Path
+from functools import partial
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from . import fake_core
+
+INTEGRATION_DIR = Path(__file__).resolve().parent.parent / "custom_components" / "lawn_irrigation"
+PACKAGE = "lawn_irrigation"
+
+# Simulated time to wait for a workload to settle before giving up
+IDLE_TIMEOUT = 7 * 24 * 3600
+
+_LOOP: Optional[fake_core.VirtualClockLoop] = None
+
+
+def load() -> fake_core.VirtualClockLoop:
+    """Install the fake core and import the integration modules.
+
+    The package __init__ only wires config entries and services into the
+    real core, so the harness imports the coordinator and platform modules
+    directly and never needs voluptuous or the service schemas.
+    """
+    global _LOOP
+    if _LOOP is None:
+        _LOOP = fake_core.install()
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [str(INTEGRATION_DIR)]
+        sys.modules[PACKAGE] = package
+    return _LOOP
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    """Return a percentile of a list of values."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+class Bench:
+    """One controller with its valves and entities on a fresh fake core."""
+
+    def __init__(
+        self,
+        zone_count: int,
+        *,
+        duration: int = 1,
+        latency: float = 0.0,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Initialize the bench."""
+        self.loop = load()
+        self.coordinator_module = importlib.import_module(f"{PACKAGE}.coordinator")
+        self.platforms = [
+            importlib.import_module(f"{PACKAGE}.switch"),
+            importlib.import_module(f"{PACKAGE}.sensor"),
+            importlib.import_module(f"{PACKAGE}.calendar"),
+        ]
+        self.hass = fake_core.HomeAssistant(latency)
+        self.zones = [
+            {
+                "zone_name": f"Zone {index}",
+                "zone_entity": f"switch.valve_{index}",
+                "zone_duration": duration,
+                "zone_flow": 1,
+            }
+            for index in range(zone_count)
+        ]
+        self.entry = fake_core.ConfigEntry({"zones": self.zones}, options)
+        self.coordinator: Any = None
+        self.entities: List[Any] = []
+        # Enabled entities a platform added that are not on the fake core yet
+        self._pending: List[Tuple[str, Any]] = []
+        self._platforms_ready = False
+        self.transitions = 0
+        self.programs = 0
+        # Writes made by the bench itself, not by the integration
+        self.external_writes = 0
+        for zone in self.zones:
+            self.set_state(zone["zone_entity"], "off")
+        fake_core.async_track_state_change_event(
+            self.hass, [zone["zone_entity"] for zone in self.zones], self._count_transition
+        )
+
+    def set_state(self, entity_id: str, state: str) -> None:
+        """Write the state of an entity outside the integration."""
+        self.external_writes += 1
+        self.hass.states.async_set(entity_id, state)
+
+    def _count_transition(self, event: fake_core.Event) -> None:
+        """Count valve state changes."""
+        if event.data["old_state"] is not None:
+            self.transitions += 1
+
+    async def async_setup(self) -> float:
+        """Set up the coordinator and its enabled entities, return the real seconds taken."""
+        start = time.perf_counter()
+        coordinator = self.coordinator_module.LawnIrrigationCoordinator(self.hass, self.entry)
+        coordinator.async_seed()
+        coordinator.async_setup_listeners()
+        await coordinator.async_restore()
+        coordinator.async_load_schedules()
+        self.hass.data.setdefault(PACKAGE, {})[self.entry.entry_id] = coordinator
+        self.coordinator = coordinator
+
+        for platform in self.platforms:
+            domain = platform.__name__.rpartition(".")[2]
+            await platform.async_setup_entry(
+                self.hass, self.entry, partial(self._add_entities, domain)
+            )
+            await self._async_add_pending()
+        self._platforms_ready = True
+        elapsed = time.perf_counter() - start
+
+        # The fake core has already started, the deferred work runs right away
+        await coordinator.async_started(self.hass)
+        return elapsed
+
+    def _add_entities(self, domain: str, entities: Iterable[Any], update: bool = False) -> None:
+        """Keep the enabled entities a platform adds, like the entity platform does."""
+        self._pending.extend(
+            (domain, entity) for entity in entities if entity._attr_entity_registry_enabled_default
+        )
+        if self._platforms_ready:
+            self.hass.async_create_task(self._async_add_pending())
+
+    async def _async_add_pending(self) -> None:
+        """Add the pending entities to the fake core."""
+        pending, self._pending = self._pending, []
+        for domain, entity in pending:
+            await entity.async_internal_add(self.hass, f"{domain}.{entity.unique_id}")
+            self.entities.append(entity)
+
+    @property
+    def entity_writes(self) -> int:
+        """Return the state writes of the integration's own entities."""
+        return self.hass.states.writes - self.hass.services.actuations - self.external_writes
+
+    async def async_wait_idle(self, timeout: float = IDLE_TIMEOUT) -> None:
+        """Let simulated time pass until no zone runs and nothing is queued."""
+        deadline = self.loop.time() + timeout
+        coordinator = self.coordinator
+        while self.loop.time() < deadline:
+            if not coordinator.zone_timers and not coordinator.runs:
+                break
+            await asyncio.sleep(60)
+        await self.hass.async_block_till_done()
+
+    def run(self, workload: Any) -> Dict[str, Any]:
+        """Set up the bench, run a workload and return the measurements."""
+        loop = self.loop
+        # A full collection owed by the previous workload is not setup time
+        gc.collect()
+        setup_seconds = loop.run_until_complete(self.async_setup())
+        writes = self.entity_writes
+        calls = self.hass.services.calls
+        loop.iterations.clear()
+        virtual_start = loop.time()
+        wall_start = time.perf_counter()
+
+        self.programs = loop.run_until_complete(workload(self))
+
+        wall = time.perf_counter() - wall_start
+        transitions = max(self.transitions, 1)
+        programs = max(self.programs, 1)
+        result = {
+            "zones": len(self.zones),
+            "setup_ms": setup_seconds * 1000,
+            "loop_lag_max_ms": max(loop.iterations, default=0) * 1000,
+            "loop_lag_p99_ms": _percentile(loop.iterations, 99) * 1000,
+            "transitions": self.transitions,
+            "writes_per_transition": (self.entity_writes - writes) / transitions,
+            "service_calls_per_program": (self.hass.services.calls - calls) / programs,
+            "simulated_hours": (loop.time() - virtual_start) / 3600,
+            "wall_s": wall,
+        }
+        self.close()
+        return result
+
+    def close(self) -> None:
+        """Stop the coordinator and drain its tasks."""
+        if self.coordinator is not None:
+            self.coordinator.async_stop()
+            self.loop.run_until_complete(self.hass.async_block_till_done())
+        shutil.rmtree(self.hass.config.config_dir, ignore_errors=True)
+
+
+def measure_memory(zone_count: int) -> float:
+    """Return the memory one zone costs once the controller is set up, in bytes."""
+    load()
+    tracemalloc.start()
+    try:
+        empty = Bench(0)
+        before = tracemalloc.get_traced_memory()[0]
+        empty.loop.run_until_complete(empty.async_setup())
+        baseline = tracemalloc.get_traced_memory()[0] - before
+
+        bench = Bench(zone_count)
+        before = tracemalloc.get_traced_memory()[0]
+        bench.loop.run_until_complete(bench.async_setup())
+        used = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    empty.close()
+    bench.close()
+    return (used - baseline) / max(zone_count, 1)
@@ -0,0 +1,84 @@
+"""Workloads for the benchmark harness.
+
+Each workload drives a set-up bench and returns the number of programs it
+requested, so service calls can be reported per program.
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+from typing import Awaitable, Callable, Dict
+
+from .harness import Bench
+
+RAIN_SENSOR = "binary_sensor.rain"
+
+
+async def single_program(bench: Bench) -> int:
+    """Run every zone once, two at a time."""
+    await bench.coordinator.async_start_irrigation()
+    await bench.async_wait_idle()
+    return 1
+
+
+async def overlapping_programs(bench: Bench) -> int:
+    """Queue programs of mixed priority over a running one, preempting and merging."""
+    rng = random.Random(len(bench.zones))
+    coordinator = bench.coordinator
+    names = coordinator.zones.names
+    await coordinator.async_start_irrigation()
+    programs = 1
+    for index in range(20):
+        await asyncio.sleep(rng.randint(1, 10) * 60)
+        zones = rng.sample(names, max(1, len(names) // 10))
+        await coordinator.async_run_program(f"program {index}", zones, rng.randint(-5, 5))
+        programs += 1
+        if index % 5 == 0:
+            await coordinator.async_run_zone(rng.choice(names), 2)
+            programs += 1
+    await bench.async_wait_idle()
+    return programs
+
+
+async def rain_toggling(bench: Bench) -> int:
+    """Pause a program on rain, it resumes by itself whenever the rain stops."""
+    rng = random.Random(len(bench.zones))
+    coordinator = bench.coordinator
+    bench.set_state(RAIN_SENSOR, "off")
+    await coordinator.async_start_irrigation()
+    for _ in range(30):
+        await asyncio.sleep(rng.randint(2, 15) * 60)
+        bench.set_state(RAIN_SENSOR, "on")
+        await asyncio.sleep(rng.randint(2, 15) * 60)
+        bench.set_state(RAIN_SENSOR, "off")
+    await coordinator.async_stop_irrigation()
+    await bench.async_wait_idle()
+    return 1
+
+
+async def stop_storm(bench: Bench) -> int:
+    """Start and stop programs in quick succession, with concurrent stops."""
+    rng = random.Random(len(bench.zones))
+    coordinator = bench.coordinator
+    for _ in range(100):
+        await coordinator.async_start_irrigation()
+        await asyncio.sleep(rng.randint(0, 90))
+        await asyncio.gather(*(coordinator.async_stop_irrigation() for _ in range(5)))
+    await bench.async_wait_idle()
+    return 100
+
+
+WORKLOADS: Dict[str, Callable[[Bench], Awaitable[int]]] = {
+    "program": single_program,
+    "overlap": overlapping_programs,
+    "rain": rain_toggling,
+    "stop_storm": stop_storm,
+}
+
+# Options of the controller each workload runs on
+WORKLOAD_OPTIONS: Dict[str, Dict[str, object]] = {
+    "program": {"max_concurrent_zones": 2},
+    "overlap": {"max_concurrent_zones": 4},
+    "rain": {"enable_weather_check": True, "rain_sensor_entity": RAIN_SENSOR},
+    "stop_storm": {},
+}
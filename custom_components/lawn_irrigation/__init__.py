@@ -1,134 +1,412 @@
-“”“The Lawn Irrigation System integration.”””
-from **future** import annotations
+"""The Lawn Irrigation System integration."""
+from __future__ import annotations
 
+import asyncio
 import logging
-from datetime import timedelta
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant, ServiceCall
-from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.const import ATTR_ENTITY_ID, Platform
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
 import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.start import async_at_started
 import voluptuous as vol
 
 from .const import (
-DOMAIN,
-SERVICE_START_IRRIGATION,
-SERVICE_STOP_IRRIGATION,
-SERVICE_RUN_ZONE,
-SERVICE_RUN_PROGRAM,
-ATTR_ZONE_ID,
-ATTR_DURATION,
-ATTR_PROGRAM_NAME,
-ATTR_ZONES,
-DEFAULT_DURATION,
+    DATA_SCHEDULER,
+    DOMAIN,
+    SERVICE_START_IRRIGATION,
+    SERVICE_STOP_IRRIGATION,
+    SERVICE_RUN_ZONE,
+    SERVICE_RUN_PROGRAM,
+    SERVICE_GET_RUN_STATUS,
+    SERVICE_CANCEL_RUN,
+    SERVICE_PAUSE_IRRIGATION,
+    SERVICE_RESUME_IRRIGATION,
+    SERVICE_DUMP_TRACE,
+    ATTR_ZONE_ID,
+    ATTR_DURATION,
+    ATTR_PROGRAM_NAME,
+    ATTR_ZONES,
+    ATTR_PRIORITY,
+    ATTR_RUN_ID,
+    ATTR_ENTRY_ID,
+    ATTR_CLEAR,
+    DEFAULT_PRIORITY,
+    RUN_STATUS_UNKNOWN,
+    SIGNAL_ZONES_ADDED,
 )
 from .coordinator import LawnIrrigationCoordinator
+from .journal import RunJournal
+from .runlog import RunLog
+
+_LOGGER = logging.getLogger(__name__)
 
-_LOGGER = logging.getLogger(**name**)
+PLATFORMS: list[Platform] = [Platform.SWITCH, Platform.SENSOR, Platform.CALENDAR]
 
-PLATFORMS: list[Platform] = [Platform.SWITCH, Platform.SENSOR]
+# Unique id suffixes of the entities every zone has, after {entry_id}_zone_{name}
+ZONE_UNIQUE_ID_SUFFIXES = ("", "_remaining_time", "_next_start")
+
+SERVICES = (
+    SERVICE_START_IRRIGATION,
+    SERVICE_STOP_IRRIGATION,
+    SERVICE_RUN_ZONE,
+    SERVICE_RUN_PROGRAM,
+    SERVICE_GET_RUN_STATUS,
+    SERVICE_CANCEL_RUN,
+    SERVICE_PAUSE_IRRIGATION,
+    SERVICE_RESUME_IRRIGATION,
+    SERVICE_DUMP_TRACE,
+)
 
 # Service schemas
 
+# Every service can target controllers by config entry or by one of their
+# entities, and goes to every controller when no target is given
+SERVICE_TARGET_SCHEMA = {
+    vol.Optional(ATTR_ENTRY_ID): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional(ATTR_ENTITY_ID): cv.entity_ids,
+}
+
 SERVICE_START_IRRIGATION_SCHEMA = vol.Schema({
-vol.Optional(ATTR_DURATION, default=DEFAULT_DURATION): cv.positive_int,
+    **SERVICE_TARGET_SCHEMA,
+    vol.Optional(ATTR_DURATION): cv.positive_int,
 })
 
+SERVICE_STOP_IRRIGATION_SCHEMA = vol.Schema(SERVICE_TARGET_SCHEMA)
+
+SERVICE_PAUSE_IRRIGATION_SCHEMA = vol.Schema(SERVICE_TARGET_SCHEMA)
+
+SERVICE_RESUME_IRRIGATION_SCHEMA = vol.Schema(SERVICE_TARGET_SCHEMA)
+
 SERVICE_RUN_ZONE_SCHEMA = vol.Schema({
-vol.Required(ATTR_ZONE_ID): cv.string,
-vol.Optional(ATTR_DURATION, default=DEFAULT_DURATION): cv.positive_int,
+    **SERVICE_TARGET_SCHEMA,
+    vol.Required(ATTR_ZONE_ID): cv.string,
+    # Without a duration the zone runs for its own default
+    vol.Optional(ATTR_DURATION): cv.positive_int,
 })
 
 SERVICE_RUN_PROGRAM_SCHEMA = vol.Schema({
-vol.Required(ATTR_PROGRAM_NAME): cv.string,
-vol.Optional(ATTR_ZONES): vol.All(cv.ensure_list, [cv.string]),
+    **SERVICE_TARGET_SCHEMA,
+    vol.Required(ATTR_PROGRAM_NAME): cv.string,
+    vol.Optional(ATTR_ZONES): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional(ATTR_PRIORITY, default=DEFAULT_PRIORITY): vol.Coerce(int),
 })
 
+SERVICE_RUN_ID_SCHEMA = vol.Schema({
+    **SERVICE_TARGET_SCHEMA,
+    vol.Required(ATTR_RUN_ID): cv.string,
+})
+
+SERVICE_DUMP_TRACE_SCHEMA = vol.Schema({
+    **SERVICE_TARGET_SCHEMA,
+    vol.Optional(ATTR_CLEAR, default=False): cv.boolean,
+})
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-“”“Set up Lawn Irrigation System from a config entry.”””
-coordinator = LawnIrrigationCoordinator(hass, entry)
+    """Set up Lawn Irrigation System from a config entry."""
+    start = time.perf_counter()
+    coordinator = LawnIrrigationCoordinator(hass, entry)
+
+    # One snapshot from the state machine instead of a first refresh
+    coordinator.async_seed()
+    coordinator.async_setup_listeners()
+    await coordinator.async_restore()
+    # One timer for the next start of all schedules
+    coordinator.async_load_schedules()
 
-```
-try:
-    await coordinator.async_config_entry_first_refresh()
-except Exception as err:
-    _LOGGER.error("Error setting up lawn irrigation: %s", err)
-    return False
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
 
-hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
-await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    # Register services, shared by every config entry
+    _async_register_services(hass)
 
-# Register services
-await _async_register_services(hass, coordinator)
+    # Options and zone edits are applied to the running coordinator
+    entry.async_on_unload(entry.add_update_listener(async_apply_entry_update))
 
-# Update listener for options
-entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+    # The safety resync is not needed while Home Assistant is still booting
+    entry.async_on_unload(async_at_started(hass, coordinator.async_started))
+
+    coordinator.metrics.setup = time.perf_counter() - start
+    _LOGGER.debug(
+        "Set up %s with %d zones in %.1f ms",
+        entry.title,
+        len(coordinator.zones),
+        coordinator.metrics.setup * 1000,
+    )
 
-return True
-```
+    return True
+
+
+async def async_apply_entry_update(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply changed options and zones without reloading the entry."""
+    coordinator: LawnIrrigationCoordinator = hass.data[DOMAIN][entry.entry_id]
+    added, removed = await coordinator.async_apply_entry()
+
+    if removed:
+        # Removing the registry entries also removes the entities
+        unique_ids = {
+            f"{entry.entry_id}_zone_{zone_name}{suffix}"
+            for zone_name in removed
+            for suffix in ZONE_UNIQUE_ID_SUFFIXES
+        }
+        registry = er.async_get(hass)
+        for entity in er.async_entries_for_config_entry(registry, entry.entry_id):
+            if entity.unique_id in unique_ids:
+                registry.async_remove(entity.entity_id)
+
+    if added:
+        async_dispatcher_send(hass, SIGNAL_ZONES_ADDED.format(entry.entry_id), added)
 
-async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
-“”“Reload config entry.”””
-await async_unload_entry(hass, entry)
-await async_setup_entry(hass, entry)
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-“”“Unload a config entry.”””
-unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    """Unload a config entry."""
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+
+    if unload_ok:
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        # Persist the running program so setup can pick it up again
+        await coordinator.async_flush_journal()
+        await coordinator.run_log.async_flush()
+        coordinator.async_stop()
+
+        if not hass.data[DOMAIN]:
+            _async_unregister_services(hass)
+            # The last entry is gone, drop the timer shared by all entries
+            scheduler = hass.data.pop(DATA_SCHEDULER, None)
+            if scheduler is not None:
+                scheduler.async_shutdown()
+
+    return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the run journal and run log of a deleted config entry."""
+    await RunJournal(hass, entry.entry_id).async_remove()
+    await RunLog(hass, entry).async_remove()
+
+
+@callback
+def _async_get_coordinators(
+    hass: HomeAssistant, call: ServiceCall
+) -> List[LawnIrrigationCoordinator]:
+    """Return the controllers a service call targets, every one by default."""
+    coordinators: Dict[str, LawnIrrigationCoordinator] = hass.data.get(DOMAIN, {})
+    entry_ids: Set[str] = set(call.data.get(ATTR_ENTRY_ID, []))
+    entity_ids: List[str] = call.data.get(ATTR_ENTITY_ID, [])
+    if not entry_ids and not entity_ids:
+        return list(coordinators.values())
+
+    registry = er.async_get(hass)
+    for entity_id in entity_ids:
+        entity = registry.async_get(entity_id)
+        if entity is None or entity.platform != DOMAIN:
+            _LOGGER.error("Entity %s does not belong to an irrigation controller", entity_id)
+            continue
+        entry_ids.add(entity.config_entry_id)
+
+    targets = []
+    for entry_id in entry_ids:
+        coordinator = coordinators.get(entry_id)
+        if coordinator is None:
+            _LOGGER.error("Irrigation controller %s not found", entry_id)
+            continue
+        targets.append(coordinator)
+    return targets
+
+
+async def _async_dispatch(
+    coordinators: List[LawnIrrigationCoordinator],
+    action: Callable[[LawnIrrigationCoordinator], Awaitable[Any]],
+) -> Dict[str, Any]:
+    """Run a service action on several controllers concurrently."""
+    results = await asyncio.gather(*(action(coordinator) for coordinator in coordinators))
+    return {
+        coordinator.entry.entry_id: result
+        for coordinator, result in zip(coordinators, results)
+    }
 
-```
-if unload_ok:
-    coordinator = hass.data[DOMAIN].pop(entry.entry_id)
-    coordinator.async_stop()
 
-return unload_ok
-```
+def _run_response(runs: Dict[str, Optional[str]]) -> ServiceResponse:
+    """Return the run ids per controller, plus the run id of a single one."""
+    response: Dict[str, Any] = {"runs": runs}
+    if len(runs) == 1:
+        response[ATTR_RUN_ID] = next(iter(runs.values()))
+    return response
 
-async def _async_register_services(hass: HomeAssistant, coordinator: LawnIrrigationCoordinator) -> None:
-“”“Register services for the integration.”””
 
-```
-# Only register services if not already registered
-if not hass.services.has_service(DOMAIN, SERVICE_START_IRRIGATION):
-    async def start_irrigation(call: ServiceCall) -> None:
+@callback
+def _async_register_services(hass: HomeAssistant) -> None:
+    """Register the services shared by every config entry."""
+    if hass.services.has_service(DOMAIN, SERVICE_START_IRRIGATION):
+        return
+
+    async def start_irrigation(call: ServiceCall) -> ServiceResponse:
         """Start irrigation for all zones."""
-        duration = call.data.get(ATTR_DURATION, DEFAULT_DURATION)
-        await coordinator.async_start_irrigation(duration)
-    
-    hass.services.async_register(
-        DOMAIN, SERVICE_START_IRRIGATION, start_irrigation, SERVICE_START_IRRIGATION_SCHEMA
-    )
+        duration = call.data.get(ATTR_DURATION)
+        runs = await _async_dispatch(
+            _async_get_coordinators(hass, call),
+            lambda coordinator: coordinator.async_start_irrigation(duration),
+        )
+        return _run_response(runs)
 
-if not hass.services.has_service(DOMAIN, SERVICE_STOP_IRRIGATION):
     async def stop_irrigation(call: ServiceCall) -> None:
         """Stop all irrigation."""
-        await coordinator.async_stop_irrigation()
-    
-    hass.services.async_register(
-        DOMAIN, SERVICE_STOP_IRRIGATION, stop_irrigation
-    )
+        await _async_dispatch(
+            _async_get_coordinators(hass, call),
+            lambda coordinator: coordinator.async_stop_irrigation(),
+        )
+
+    async def pause_irrigation(call: ServiceCall) -> None:
+        """Pause irrigation, keeping the progress of every zone."""
+        await _async_dispatch(
+            _async_get_coordinators(hass, call),
+            lambda coordinator: coordinator.async_pause_irrigation(),
+        )
 
-if not hass.services.has_service(DOMAIN, SERVICE_RUN_ZONE):
-    async def run_zone(call: ServiceCall) -> None:
+    async def resume_irrigation(call: ServiceCall) -> None:
+        """Resume paused irrigation."""
+        await _async_dispatch(
+            _async_get_coordinators(hass, call),
+            lambda coordinator: coordinator.async_resume_irrigation(),
+        )
+
+    async def run_zone(call: ServiceCall) -> ServiceResponse:
         """Run specific zone."""
         zone_id = call.data[ATTR_ZONE_ID]
-        duration = call.data.get(ATTR_DURATION, DEFAULT_DURATION)
-        await coordinator.async_run_zone(zone_id, duration)
-    
-    hass.services.async_register(
-        DOMAIN, SERVICE_RUN_ZONE, run_zone, SERVICE_RUN_ZONE_SCHEMA
-    )
+        duration = call.data.get(ATTR_DURATION)
+        coordinators = [
+            coordinator
+            for coordinator in _async_get_coordinators(hass, call)
+            if zone_id in coordinator.zones
+        ]
+        if not coordinators:
+            _LOGGER.error("Zone %s not found", zone_id)
+        runs = await _async_dispatch(
+            coordinators, lambda coordinator: coordinator.async_run_zone(zone_id, duration)
+        )
+        return _run_response(runs)
 
-if not hass.services.has_service(DOMAIN, SERVICE_RUN_PROGRAM):
-    async def run_program(call: ServiceCall) -> None:
+    async def run_program(call: ServiceCall) -> ServiceResponse:
         """Run irrigation program."""
         program_name = call.data[ATTR_PROGRAM_NAME]
         zones = call.data.get(ATTR_ZONES, [])
-        await coordinator.async_run_program(program_name, zones)
-    
+        priority = call.data.get(ATTR_PRIORITY, DEFAULT_PRIORITY)
+        coordinators = [
+            coordinator
+            for coordinator in _async_get_coordinators(hass, call)
+            if not zones or any(zone in coordinator.zones for zone in zones)
+        ]
+        runs = await _async_dispatch(
+            coordinators,
+            lambda coordinator: coordinator.async_run_program(program_name, zones, priority),
+        )
+        return _run_response(runs)
+
+    async def get_run_status(call: ServiceCall) -> ServiceResponse:
+        """Return the status of a run."""
+        run_id = call.data[ATTR_RUN_ID]
+        for coordinator in _async_get_coordinators(hass, call):
+            status = coordinator.async_get_run_status(run_id)
+            if status is not None:
+                status[ATTR_ENTRY_ID] = coordinator.entry.entry_id
+                return status
+        return {ATTR_RUN_ID: run_id, "status": RUN_STATUS_UNKNOWN}
+
+    async def cancel_run(call: ServiceCall) -> ServiceResponse:
+        """Cancel a queued or running run."""
+        run_id = call.data[ATTR_RUN_ID]
+        for coordinator in _async_get_coordinators(hass, call):
+            if await coordinator.async_cancel_run(run_id):
+                return {ATTR_RUN_ID: run_id, "cancelled": True}
+        return {ATTR_RUN_ID: run_id, "cancelled": False}
+
+    async def dump_trace(call: ServiceCall) -> ServiceResponse:
+        """Return the decision trace, or write it to the log without a response."""
+        traces = {}
+        for coordinator in _async_get_coordinators(hass, call):
+            trace = coordinator.trace
+            traces[coordinator.entry.entry_id] = dumped = trace.as_dict()
+            if not call.return_response:
+                for record in dumped["records"]:
+                    _LOGGER.info(
+                        "%s trace %s %s %s %s",
+                        coordinator.entry.title,
+                        record["time"],
+                        record["event"],
+                        record["subject"],
+                        record["detail"],
+                    )
+            if call.data[ATTR_CLEAR]:
+                trace.clear()
+        return {"traces": traces} if call.return_response else None
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_START_IRRIGATION,
+        start_irrigation,
+        SERVICE_START_IRRIGATION_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
     hass.services.async_register(
-        DOMAIN, SERVICE_RUN_PROGRAM, run_program, SERVICE_RUN_PROGRAM_SCHEMA
+        DOMAIN, SERVICE_STOP_IRRIGATION, stop_irrigation, SERVICE_STOP_IRRIGATION_SCHEMA
     )
-```
+    hass.services.async_register(
+        DOMAIN, SERVICE_PAUSE_IRRIGATION, pause_irrigation, SERVICE_PAUSE_IRRIGATION_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_RESUME_IRRIGATION, resume_irrigation, SERVICE_RESUME_IRRIGATION_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_RUN_ZONE,
+        run_zone,
+        SERVICE_RUN_ZONE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_RUN_PROGRAM,
+        run_program,
+        SERVICE_RUN_PROGRAM_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_RUN_STATUS,
+        get_run_status,
+        SERVICE_RUN_ID_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_CANCEL_RUN,
+        cancel_run,
+        SERVICE_RUN_ID_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_DUMP_TRACE,
+        dump_trace,
+        SERVICE_DUMP_TRACE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+@callback
+def _async_unregister_services(hass: HomeAssistant) -> None:
+    """Remove the services once the last config entry is unloaded."""
+    for service in SERVICES:
+        hass.services.async_remove(DOMAIN, service)
@@ -0,0 +1,243 @@
+"""Valve actuation for Lawn Irrigation System."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from homeassistant.const import STATE_OFF, STATE_ON, STATE_UNAVAILABLE
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+
+from .metrics import IrrigationMetrics
+from .trace import CANCEL, CONFIRMED, SENT, TIMEOUT, DecisionTrace
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds a service call and the state confirmation may take together
+ACTUATION_TIMEOUT = 5.0
+ACTUATION_ATTEMPTS = 3
+# Wait before the first retry, doubled for every further one
+ACTUATION_BACKOFF = 1.0
+# Failed actuations in a row after which a valve is skipped, and for how long
+BREAKER_THRESHOLD = 2
+BREAKER_COOLDOWN = 3600.0
+
+
+class ValveActuator:
+    """Switch zone valves in bulk and confirm they followed.
+
+    A command counts as done once the state of the switch reports the
+    target, which the coordinator forwards to async_state_changed. Valves
+    that do not confirm within the timeout are retried with backoff. A
+    valve that fails BREAKER_THRESHOLD times in a row is no longer opened
+    for BREAKER_COOLDOWN seconds, after which one attempt may close the
+    breaker again. Closing a valve is always attempted, unless the valve
+    is missing or unavailable: no command can reach it then, so it is
+    returned as failed right away, without waiting or counting against its
+    breaker, and the caller reconciles it once it reports a state again.
+
+    A newer command for a valve supersedes the one in flight: its wait for
+    confirmation ends and it is not retried or counted as a failure. A
+    valve whose turn on is still in flight is closed even though it does
+    not report on yet.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        metrics: Optional[IrrigationMetrics] = None,
+        trace: Optional[DecisionTrace] = None,
+    ) -> None:
+        """Initialize the actuator."""
+        self.hass = hass
+        self.metrics = metrics
+        self.trace = trace or DecisionTrace()
+        # Valves waiting for a state: entity_id -> (state, confirmation)
+        self._waiters: Dict[str, Tuple[str, asyncio.Future[None]]] = {}
+        # Command in flight per valve: entity_id -> (state, command)
+        self._commands: Dict[str, Tuple[str, object]] = {}
+        self._failures: Dict[str, int] = {}
+        # Valves skipped until a loop time
+        self._tripped: Dict[str, float] = {}
+
+    def _pending(self, entity_ids: Iterable[str], target: str) -> List[str]:
+        """Return the entities that are not already in, or on their way to, the target state."""
+        pending = []
+        for entity_id in entity_ids:
+            state = self.hass.states.get(entity_id)
+            command = self._commands.get(entity_id)
+            if state is None or state.state != target or (
+                command is not None and command[0] != target
+            ):
+                pending.append(entity_id)
+        return pending
+
+    def _reachable(self, entity_id: str) -> bool:
+        """Return if a valve reports a state a command could change."""
+        state = self.hass.states.get(entity_id)
+        return state is not None and state.state != STATE_UNAVAILABLE
+
+    def _supersede(self, entity_ids: Iterable[str], target: str, command: object) -> None:
+        """Make a command the one in flight for valves, aborting the previous one."""
+        for entity_id in entity_ids:
+            previous = self._commands.get(entity_id)
+            if previous is not None:
+                self.trace.record(CANCEL, entity_id, previous[0])
+            waiter = self._waiters.pop(entity_id, None)
+            if waiter is not None and not waiter[1].done():
+                waiter[1].cancel()
+            self._commands[entity_id] = (target, command)
+
+    def _current(self, entity_ids: Iterable[str], command: object) -> List[str]:
+        """Return the valves a command has not been superseded for."""
+        return [
+            entity_id
+            for entity_id in entity_ids
+            if (current := self._commands.get(entity_id)) is not None and current[1] is command
+        ]
+
+    @callback
+    def async_state_changed(self, entity_id: str, state: str) -> None:
+        """Take a reported valve state as the confirmation of a command."""
+        if self.metrics is not None:
+            self.metrics.state_observed(entity_id, state, self.hass.loop.time())
+        waiter = self._waiters.get(entity_id)
+        if waiter is not None and waiter[0] == state and not waiter[1].done():
+            self.trace.record(CONFIRMED, entity_id, state)
+            waiter[1].set_result(None)
+
+    async def _async_call(self, service: str, entity_ids: List[str], target: str) -> None:
+        """Call a switch service, timing the call and the valve response."""
+        metrics = self.metrics
+        data = {"entity_id": entity_ids}
+        if metrics is None:
+            await self.hass.services.async_call("switch", service, data, blocking=True)
+            return
+
+        start = self.hass.loop.time()
+        metrics.command_sent(entity_ids, target, start)
+        await self.hass.services.async_call("switch", service, data, blocking=True)
+        metrics.service_call.record(self.hass.loop.time() - start)
+
+    async def _async_attempt(self, service: str, entity_ids: List[str], target: str) -> List[str]:
+        """Send one command and return the valves that did not confirm in time."""
+        loop = self.hass.loop
+        waiters = {entity_id: loop.create_future() for entity_id in entity_ids}
+        for entity_id, future in waiters.items():
+            self._waiters[entity_id] = (target, future)
+        self.trace.record(SENT, tuple(entity_ids), target)
+        try:
+            async with asyncio.timeout(ACTUATION_TIMEOUT):
+                await self._async_call(service, entity_ids, target)
+                await asyncio.wait(waiters.values())
+        except TimeoutError:
+            pass
+        except HomeAssistantError as err:
+            _LOGGER.warning("Could not %s %s: %s", service, ", ".join(entity_ids), err)
+        finally:
+            for entity_id, future in waiters.items():
+                if self._waiters.get(entity_id, (None, None))[1] is future:
+                    del self._waiters[entity_id]
+        pending = [entity_id for entity_id, future in waiters.items() if not future.done()]
+        if pending:
+            self.trace.record(TIMEOUT, tuple(pending), target)
+        return pending
+
+    def _tripped_now(self, entity_id: str, now: float) -> bool:
+        """Return if a valve is skipped, letting one attempt through after the cooldown."""
+        until = self._tripped.get(entity_id)
+        if until is None:
+            return False
+        if now < until:
+            return True
+        # Half open: one more failure trips the breaker again
+        del self._tripped[entity_id]
+        self._failures[entity_id] = BREAKER_THRESHOLD - 1
+        return False
+
+    def _record_failure(self, entity_id: str, now: float) -> None:
+        """Count a failed actuation and trip the breaker of a failing valve."""
+        failures = self._failures[entity_id] = self._failures.get(entity_id, 0) + 1
+        if failures >= BREAKER_THRESHOLD and entity_id not in self._tripped:
+            self._tripped[entity_id] = now + BREAKER_COOLDOWN
+            _LOGGER.warning(
+                "Valve %s failed %d times in a row, skipping it for %.0f minutes",
+                entity_id,
+                failures,
+                BREAKER_COOLDOWN / 60,
+            )
+
+    async def _async_actuate(
+        self, service: str, entity_ids: Iterable[str], target: str
+    ) -> List[str]:
+        """Bring valves to a state with retries and return those that failed."""
+        loop = self.hass.loop
+        pending = self._pending(entity_ids, target)
+        unreachable = [entity_id for entity_id in pending if not self._reachable(entity_id)]
+        if unreachable:
+            _LOGGER.debug("Valves unavailable, not sending %s: %s", service, ", ".join(unreachable))
+            pending = [entity_id for entity_id in pending if entity_id not in unreachable]
+        failed: List[str] = []
+        if target == STATE_ON:
+            now = loop.time()
+            failed = [entity_id for entity_id in pending if self._tripped_now(entity_id, now)]
+            if failed:
+                pending = [entity_id for entity_id in pending if entity_id not in failed]
+
+        sent = list(pending)
+        command = object()
+        # A command in flight for an unreachable valve is aborted all the same
+        self._supersede(sent + unreachable, target, command)
+        for attempt in range(ACTUATION_ATTEMPTS):
+            if attempt and pending:
+                await asyncio.sleep(ACTUATION_BACKOFF * 2 ** (attempt - 1))
+                # A valve may have caught up while we waited
+                pending = self._pending(pending, target)
+            pending = self._current(pending, command)
+            if not pending:
+                break
+            pending = self._current(
+                await self._async_attempt(service, pending, target), command
+            )
+
+        current = set(self._current(sent + unreachable, command))
+        for entity_id in current:
+            del self._commands[entity_id]
+
+        now = loop.time()
+        for entity_id in sent:
+            if entity_id not in current:
+                # Superseded, the newer command counts
+                continue
+            if entity_id in pending:
+                self._record_failure(entity_id, now)
+            else:
+                self._failures.pop(entity_id, None)
+                self._tripped.pop(entity_id, None)
+        if pending:
+            _LOGGER.error(
+                "Valves did not confirm %s after %d attempts: %s",
+                service,
+                ACTUATION_ATTEMPTS,
+                ", ".join(pending),
+            )
+        return unreachable + failed + pending
+
+    async def async_turn_on(self, entity_ids: Iterable[str]) -> List[str]:
+        """Open every valve that is not already on, return those that failed."""
+        return await self._async_actuate("turn_on", entity_ids, STATE_ON)
+
+    async def async_turn_off(self, entity_ids: Iterable[str]) -> List[str]:
+        """Close every valve that is not already off, return those that failed."""
+        return await self._async_actuate("turn_off", entity_ids, STATE_OFF)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the failing valves and open breakers for diagnostics."""
+        now = self.hass.loop.time()
+        return {
+            "failures": dict(self._failures),
+            "tripped": {
+                entity_id: round(until - now) for entity_id, until in self._tripped.items()
+            },
+        }
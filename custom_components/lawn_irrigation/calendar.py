@@ -0,0 +1,94 @@
+"""Calendar platform for Lawn Irrigation System."""
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from homeassistant.components.calendar import CalendarEntity, CalendarEvent
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.util.dt import utcnow
+
+from .const import DOMAIN, SIGNAL_SCHEDULES_UPDATED
+from .coordinator import LawnIrrigationCoordinator
+from .schedules import Schedule
+
+_LOGGER = logging.getLogger(__name__)
+
+# How far back to look for a scheduled program that is still running
+LOOKBACK = timedelta(days=1)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up the lawn irrigation calendar platform."""
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    async_add_entities([LawnIrrigationScheduleCalendar(coordinator)])
+
+
+class LawnIrrigationScheduleCalendar(CalendarEntity):
+    """Upcoming runs of the schedules of a controller.
+
+    The calendar only changes when a schedule starts or the schedules are
+    edited, so it follows the schedule signal instead of every coordinator
+    update.
+    """
+
+    _attr_should_poll = False
+
+    def __init__(self, coordinator: LawnIrrigationCoordinator) -> None:
+        """Initialize the calendar."""
+        self.coordinator = coordinator
+        self._attr_name = f"{coordinator.entry.title} Schedule"
+        self._attr_unique_id = f"{coordinator.entry.entry_id}_schedule"
+        self._attr_icon = "mdi:calendar-clock"
+
+    async def async_added_to_hass(self) -> None:
+        """Follow schedule starts and changes."""
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_SCHEDULES_UPDATED.format(self.coordinator.entry.entry_id),
+                self.async_write_ha_state,
+            )
+        )
+
+    def _event(self, when: datetime, schedule: Schedule) -> CalendarEvent:
+        """Return the calendar event of one start."""
+        minutes = self.coordinator.schedule_duration(schedule, when)
+        return CalendarEvent(
+            start=when,
+            end=when + timedelta(minutes=max(minutes, 1)),
+            summary=schedule.name,
+            description=", ".join(schedule.zones) or None,
+            uid=f"{self.coordinator.entry.entry_id}_{schedule.name}_{when.isoformat()}",
+        )
+
+    @property
+    def event(self) -> Optional[CalendarEvent]:
+        """Return the scheduled program running now, or the next one."""
+        engine = self.coordinator.schedule_engine
+        if engine.last_start is not None:
+            event = self._event(*engine.last_start)
+            if event.end > utcnow():
+                return event
+        upcoming = engine.next_start
+        return self._event(*upcoming) if upcoming is not None else None
+
+    async def async_get_events(
+        self, hass: HomeAssistant, start_date: datetime, end_date: datetime
+    ) -> List[CalendarEvent]:
+        """Return the scheduled programs in a time range."""
+        events = [
+            self._event(when, schedule)
+            for when, schedule in self.coordinator.schedule_engine.starts_between(
+                start_date - LOOKBACK, end_date
+            )
+        ]
+        return [event for event in events if event.end > start_date]
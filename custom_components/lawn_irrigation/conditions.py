@@ -0,0 +1,325 @@
+"""Weather and soil skip conditions for Lawn Irrigation System."""
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Mapping, Optional, Union
+
+from homeassistant.const import STATE_ON
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, State, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.util.dt import utcnow
+
+from .const import (
+    CONF_ENABLE_WEATHER_CHECK,
+    CONF_RAIN_SENSOR,
+    CONF_RAIN_DELAY,
+    CONF_FORECAST_SENSOR,
+    CONF_FORECAST_THRESHOLD,
+    CONF_WIND_SENSOR,
+    CONF_MAX_WIND,
+    CONF_TEMPERATURE_SENSOR,
+    CONF_MIN_TEMPERATURE,
+    CONF_SOIL_MOISTURE_SENSOR,
+    CONF_MAX_SOIL_MOISTURE,
+    DEFAULT_RAIN_DELAY,
+    DEFAULT_FORECAST_THRESHOLD,
+    DEFAULT_MAX_WIND,
+    DEFAULT_MIN_TEMPERATURE,
+    DEFAULT_MAX_SOIL_MOISTURE,
+    HYSTERESIS_FORECAST,
+    HYSTERESIS_WIND,
+    HYSTERESIS_TEMPERATURE,
+    HYSTERESIS_SOIL_MOISTURE,
+    SKIP_RAIN,
+    SKIP_RAIN_DELAY,
+    SKIP_FORECAST,
+    SKIP_WIND,
+    SKIP_FREEZE,
+    SKIP_SOIL_MOISTURE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class BinaryCondition:
+    """A sensor that blocks irrigation while it is on."""
+
+    __slots__ = ("reason", "entity_id", "blocked")
+
+    def __init__(self, reason: str, entity_id: str) -> None:
+        """Initialize the condition."""
+        self.reason = reason
+        self.entity_id = entity_id
+        self.blocked = False
+
+    def update(self, state: Optional[State]) -> None:
+        """Recompute the condition from a new state."""
+        self.blocked = state is not None and state.state == STATE_ON
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the condition for diagnostics."""
+        return {"entity_id": self.entity_id, "blocked": self.blocked}
+
+
+class ThresholdCondition:
+    """A numeric sensor that blocks irrigation past a limit.
+
+    Once blocked, the reading has to come back past the limit by the
+    hysteresis margin before irrigation is allowed again. A reading that is
+    unavailable or not a number never blocks.
+    """
+
+    __slots__ = ("reason", "entity_id", "limit", "hysteresis", "above", "blocked", "value")
+
+    def __init__(
+        self, reason: str, entity_id: str, limit: float, hysteresis: float, above: bool
+    ) -> None:
+        """Initialize the condition."""
+        self.reason = reason
+        self.entity_id = entity_id
+        self.limit = limit
+        self.hysteresis = hysteresis
+        self.above = above
+        self.blocked = False
+        self.value: Optional[float] = None
+
+    def update(self, state: Optional[State]) -> None:
+        """Recompute the condition from a new state."""
+        try:
+            self.value = float(state.state) if state is not None else None
+        except ValueError:
+            self.value = None
+
+        if self.value is None:
+            self.blocked = False
+        elif self.above:
+            limit = self.limit - self.hysteresis if self.blocked else self.limit
+            self.blocked = self.value > limit
+        else:
+            limit = self.limit + self.hysteresis if self.blocked else self.limit
+            self.blocked = self.value < limit
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the condition for diagnostics."""
+        return {
+            "entity_id": self.entity_id,
+            "value": self.value,
+            "limit": self.limit,
+            "blocked": self.blocked,
+        }
+
+
+Condition = Union[BinaryCondition, ThresholdCondition]
+
+# Options the engine is built from
+SKIP_OPTIONS = (
+    CONF_ENABLE_WEATHER_CHECK,
+    CONF_RAIN_SENSOR,
+    CONF_RAIN_DELAY,
+    CONF_FORECAST_SENSOR,
+    CONF_FORECAST_THRESHOLD,
+    CONF_WIND_SENSOR,
+    CONF_MAX_WIND,
+    CONF_TEMPERATURE_SENSOR,
+    CONF_MIN_TEMPERATURE,
+    CONF_SOIL_MOISTURE_SENSOR,
+    CONF_MAX_SOIL_MOISTURE,
+)
+
+
+def skip_options(options: Mapping[str, Any]) -> Dict[str, Any]:
+    """Return the options a skip engine depends on."""
+    return {key: options.get(key) for key in SKIP_OPTIONS}
+
+
+class SkipEngine:
+    """Cached decision whether irrigation may run.
+
+    Each input is evaluated when its state changes and the decision is
+    kept, so checking it on the hot path is an attribute read. After the
+    rain sensor clears, irrigation stays skipped for the rain delay.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        options: Mapping[str, Any],
+        on_change: Callable[[], None],
+    ) -> None:
+        """Initialize the engine."""
+        self.hass = hass
+        self._on_change = on_change
+        self._conditions: Dict[str, Condition] = {}
+        self.rain_delay = timedelta(hours=options.get(CONF_RAIN_DELAY, DEFAULT_RAIN_DELAY))
+        self.delay_until: Optional[datetime] = None
+        self._unsub_delay: Optional[CALLBACK_TYPE] = None
+        self.allowed = True
+        self.reasons: List[str] = []
+
+        if not options.get(CONF_ENABLE_WEATHER_CHECK, False):
+            return
+
+        if options.get(CONF_RAIN_SENSOR):
+            self._add(BinaryCondition(SKIP_RAIN, options[CONF_RAIN_SENSOR]))
+        if options.get(CONF_FORECAST_SENSOR):
+            self._add(
+                ThresholdCondition(
+                    SKIP_FORECAST,
+                    options[CONF_FORECAST_SENSOR],
+                    options.get(CONF_FORECAST_THRESHOLD, DEFAULT_FORECAST_THRESHOLD),
+                    HYSTERESIS_FORECAST,
+                    above=True,
+                )
+            )
+        if options.get(CONF_WIND_SENSOR):
+            self._add(
+                ThresholdCondition(
+                    SKIP_WIND,
+                    options[CONF_WIND_SENSOR],
+                    options.get(CONF_MAX_WIND, DEFAULT_MAX_WIND),
+                    HYSTERESIS_WIND,
+                    above=True,
+                )
+            )
+        if options.get(CONF_TEMPERATURE_SENSOR):
+            self._add(
+                ThresholdCondition(
+                    SKIP_FREEZE,
+                    options[CONF_TEMPERATURE_SENSOR],
+                    options.get(CONF_MIN_TEMPERATURE, DEFAULT_MIN_TEMPERATURE),
+                    HYSTERESIS_TEMPERATURE,
+                    above=False,
+                )
+            )
+        if options.get(CONF_SOIL_MOISTURE_SENSOR):
+            self._add(
+                ThresholdCondition(
+                    SKIP_SOIL_MOISTURE,
+                    options[CONF_SOIL_MOISTURE_SENSOR],
+                    options.get(CONF_MAX_SOIL_MOISTURE, DEFAULT_MAX_SOIL_MOISTURE),
+                    HYSTERESIS_SOIL_MOISTURE,
+                    above=True,
+                )
+            )
+
+    def _add(self, condition: Condition) -> None:
+        """Add an input."""
+        self._conditions[condition.entity_id] = condition
+
+    @property
+    def entity_ids(self) -> List[str]:
+        """Return the entities the decision depends on."""
+        return list(self._conditions)
+
+    def __contains__(self, entity_id: object) -> bool:
+        """Return if an entity is an input."""
+        return entity_id in self._conditions
+
+    @callback
+    def async_carry_over(self, previous: SkipEngine) -> None:
+        """Take over the state of the engine this one replaces after an options change.
+
+        Inputs that are still configured keep whether they were blocked, so
+        their hysteresis holds, and a running rain delay keeps going, ending
+        where the new rain delay would have from the same rain stop.
+        """
+        for entity_id, condition in self._conditions.items():
+            old = previous._conditions.get(entity_id)
+            if old is not None and old.reason == condition.reason:
+                condition.blocked = old.blocked
+        self.reasons = previous.reasons
+        self.allowed = previous.allowed
+
+        if previous.delay_until is None or not self.rain_delay:
+            return
+        if not any(condition.reason == SKIP_RAIN for condition in self._conditions.values()):
+            return
+        delay_until = previous.delay_until - previous.rain_delay + self.rain_delay
+        if delay_until > utcnow():
+            self._async_arm_delay(delay_until)
+
+    @callback
+    def async_start(self) -> None:
+        """Evaluate every input from its current state."""
+        for entity_id, condition in self._conditions.items():
+            condition.update(self.hass.states.get(entity_id))
+        self._async_decide()
+
+    @callback
+    def async_update(self, entity_id: str, state: Optional[State]) -> None:
+        """Re-evaluate the input whose state changed."""
+        condition = self._conditions.get(entity_id)
+        if condition is None:
+            return
+
+        was_blocked = condition.blocked
+        condition.update(state)
+        if was_blocked and not condition.blocked and condition.reason == SKIP_RAIN:
+            self._async_start_delay()
+        self._async_decide()
+
+    @callback
+    def _async_start_delay(self) -> None:
+        """Keep skipping for the rain delay after the rain stopped."""
+        if not self.rain_delay:
+            return
+
+        self._async_arm_delay(utcnow() + self.rain_delay)
+        _LOGGER.info("Rain stopped, skipping irrigation until %s", self.delay_until)
+
+    @callback
+    def _async_arm_delay(self, delay_until: datetime) -> None:
+        """Skip irrigation until a time."""
+        if self._unsub_delay is not None:
+            self._unsub_delay()
+        self.delay_until = delay_until
+        self._unsub_delay = async_track_point_in_utc_time(
+            self.hass, self._async_delay_ended, self.delay_until
+        )
+
+    @callback
+    def _async_delay_ended(self, _now: datetime) -> None:
+        """End the rain delay."""
+        self._unsub_delay = None
+        self.delay_until = None
+        self._async_decide()
+
+    @callback
+    def _async_decide(self) -> None:
+        """Recompute the decision and report when it changed."""
+        reasons = [
+            condition.reason for condition in self._conditions.values() if condition.blocked
+        ]
+        if self.delay_until is not None:
+            reasons.append(SKIP_RAIN_DELAY)
+
+        if reasons == self.reasons:
+            return
+
+        self.reasons = reasons
+        self.allowed = not reasons
+        if reasons:
+            _LOGGER.info("Irrigation will be skipped: %s", ", ".join(reasons))
+        else:
+            _LOGGER.info("Conditions allow irrigation again")
+        self._on_change()
+
+    @callback
+    def async_stop(self) -> None:
+        """Cancel the rain delay timer."""
+        if self._unsub_delay is not None:
+            self._unsub_delay()
+            self._unsub_delay = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the decision and its inputs for diagnostics."""
+        return {
+            "allowed": self.allowed,
+            "reasons": self.reasons,
+            "delay_until": self.delay_until.isoformat() if self.delay_until else None,
+            "conditions": {
+                condition.reason: condition.as_dict()
+                for condition in self._conditions.values()
+            },
+        }
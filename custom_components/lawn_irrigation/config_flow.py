@@ -1,146 +1,470 @@
-“”“Config flow for Lawn Irrigation System integration.”””
+"""Config flow for Lawn Irrigation System integration."""
 import logging
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import callback
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
-import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers import selector
+from homeassistant.util import slugify
 
-from .const import DOMAIN, CONF_ZONES, CONF_ZONE_NAME, CONF_ZONE_ENTITY, CONF_ZONE_DURATION
+from .const import (
+    DOMAIN,
+    CONF_ZONES,
+    CONF_SCHEDULES,
+    CONF_SCHEDULE_ZONES,
+    CONF_ZONE_NAME,
+    CONF_ZONE_ENTITY,
+    CONF_ZONE_DURATION,
+    CONF_ZONE_FLOW,
+    CONF_ZONE_CYCLE,
+    CONF_ZONE_SOAK,
+    CONF_MAX_FLOW,
+    CONF_MAX_CONCURRENT_ZONES,
+    CONF_DEFAULT_DURATION,
+    CONF_MASTER_VALVE,
+    CONF_VALVE_OVERLAP,
+    CONF_TRACE_SIZE,
+    CONF_ENABLE_WEATHER_CHECK,
+    CONF_RAIN_SENSOR,
+    CONF_RAIN_DELAY,
+    CONF_FORECAST_SENSOR,
+    CONF_FORECAST_THRESHOLD,
+    CONF_WIND_SENSOR,
+    CONF_MAX_WIND,
+    CONF_TEMPERATURE_SENSOR,
+    CONF_MIN_TEMPERATURE,
+    CONF_SOIL_MOISTURE_SENSOR,
+    CONF_MAX_SOIL_MOISTURE,
+    DEFAULT_MAX_CONCURRENT_ZONES,
+    DEFAULT_RAIN_DELAY,
+    DEFAULT_FORECAST_THRESHOLD,
+    DEFAULT_MAX_WIND,
+    DEFAULT_MIN_TEMPERATURE,
+    DEFAULT_MAX_SOIL_MOISTURE,
+    DEFAULT_DURATION,
+    DEFAULT_VALVE_OVERLAP,
+    DEFAULT_TRACE_SIZE,
+)
+from .schedules import format_schedules, parse_schedules
+from .zones import format_zones, parse_zones
 
-_LOGGER = logging.getLogger(**name**)
+_LOGGER = logging.getLogger(__name__)
 
-class LawnIrrigationConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
-“”“Handle a config flow for Lawn Irrigation System.”””
-
-```
-VERSION = 1
-
-def __init__(self):
-    """Initialize the config flow."""
-    self.zones = []
-
-async def async_step_user(self, user_input=None) -> FlowResult:
-    """Handle the initial step."""
-    errors = {}
-    
-    if user_input is not None:
-        # Check if integration is already configured
-        await self.async_set_unique_id(DOMAIN)
-        self._abort_if_unique_id_configured()
-        
-        self.system_name = user_input["system_name"]
-        return await self.async_step_zone()
-
-    return self.async_show_form(
-        step_id="user",
-        data_schema=vol.Schema({
-            vol.Required("system_name", default="Lawn Irrigation"): str,
-        }),
-        errors=errors
-    )
+CONF_ZONE_ENTITIES = "zone_entities"
+CONF_ZONES_TEXT = "zones_text"
+CONF_SCHEDULES_TEXT = "schedules_text"
 
-async def async_step_zone(self, user_input=None) -> FlowResult:
-    """Handle zone configuration."""
-    errors = {}
-    
-    if user_input is not None:
-        if user_input.get("add_zone"):
-            zone_name = user_input.get("zone_name", "").strip()
-            zone_entity = user_input.get("zone_entity", "").strip()
-            zone_duration = user_input.get("zone_duration", 10)
-            
-            if not zone_name:
-                errors["zone_name"] = "Zone name is required"
-            elif not zone_entity:
-                errors["zone_entity"] = "Zone entity is required"
-            elif zone_entity not in self.hass.states.async_entity_ids():
-                errors["zone_entity"] = "Entity not found"
-            else:
-                self.zones.append({
-                    CONF_ZONE_NAME: zone_name,
-                    CONF_ZONE_ENTITY: zone_entity,
-                    CONF_ZONE_DURATION: zone_duration
-                })
-                
-                # Reset form for next zone
-                user_input = None
-        
-        elif user_input.get("finish"):
-            if not self.zones:
-                errors["base"] = "At least one zone is required"
-            else:
-                return self.async_create_entry(
-                    title=self.system_name,
-                    data={
-                        "system_name": self.system_name,
-                        CONF_ZONES: self.zones
-                    }
-                )
+SWITCH_SELECTOR = selector.EntitySelector(selector.EntitySelectorConfig(domain="switch"))
+SWITCHES_SELECTOR = selector.EntitySelector(
+    selector.EntitySelectorConfig(domain="switch", multiple=True)
+)
+ZONES_TEXT_SELECTOR = selector.TextSelector(selector.TextSelectorConfig(multiline=True))
+DURATION_VALIDATOR = vol.All(vol.Coerce(int), vol.Range(min=1, max=120))
 
-    # Get available switch entities
-    switch_entities = [
-        entity_id for entity_id in self.hass.states.async_entity_ids()
-        if entity_id.startswith("switch.")
-    ]
-    
-    if not switch_entities:
-        switch_entities = ["switch.example"]  # Fallback
-
-    data_schema = vol.Schema({
-        vol.Optional("zone_name", default=""): str,
-        vol.Optional("zone_entity", default=""): vol.In(switch_entities),
-        vol.Optional("zone_duration", default=10): vol.All(vol.Coerce(int), vol.Range(min=1, max=120)),
-        vol.Optional("add_zone", default=False): bool,
-        vol.Optional("finish", default=False): bool,
-    })
-
-    return self.async_show_form(
-        step_id="zone",
-        data_schema=data_schema,
-        errors=errors,
-        description_placeholders={
-            "zones_count": str(len(self.zones)),
-            "zones_list": ", ".join([zone[CONF_ZONE_NAME] for zone in self.zones]) if self.zones else "None"
-        }
-    )
 
-@staticmethod
-@callback
-def async_get_options_flow(config_entry):
-    """Get the options flow for this handler."""
-    return LawnIrrigationOptionsFlow(config_entry)
-```
+def _zones_from_input(
+    hass: HomeAssistant, user_input: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """Build zone definitions from pasted text and selected switches.
 
-class LawnIrrigationOptionsFlow(config_entries.OptionsFlow):
-“”“Handle options flow for Lawn Irrigation System.”””
-
-```
-def __init__(self, config_entry):
-    """Initialize options flow."""
-    self.config_entry = config_entry
-
-async def async_step_init(self, user_input=None) -> FlowResult:
-    """Handle options flow."""
-    if user_input is not None:
-        return self.async_create_entry(title="", data=user_input)
-
-    return self.async_show_form(
-        step_id="init",
-        data_schema=vol.Schema({
-            vol.Optional(
-                "default_duration",
-                default=self.config_entry.options.get("default_duration", 10)
-            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=120)),
-            vol.Optional(
-                "enable_weather_check",
-                default=self.config_entry.options.get("enable_weather_check", False)
-            ): bool,
-            vol.Optional(
-                "rain_sensor_entity",
-                default=self.config_entry.options.get("rain_sensor_entity", "")
-            ): str,
+    Selected switches that are not already in the text are added with their
+    friendly name. Raises ValueError on bad input.
+    """
+    duration = user_input.get(CONF_ZONE_DURATION, DEFAULT_DURATION)
+    zones = parse_zones(user_input.get(CONF_ZONES_TEXT, ""), duration)
+    listed = {zone[CONF_ZONE_ENTITY] for zone in zones}
+    for entity_id in user_input.get(CONF_ZONE_ENTITIES, []):
+        if entity_id in listed:
+            continue
+        state = hass.states.get(entity_id)
+        zones.append({
+            CONF_ZONE_NAME: state.name if state is not None else entity_id,
+            CONF_ZONE_ENTITY: entity_id,
+            CONF_ZONE_DURATION: duration,
         })
+    return zones
+
+
+def _validate_zones(
+    hass: HomeAssistant,
+    zones: List[Dict[str, Any]],
+    configured: Set[str],
+    master_valve: Optional[str] = None,
+) -> Optional[Tuple[str, str]]:
+    """Return the error key for an invalid zone list, with the offending value.
+
+    Only entities that are not configured already have to exist, a zone
+    whose switch is unavailable right now can still be edited. No zone may
+    use the master valve, closing the master would close that zone.
+    """
+    names = set()
+    entities = set()
+    for zone in zones:
+        if zone[CONF_ZONE_NAME] in names:
+            return "duplicate_zone", zone[CONF_ZONE_NAME]
+        if zone[CONF_ZONE_ENTITY] in entities:
+            return "duplicate_zone", zone[CONF_ZONE_ENTITY]
+        if master_valve and zone[CONF_ZONE_ENTITY] == master_valve:
+            return "master_is_zone", master_valve
+        if (
+            zone[CONF_ZONE_ENTITY] not in configured
+            and hass.states.get(zone[CONF_ZONE_ENTITY]) is None
+        ):
+            return "unknown_entity", zone[CONF_ZONE_ENTITY]
+        names.add(zone[CONF_ZONE_NAME])
+        entities.add(zone[CONF_ZONE_ENTITY])
+    return None
+
+
+def _read_zones(
+    hass: HomeAssistant,
+    user_input: Dict[str, Any],
+    errors: Dict[str, str],
+    placeholders: Dict[str, str],
+    configured: Iterable[Dict[str, Any]] = (),
+    master_valve: Optional[str] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """Return the zones of a bulk form, or None with the errors filled in.
+
+    Configured are the zones already set up, their switches are not
+    checked again. No zone may use the master valve.
+    """
+    try:
+        zones = _zones_from_input(hass, user_input)
+    except ValueError as err:
+        errors[CONF_ZONES_TEXT] = "invalid_zones"
+        placeholders["error"] = str(err)
+        return None
+
+    error = _validate_zones(
+        hass, zones, {zone[CONF_ZONE_ENTITY] for zone in configured}, master_valve
     )
-```
+    if error is not None:
+        errors["base"], placeholders["error"] = error
+        return None
+    if not zones:
+        errors["base"] = "no_zones"
+        return None
+    return zones
+
+
+class LawnIrrigationConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
+    """Handle a config flow for Lawn Irrigation System."""
+
+    VERSION = 1
+
+    def __init__(self):
+        """Initialize the config flow."""
+        self.zones = []
+
+    async def async_step_user(self, user_input=None) -> FlowResult:
+        """Handle the initial step."""
+        errors = {}
+
+        if user_input is not None:
+            # Each controller is one entry, keyed by its name
+            await self.async_set_unique_id(slugify(user_input["system_name"]))
+            self._abort_if_unique_id_configured()
+
+            self.system_name = user_input["system_name"]
+            return self.async_show_menu(step_id="setup", menu_options=["zone", "bulk"])
+
+        return self.async_show_form(
+            step_id="user",
+            data_schema=vol.Schema({
+                vol.Required("system_name", default="Lawn Irrigation"): str,
+            }),
+            errors=errors
+        )
+
+    async def async_step_zone(self, user_input=None) -> FlowResult:
+        """Handle zone configuration."""
+        errors = {}
+
+        if user_input is not None:
+            if user_input.get("add_zone"):
+                zone_name = user_input.get("zone_name", "").strip()
+                zone_entity = user_input.get("zone_entity", "")
+                zone_duration = user_input.get("zone_duration", 10)
+                zone_flow = user_input.get(CONF_ZONE_FLOW, 0)
+                zone_cycle = user_input.get(CONF_ZONE_CYCLE, 0)
+                zone_soak = user_input.get(CONF_ZONE_SOAK, 0)
+
+                if not zone_name:
+                    errors["zone_name"] = "Zone name is required"
+                elif not zone_entity:
+                    errors["zone_entity"] = "Zone entity is required"
+                elif self.hass.states.get(zone_entity) is None:
+                    errors["zone_entity"] = "entity_not_found"
+                else:
+                    self.zones.append({
+                        CONF_ZONE_NAME: zone_name,
+                        CONF_ZONE_ENTITY: zone_entity,
+                        CONF_ZONE_DURATION: zone_duration,
+                        CONF_ZONE_FLOW: zone_flow,
+                        CONF_ZONE_CYCLE: zone_cycle,
+                        CONF_ZONE_SOAK: zone_soak,
+                    })
+
+                    # Reset form for next zone
+                    user_input = None
+
+            elif user_input.get("finish"):
+                if not self.zones:
+                    errors["base"] = "At least one zone is required"
+                else:
+                    return self._async_create_controller()
+
+        # The selector lists the switches in the frontend, the form only
+        # carries the schema
+        data_schema = vol.Schema({
+            vol.Optional("zone_name", default=""): str,
+            vol.Optional("zone_entity"): SWITCH_SELECTOR,
+            vol.Optional("zone_duration", default=10): DURATION_VALIDATOR,
+            vol.Optional(CONF_ZONE_FLOW, default=0): vol.All(vol.Coerce(float), vol.Range(min=0)),
+            vol.Optional(CONF_ZONE_CYCLE, default=0): vol.All(vol.Coerce(int), vol.Range(min=0, max=120)),
+            vol.Optional(CONF_ZONE_SOAK, default=0): vol.All(vol.Coerce(int), vol.Range(min=0, max=240)),
+            vol.Optional("add_zone", default=False): bool,
+            vol.Optional("finish", default=False): bool,
+        })
+
+        return self.async_show_form(
+            step_id="zone",
+            data_schema=data_schema,
+            errors=errors,
+            description_placeholders={
+                "zones_count": str(len(self.zones)),
+                "zones_list": ", ".join([zone[CONF_ZONE_NAME] for zone in self.zones]) if self.zones else "None"
+            }
+        )
+
+    async def async_step_bulk(self, user_input=None) -> FlowResult:
+        """Add every zone in one submission."""
+        errors = {}
+        placeholders = {"error": ""}
+
+        if user_input is not None:
+            zones = _read_zones(self.hass, user_input, errors, placeholders)
+            if zones is not None:
+                self.zones = zones
+                return self._async_create_controller()
+
+        return self.async_show_form(
+            step_id="bulk",
+            data_schema=self.add_suggested_values_to_schema(
+                vol.Schema({
+                    vol.Optional(CONF_ZONE_ENTITIES): SWITCHES_SELECTOR,
+                    vol.Optional(CONF_ZONES_TEXT): ZONES_TEXT_SELECTOR,
+                    vol.Optional(CONF_ZONE_DURATION, default=DEFAULT_DURATION): DURATION_VALIDATOR,
+                }),
+                user_input,
+            ),
+            errors=errors,
+            description_placeholders=placeholders,
+        )
+
+    @callback
+    def _async_create_controller(self) -> FlowResult:
+        """Create the entry with the zones collected so far."""
+        return self.async_create_entry(
+            title=self.system_name,
+            data={
+                "system_name": self.system_name,
+                CONF_ZONES: self.zones
+            }
+        )
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Get the options flow for this handler."""
+        return LawnIrrigationOptionsFlow(config_entry)
+
+
+class LawnIrrigationOptionsFlow(config_entries.OptionsFlow):
+    """Handle options flow for Lawn Irrigation System."""
+
+    def __init__(self, config_entry):
+        """Initialize options flow."""
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input=None) -> FlowResult:
+        """Choose what to change."""
+        return self.async_show_menu(
+            step_id="init", menu_options=["settings", "zones", "schedules"]
+        )
+
+    async def async_step_zones(self, user_input=None) -> FlowResult:
+        """Edit, add and remove zones as one list."""
+        errors = {}
+        placeholders = {"error": ""}
+
+        if user_input is not None:
+            zones = _read_zones(
+                self.hass,
+                user_input,
+                errors,
+                placeholders,
+                self.config_entry.data.get(CONF_ZONES, []),
+                self.config_entry.options.get(CONF_MASTER_VALVE),
+            )
+            if zones is not None:
+                # Zones live in the entry data, the options stay as they are
+                self.hass.config_entries.async_update_entry(
+                    self.config_entry, data={**self.config_entry.data, CONF_ZONES: zones}
+                )
+                return self.async_create_entry(title="", data=dict(self.config_entry.options))
+
+        return self.async_show_form(
+            step_id="zones",
+            data_schema=vol.Schema({
+                vol.Optional(
+                    CONF_ZONES_TEXT,
+                    default=format_zones(self.config_entry.data.get(CONF_ZONES, []))
+                ): ZONES_TEXT_SELECTOR,
+                vol.Optional(CONF_ZONE_ENTITIES): SWITCHES_SELECTOR,
+                vol.Optional(CONF_ZONE_DURATION, default=DEFAULT_DURATION): DURATION_VALIDATOR,
+            }),
+            errors=errors,
+            description_placeholders=placeholders,
+        )
+
+    async def async_step_schedules(self, user_input=None) -> FlowResult:
+        """Edit, add and remove schedules as one YAML list."""
+        errors = {}
+        placeholders = {"error": ""}
+
+        if user_input is not None:
+            try:
+                schedules = parse_schedules(user_input.get(CONF_SCHEDULES_TEXT, ""))
+            except ValueError as err:
+                errors[CONF_SCHEDULES_TEXT] = "invalid_schedules"
+                placeholders["error"] = str(err)
+            else:
+                zone_names = {
+                    zone[CONF_ZONE_NAME] for zone in self.config_entry.data.get(CONF_ZONES, [])
+                }
+                unknown = [
+                    zone_name
+                    for schedule in schedules
+                    for zone_name in schedule[CONF_SCHEDULE_ZONES]
+                    if zone_name not in zone_names
+                ]
+                if unknown:
+                    errors["base"] = "unknown_zone"
+                    placeholders["error"] = unknown[0]
+                else:
+                    # Schedules live in the entry data like the zones
+                    self.hass.config_entries.async_update_entry(
+                        self.config_entry,
+                        data={**self.config_entry.data, CONF_SCHEDULES: schedules},
+                    )
+                    return self.async_create_entry(
+                        title="", data=dict(self.config_entry.options)
+                    )
+
+        return self.async_show_form(
+            step_id="schedules",
+            data_schema=vol.Schema({
+                vol.Optional(
+                    CONF_SCHEDULES_TEXT,
+                    default=format_schedules(self.config_entry.data.get(CONF_SCHEDULES, []))
+                ): ZONES_TEXT_SELECTOR,
+            }),
+            errors=errors,
+            description_placeholders=placeholders,
+        )
+
+    async def async_step_settings(self, user_input=None) -> FlowResult:
+        """Handle controller settings."""
+        errors = {}
+        if user_input is not None:
+            zone_entities = {
+                zone[CONF_ZONE_ENTITY] for zone in self.config_entry.data.get(CONF_ZONES, [])
+            }
+            if user_input.get(CONF_MASTER_VALVE) in zone_entities:
+                errors[CONF_MASTER_VALVE] = "master_is_zone"
+            else:
+                return self.async_create_entry(title="", data=user_input)
+
+        return self.async_show_form(
+            step_id="settings",
+            errors=errors,
+            data_schema=vol.Schema({
+                vol.Optional(
+                    CONF_DEFAULT_DURATION,
+                    default=self.config_entry.options.get(CONF_DEFAULT_DURATION, DEFAULT_DURATION)
+                ): DURATION_VALIDATOR,
+                vol.Optional(
+                    CONF_ENABLE_WEATHER_CHECK,
+                    default=self.config_entry.options.get(CONF_ENABLE_WEATHER_CHECK, False)
+                ): bool,
+                vol.Optional(
+                    CONF_RAIN_SENSOR,
+                    default=self.config_entry.options.get(CONF_RAIN_SENSOR, "")
+                ): str,
+                vol.Optional(
+                    CONF_RAIN_DELAY,
+                    default=self.config_entry.options.get(CONF_RAIN_DELAY, DEFAULT_RAIN_DELAY)
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_FORECAST_SENSOR,
+                    default=self.config_entry.options.get(CONF_FORECAST_SENSOR, "")
+                ): str,
+                vol.Optional(
+                    CONF_FORECAST_THRESHOLD,
+                    default=self.config_entry.options.get(CONF_FORECAST_THRESHOLD, DEFAULT_FORECAST_THRESHOLD)
+                ): vol.Coerce(float),
+                vol.Optional(
+                    CONF_WIND_SENSOR,
+                    default=self.config_entry.options.get(CONF_WIND_SENSOR, "")
+                ): str,
+                vol.Optional(
+                    CONF_MAX_WIND,
+                    default=self.config_entry.options.get(CONF_MAX_WIND, DEFAULT_MAX_WIND)
+                ): vol.Coerce(float),
+                vol.Optional(
+                    CONF_TEMPERATURE_SENSOR,
+                    default=self.config_entry.options.get(CONF_TEMPERATURE_SENSOR, "")
+                ): str,
+                vol.Optional(
+                    CONF_MIN_TEMPERATURE,
+                    default=self.config_entry.options.get(CONF_MIN_TEMPERATURE, DEFAULT_MIN_TEMPERATURE)
+                ): vol.Coerce(float),
+                vol.Optional(
+                    CONF_SOIL_MOISTURE_SENSOR,
+                    default=self.config_entry.options.get(CONF_SOIL_MOISTURE_SENSOR, "")
+                ): str,
+                vol.Optional(
+                    CONF_MAX_SOIL_MOISTURE,
+                    default=self.config_entry.options.get(CONF_MAX_SOIL_MOISTURE, DEFAULT_MAX_SOIL_MOISTURE)
+                ): vol.Coerce(float),
+                vol.Optional(
+                    CONF_MAX_CONCURRENT_ZONES,
+                    default=self.config_entry.options.get(
+                        CONF_MAX_CONCURRENT_ZONES, DEFAULT_MAX_CONCURRENT_ZONES
+                    )
+                ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_MAX_FLOW,
+                    default=self.config_entry.options.get(CONF_MAX_FLOW, 0)
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_MASTER_VALVE,
+                    description={
+                        "suggested_value": self.config_entry.options.get(CONF_MASTER_VALVE)
+                    },
+                ): SWITCH_SELECTOR,
+                vol.Optional(
+                    CONF_VALVE_OVERLAP,
+                    default=self.config_entry.options.get(CONF_VALVE_OVERLAP, DEFAULT_VALVE_OVERLAP)
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=60)),
+                vol.Optional(
+                    CONF_TRACE_SIZE,
+                    default=self.config_entry.options.get(CONF_TRACE_SIZE, DEFAULT_TRACE_SIZE)
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=100000)),
+            })
+        )
@@ -2,29 +2,124 @@
 
 DOMAIN = "lawn_irrigation"
 
+# hass.data keys shared by all config entries
+DATA_SCHEDULER = f"{DOMAIN}_scheduler"
+
+# Dispatcher signal with the zones added to an entry, formatted with the entry_id
+SIGNAL_ZONES_ADDED = f"{DOMAIN}_zones_added_{{}}"
+# Dispatcher signal when a schedule started or the schedules changed
+SIGNAL_SCHEDULES_UPDATED = f"{DOMAIN}_schedules_updated_{{}}"
+
 # Configuration constants
 CONF_ZONES = "zones"
 CONF_ZONE_NAME = "zone_name"
 CONF_ZONE_ENTITY = "zone_entity"
 CONF_ZONE_DURATION = "zone_duration"
+CONF_ZONE_FLOW = "zone_flow"
+CONF_ZONE_CYCLE = "zone_cycle"
+CONF_ZONE_SOAK = "zone_soak"
+CONF_MAX_FLOW = "max_flow"
+CONF_MAX_CONCURRENT_ZONES = "max_concurrent_zones"
+CONF_DEFAULT_DURATION = "default_duration"
+CONF_MASTER_VALVE = "master_valve"
+CONF_VALVE_OVERLAP = "valve_overlap"
+CONF_TRACE_SIZE = "trace_size"
+
+# Schedules, stored in the entry data next to the zones
+CONF_SCHEDULES = "schedules"
+CONF_SCHEDULE_NAME = "name"
+CONF_SCHEDULE_ZONES = "zones"
+CONF_SCHEDULE_DAYS = "days"
+CONF_SCHEDULE_INTERVAL = "interval"
+CONF_SCHEDULE_START_DATE = "start_date"
+CONF_SCHEDULE_TIMES = "times"
+CONF_SCHEDULE_SCALE = "scale"
+CONF_SCHEDULE_PRIORITY = "priority"
+
+# Skip conditions
+CONF_ENABLE_WEATHER_CHECK = "enable_weather_check"
+CONF_RAIN_SENSOR = "rain_sensor_entity"
+CONF_RAIN_DELAY = "rain_delay"
+CONF_FORECAST_SENSOR = "forecast_sensor_entity"
+CONF_FORECAST_THRESHOLD = "forecast_threshold"
+CONF_WIND_SENSOR = "wind_sensor_entity"
+CONF_MAX_WIND = "max_wind_speed"
+CONF_TEMPERATURE_SENSOR = "temperature_sensor_entity"
+CONF_MIN_TEMPERATURE = "min_temperature"
+CONF_SOIL_MOISTURE_SENSOR = "soil_moisture_sensor_entity"
+CONF_MAX_SOIL_MOISTURE = "max_soil_moisture"
 
 # Service constants
 SERVICE_START_IRRIGATION = "start_irrigation"
 SERVICE_STOP_IRRIGATION = "stop_irrigation"
 SERVICE_RUN_ZONE = "run_zone"
 SERVICE_RUN_PROGRAM = "run_program"
+SERVICE_GET_RUN_STATUS = "get_run_status"
+SERVICE_CANCEL_RUN = "cancel_run"
+SERVICE_PAUSE_IRRIGATION = "pause_irrigation"
+SERVICE_RESUME_IRRIGATION = "resume_irrigation"
+SERVICE_DUMP_TRACE = "dump_trace"
 
 # Attributes
 ATTR_ZONE_ID = "zone_id"
 ATTR_DURATION = "duration"
 ATTR_PROGRAM_NAME = "program_name"
 ATTR_ZONES = "zones"
+ATTR_PRIORITY = "priority"
+ATTR_RUN_ID = "run_id"
+ATTR_ENTRY_ID = "entry_id"
+ATTR_CLEAR = "clear"
 
 # States
 STATE_IDLE = "idle"
 STATE_RUNNING = "running"
 STATE_PAUSED = "paused"
 
+# Run states
+RUN_STATUS_QUEUED = "queued"
+RUN_STATUS_RUNNING = "running"
+RUN_STATUS_COMPLETED = "completed"
+RUN_STATUS_CANCELLED = "cancelled"
+RUN_STATUS_UNKNOWN = "unknown"
+
 # Default values
 DEFAULT_DURATION = 10
-DEFAULT_SCAN_INTERVAL = 30
+DEFAULT_MAX_CONCURRENT_ZONES = 1
+DEFAULT_PRIORITY = 0
+DEFAULT_RAIN_DELAY = 0
+DEFAULT_FORECAST_THRESHOLD = 5.0
+DEFAULT_MAX_WIND = 20.0
+DEFAULT_MIN_TEMPERATURE = 2.0
+DEFAULT_MAX_SOIL_MOISTURE = 60.0
+DEFAULT_VALVE_OVERLAP = 0
+
+# How far a reading must come back past its limit before irrigation is
+# allowed again, so a value hovering at the limit does not flap
+HYSTERESIS_FORECAST = 1.0
+HYSTERESIS_WIND = 3.0
+HYSTERESIS_TEMPERATURE = 1.0
+HYSTERESIS_SOIL_MOISTURE = 5.0
+
+# Reasons irrigation is skipped
+SKIP_RAIN = "rain"
+SKIP_RAIN_DELAY = "rain_delay"
+SKIP_FORECAST = "forecast"
+SKIP_WIND = "wind"
+SKIP_FREEZE = "freeze"
+SKIP_SOIL_MOISTURE = "soil_moisture"
+
+# Run log reason of a zone closed before its planned end
+REASON_STOPPED = "stopped"
+# Run log reason of a zone whose valve did not confirm opening
+REASON_FAILED = "failed"
+# Run log reason of a zone closed by a pause, its rest runs on resume
+REASON_PAUSED = "paused"
+
+# Records kept in the run log ring buffer, about 19 bytes each
+DEFAULT_RUN_LOG_SIZE = 100000
+# Coordinator decisions kept in the trace, 0 turns it off
+DEFAULT_TRACE_SIZE = 1000
+
+# Priority of a zone started by hand, above any regular program
+PRIORITY_MANUAL = 100
+DEFAULT_RESYNC_INTERVAL = 300
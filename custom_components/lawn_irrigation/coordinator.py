@@ -1,75 +1,323 @@
-“”“Data coordinator for Lawn Irrigation System.”””
-from **future** import annotations
+"""Data coordinator for Lawn Irrigation System."""
+from __future__ import annotations
 
 import asyncio
 import logging
+import time
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, State
+from homeassistant.const import STATE_ON, STATE_UNAVAILABLE
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, State, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_track_state_change_event
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-from homeassistant.util.dt import utcnow
+from homeassistant.util.dt import as_local, parse_datetime, utcnow
 
 from .const import (
-DOMAIN,
-CONF_ZONES,
-CONF_ZONE_NAME,
-CONF_ZONE_ENTITY,
-CONF_ZONE_DURATION,
-STATE_IDLE,
-STATE_RUNNING,
-STATE_PAUSED,
-DEFAULT_SCAN_INTERVAL,
+    DOMAIN,
+    CONF_ZONES,
+    CONF_SCHEDULES,
+    CONF_ZONE_NAME,
+    CONF_ZONE_ENTITY,
+    CONF_MAX_FLOW,
+    CONF_MAX_CONCURRENT_ZONES,
+    CONF_DEFAULT_DURATION,
+    CONF_MASTER_VALVE,
+    CONF_VALVE_OVERLAP,
+    CONF_TRACE_SIZE,
+    STATE_IDLE,
+    STATE_RUNNING,
+    STATE_PAUSED,
+    DEFAULT_RESYNC_INTERVAL,
+    DEFAULT_DURATION,
+    DEFAULT_MAX_CONCURRENT_ZONES,
+    DEFAULT_PRIORITY,
+    DEFAULT_VALVE_OVERLAP,
+    DEFAULT_TRACE_SIZE,
+    PRIORITY_MANUAL,
+    REASON_FAILED,
+    REASON_PAUSED,
+    REASON_STOPPED,
+    RUN_STATUS_QUEUED,
+    RUN_STATUS_RUNNING,
+    SIGNAL_SCHEDULES_UPDATED,
 )
+from .actuator import ValveActuator
+from .conditions import SkipEngine, skip_options
+from .journal import JOURNAL_MAX_AGE, RunJournal
+from .metrics import IrrigationMetrics
+from .runlog import RunLog
+from .runqueue import ProgramRun, RunQueue
+from .scheduler import ScheduledDeadline, async_get_scheduler
+from .schedules import Schedule, ScheduleEngine
+from .timeline import Timeline
+from .trace import (
+    CANCEL,
+    DEQUEUE,
+    ENQUEUE,
+    GATE,
+    MERGE,
+    PAUSE,
+    RESUME,
+    SCHEDULE,
+    TIMER,
+    DecisionTrace,
+)
+from .zones import Zone, ZoneRegistry
+
+_LOGGER = logging.getLogger(__name__)
+
+# Listener context of the planned slot of a zone, next to the zone name
+# itself, which is the context of the zone switch
+CONTEXT_SLOT = "slot"
+# How often the remaining times of a running program are written
+TICK_INTERVAL = timedelta(minutes=1)
+# Valves that did not confirm closing are tried again this often
+STUCK_RETRY_INTERVAL = timedelta(seconds=DEFAULT_RESYNC_INTERVAL)
+
+
+def slot_context(zone_name: str) -> Tuple[str, str]:
+    """Return the listener context of the timeline slot of a zone."""
+    return (CONTEXT_SLOT, zone_name)
 
-_LOGGER = logging.getLogger(**name**)
 
 class LawnIrrigationCoordinator(DataUpdateCoordinator):
-“”“Coordinator for lawn irrigation system.”””
-
-```
-def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Initialize the coordinator."""
-    super().__init__(
-        hass,
-        _LOGGER,
-        name=DOMAIN,
-        update_interval=timedelta(seconds=DEFAULT_SCAN_INTERVAL),
-    )
-    self.entry = entry
-    self.zones: List[Dict[str, Any]] = entry.data.get(CONF_ZONES, [])
-    self.current_zone: Optional[str] = None
-    self.current_program: Optional[str] = None
-    self.zone_timers: Dict[str, asyncio.Task] = {}
-    self.system_state = STATE_IDLE
-    self.start_time: Optional[datetime] = None
-    self.total_duration = 0
-    self.remaining_time = 0
-    self.active_zones: List[str] = []
-    self.zone_queue: List[tuple[str, int]] = []
-    self.weather_check_enabled = entry.options.get("enable_weather_check", False)
-    self.rain_sensor_entity = entry.options.get("rain_sensor_entity", "")
-
-async def _async_update_data(self) -> Dict[str, Any]:
-    """Update data."""
-    try:
-        # Update zone states
+    """Coordinator for lawn irrigation system."""
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN,
+            # State changes are pushed by async_setup_listeners, polling is
+            # only a slow safety resync that async_started turns on.
+            update_interval=None,
+        )
+        self.entry = entry
+        self._zones_config: List[Dict[str, Any]] = entry.data.get(CONF_ZONES, [])
+        self.default_duration: int = entry.options.get(CONF_DEFAULT_DURATION, DEFAULT_DURATION)
+        self.zones = ZoneRegistry(self._zones_config, self.default_duration)
+        self.current_zone: Optional[str] = None
+        self.current_program: Optional[str] = None
+        self.zone_timers: Dict[str, ScheduledDeadline] = {}
+        # Zones that ran before a restart and are reopened once Home
+        # Assistant has started: zone name -> (deadline, started)
+        self._restored: Dict[str, Tuple[datetime, Optional[datetime]]] = {}
+        # Deadlines of restored zones still waiting for their valve
+        self._restore_timers: Dict[str, ScheduledDeadline] = {}
+        # When each open zone was turned on, for the run log
+        self._zone_started: Dict[str, datetime] = {}
+        # Open zones that already made way for the next one, by entity_id
+        self._handoff_timers: Dict[str, ScheduledDeadline] = {}
+        self._releasing: Set[str] = set()
+        self._master_open: Optional[bool] = None
+        # Valves that did not confirm closing, retried on every resync
+        self.stuck_valves: Set[str] = set()
+        self._zone_done: Dict[str, asyncio.Future[bool]] = {}
+        self._scheduler = async_get_scheduler(hass)
+        self.metrics = IrrigationMetrics()
+        self.trace = DecisionTrace()
+        self.actuator = ValveActuator(hass, self.metrics, self.trace)
+        self._journal = RunJournal(hass, entry.entry_id)
+        self.run_log = RunLog(hass, entry)
+        self.system_state = STATE_IDLE
+        # A pause the skip conditions caused ends when they allow irrigation
+        self.auto_resume = False
+        self.start_time: Optional[datetime] = None
+        self.total_duration = 0
+        self.remaining_time = 0
+        self.active_zones: Set[str] = set()
+        self.runs = RunQueue()
+        self.active_run: Optional[ProgramRun] = None
+        self._zone_runs: Dict[str, ProgramRun] = {}
+        self._soak_timer: Optional[ScheduledDeadline] = None
+        self._tick_timer: Optional[ScheduledDeadline] = None
+        self._stuck_timer: Optional[ScheduledDeadline] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Future[None]] = None
+        self.timeline = Timeline()
+        self.skip_engine = SkipEngine(hass, entry.options, self._async_conditions_changed)
+        self._skip_options = skip_options(entry.options)
+        self._schedules_config: List[Dict[str, Any]] = entry.data.get(CONF_SCHEDULES, [])
+        self.schedule_engine = ScheduleEngine(hass, self._scheduler, self._async_start_schedule)
+        self.max_flow: float = 0
+        self.max_concurrent_zones: int = DEFAULT_MAX_CONCURRENT_ZONES
+        self.master_valve: Optional[str] = None
+        self.valve_overlap = timedelta(seconds=DEFAULT_VALVE_OVERLAP)
+        self._apply_options()
+        self.weather_ok = True
+        self._unsub_state_listener: Optional[CALLBACK_TYPE] = None
+        # Change tracking, so a transition only rewrites the entities it affects
+        self._zone_listeners: Dict[str, List[CALLBACK_TYPE]] = {}
+        self._slot_listeners: Dict[str, List[CALLBACK_TYPE]] = {}
+        self._dirty_zones: Set[str] = set()
+        self._dirty_slots: Set[str] = set()
+        self._system_dirty = False
+        self._notified_success: Optional[bool] = None
+
+    def _apply_options(self) -> None:
+        """Read the budget and the valve handling from the entry options."""
+        options = self.entry.options
+        self.max_flow = options.get(CONF_MAX_FLOW, 0)
+        self.max_concurrent_zones = options.get(
+            CONF_MAX_CONCURRENT_ZONES, DEFAULT_MAX_CONCURRENT_ZONES
+        )
+        self.master_valve = options.get(CONF_MASTER_VALVE) or None
+        self.valve_overlap = timedelta(
+            seconds=options.get(CONF_VALVE_OVERLAP, DEFAULT_VALVE_OVERLAP)
+        )
+        self.trace.resize(options.get(CONF_TRACE_SIZE, DEFAULT_TRACE_SIZE))
+
+    async def async_apply_entry(self) -> Tuple[List[Zone], List[str]]:
+        """Apply changed options and zones in place, keeping runs in flight.
+
+        Running zones that were removed are stopped and a zone moved to
+        another valve continues on it, every other zone keeps running and
+        stays queued. Returns
+        the added zones and the names of the removed ones, so the platforms
+        can reconcile their entities.
+        """
+        master_valve = self.master_valve
+        self._apply_options()
+        if self.master_valve != master_valve:
+            # Close the old master valve, the new one takes over right away
+            if master_valve is not None and self._master_open:
+                await self.actuator.async_turn_off((master_valve,))
+            self._master_open = None
+            self.async_setup_listeners()
+            if self.active_zones:
+                await self._async_set_master(True)
+
+        options = skip_options(self.entry.options)
+        if options != self._skip_options:
+            self._skip_options = options
+            previous = self.skip_engine
+            previous.async_stop()
+            self.skip_engine = SkipEngine(
+                self.hass, self.entry.options, self._async_conditions_changed
+            )
+            self.skip_engine.async_carry_over(previous)
+            self.async_setup_listeners()
+            self._async_conditions_changed()
+
+        added: List[Zone] = []
+        removed: List[str] = []
+        # Restored zones moved to another valve before they were reopened
+        moved: Dict[str, Tuple[datetime, Optional[datetime]]] = {}
+        zones_config = self.entry.data.get(CONF_ZONES, [])
+        default_duration = self.entry.options.get(CONF_DEFAULT_DURATION, DEFAULT_DURATION)
+        if zones_config != self._zones_config or default_duration != self.default_duration:
+            valves = {config[CONF_ZONE_NAME]: config[CONF_ZONE_ENTITY] for config in zones_config}
+            for zone in self.zones:
+                valve = valves.get(zone.name)
+                if valve is None:
+                    removed.append(zone.name)
+                if zone.name in self._restored and valve != zone.entity_id:
+                    # A restored zone not reopened yet, its old valve may be open
+                    if valve is None:
+                        self._async_drop_restored(zone.name)
+                    else:
+                        moved[zone.name] = self._restored.pop(zone.name)
+                    await self._async_close_valves([zone.entity_id])
+                timer = self.zone_timers.get(zone.name)
+                if timer is None or valve == zone.entity_id:
+                    continue
+                # Close the valve the zone was running on, a zone that moved
+                # to another valve finishes its time there
+                run = self._zone_runs.get(zone.name)
+                remaining = (timer.when - utcnow()).total_seconds() / 60
+                await self.async_stop_zone(zone.name)
+                if valve is not None and run is not None and not run.finished and remaining > 0:
+                    self.runs.push_front(run, zone.name, remaining)
+            for zone_name in removed:
+                self.runs.discard_zone(zone_name)
+
+            previous = self.zones
+            # Zones that are kept keep their objects, updated in place
+            self.zones = ZoneRegistry(zones_config, default_duration, previous)
+            self._zones_config = zones_config
+            self.default_duration = default_duration
+            added = [zone for zone in self.zones if zone.name not in previous]
+            self.async_setup_listeners()
+            _LOGGER.info("Zones changed: %d added, %d removed", len(added), len(removed))
+            for zone_name, restored in moved.items():
+                # A new valve that is not there yet is reopened when it shows up
+                self._restored[zone_name] = restored
+                if self._valve_available(self.zones.get(zone_name)):
+                    await self._async_reopen_restored_zone(zone_name)
+
+        schedules_config = self.entry.data.get(CONF_SCHEDULES, [])
+        if schedules_config != self._schedules_config:
+            self._schedules_config = schedules_config
+            self.async_load_schedules()
+            _LOGGER.info("Schedules changed: %d schedules", len(schedules_config))
+
+        # The budget may have changed what fits, let the queue processor
+        # look again
+        self._async_rebuild_timeline()
+        self._async_mark_dirty(*self.zones.names)
+        await self.async_refresh()
+        self._async_wake()
+        return added, removed
+
+    @callback
+    def async_seed(self) -> None:
+        """Take the first snapshot in place of a first refresh.
+
+        Entities are added with this data, so neither the platforms nor the
+        refresh machinery have to poll during setup.
+        """
+        self.data = self._build_data(self._snapshot())
+
+    async def async_started(self, _hass: HomeAssistant) -> None:
+        """Resume the restored program and turn on the safety resync.
+
+        Valves of integrations that were still loading at setup are picked
+        up by this first resync at the latest.
+        """
+        self.entry.async_create_background_task(
+            self.hass, self._async_resume_restored(), f"{DOMAIN}_restore_{self.entry.entry_id}"
+        )
+        self.update_interval = timedelta(seconds=DEFAULT_RESYNC_INTERVAL)
+        await self.async_refresh()
+
+    def _snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Read the state of every zone switch, flagging the zones that changed."""
+        previous = self.data["zones"] if self.data is not None else {}
         zone_states = {}
         for zone in self.zones:
-            entity_id = zone[CONF_ZONE_ENTITY]
-            state = self.hass.states.get(entity_id)
+            state = self.hass.states.get(zone.entity_id)
             if state:
-                zone_states[zone[CONF_ZONE_NAME]] = {
-                    "state": state.state,
-                    "entity_id": entity_id,
-                    "duration": zone[CONF_ZONE_DURATION],
-                    "is_running": entity_id in self.active_zones,
-                }
+                zone_states[zone.name] = self._zone_snapshot(zone, state)
+            if zone_states.get(zone.name) != previous.get(zone.name):
+                self._dirty_zones.add(zone.name)
+        return zone_states
+
+    async def _async_update_data(self) -> Dict[str, Any]:
+        """Resync the full zone snapshot."""
+        start = time.perf_counter()
+        try:
+            return self._build_data(self._snapshot())
+        except Exception as err:
+            raise UpdateFailed(f"Error updating data: {err}") from err
+        finally:
+            self.metrics.refresh.record(time.perf_counter() - start)
 
-        # Check weather conditions
-        weather_ok = await self._check_weather_conditions()
+    def _zone_snapshot(self, zone: Zone, state: State) -> Dict[str, Any]:
+        """Return the snapshot entry for a zone."""
+        return {
+            "state": state.state,
+            "entity_id": zone.entity_id,
+            "duration": zone.duration,
+            "is_running": zone.entity_id in self.active_zones,
+        }
 
+    def _build_data(self, zone_states: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Build the coordinator data from a zone snapshot."""
         return {
             "zones": zone_states,
             "system_state": self.system_state,
@@ -79,209 +327,1151 @@ async def _async_update_data(self) -> Dict[str, Any]:
             "total_duration": self.total_duration,
             "remaining_time": self.remaining_time,
             "active_zones": self.active_zones,
-            "weather_ok": weather_ok,
-            "queue_length": len(self.zone_queue),
+            "weather_ok": self.weather_ok,
+            "queue_length": self.queue_length,
         }
-    except Exception as err:
-        raise UpdateFailed(f"Error updating data: {err}") from err
 
-async def _check_weather_conditions(self) -> bool:
-    """Check if weather conditions are suitable for irrigation."""
-    if not self.weather_check_enabled or not self.rain_sensor_entity:
+    @callback
+    def async_setup_listeners(self) -> None:
+        """Subscribe to state changes of the zone switches and the skip inputs."""
+        self.skip_engine.async_start()
+        entity_ids = self.zones.entity_ids + self.skip_engine.entity_ids
+        if self.master_valve is not None:
+            # The actuator confirms master valve commands from its state
+            entity_ids.append(self.master_valve)
+
+        if self._unsub_state_listener:
+            self._unsub_state_listener()
+        self._unsub_state_listener = async_track_state_change_event(
+            self.hass, entity_ids, self._async_handle_state_change
+        )
+
+    @callback
+    def _async_handle_state_change(self, event: Event) -> None:
+        """Update the snapshot for the entity that changed."""
+        entity_id = event.data["entity_id"]
+        new_state: Optional[State] = event.data.get("new_state")
+        data = self.data if self.data is not None else self._build_data({})
+
+        if entity_id in self.skip_engine:
+            self.skip_engine.async_update(entity_id, new_state)
+
+        if new_state is not None:
+            self.actuator.async_state_changed(entity_id, new_state.state)
+            old_state: Optional[State] = event.data.get("old_state")
+            if (
+                entity_id in self.stuck_valves
+                and new_state.state == STATE_ON
+                and (old_state is None or old_state.state == STATE_UNAVAILABLE)
+            ):
+                # A valve that could not be closed while it was gone is back
+                self.hass.async_create_task(self._async_close_valves([entity_id]))
+
+        zone = self.zones.get_by_entity(entity_id)
+        if zone is None:
+            return
+
+        if zone.name in self._restored and self._valve_available(zone):
+            # The valve of a restored zone showed up after the start
+            self.hass.async_create_task(self._async_reopen_restored_zone(zone.name))
+
+        if new_state is None:
+            data["zones"].pop(zone.name, None)
+        else:
+            data["zones"][zone.name] = self._zone_snapshot(zone, new_state)
+        self._dirty_zones.add(zone.name)
+
+        self.async_set_updated_data(self._build_data(data["zones"]))
+
+    @callback
+    def async_add_listener(
+        self, update_callback: CALLBACK_TYPE, context: Any = None
+    ) -> Callable[[], None]:
+        """Listen for updates, only for one zone when context is a zone name.
+
+        Zone sensors listen with a slot_context, so a replan does not
+        rewrite the zone switches.
+        """
+        if context is None:
+            return super().async_add_listener(update_callback, context)
+
+        if isinstance(context, tuple) and context[0] == CONTEXT_SLOT:
+            listeners = self._slot_listeners.setdefault(context[1], [])
+        else:
+            listeners = self._zone_listeners.setdefault(context, [])
+        listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def _async_mark_dirty(self, *zone_names: str, system: bool = True) -> None:
+        """Flag zones, their slots and the system summary as changed."""
+        self._dirty_zones.update(zone_names)
+        self._dirty_slots.update(zone_names)
+        if system:
+            self._system_dirty = True
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify only the entities whose data changed."""
+        start = time.perf_counter()
+        if self.last_update_success != self._notified_success:
+            # Availability of every entity follows the update result
+            self._notified_success = self.last_update_success
+            self._system_dirty = True
+            self._dirty_zones.update(self._zone_listeners)
+            self._dirty_slots.update(self._slot_listeners)
+
+        zone_names, self._dirty_zones = self._dirty_zones, set()
+        slot_names, self._dirty_slots = self._dirty_slots, set()
+        system, self._system_dirty = self._system_dirty, False
+
+        for zone_name in zone_names:
+            for update_callback in list(self._zone_listeners.get(zone_name, ())):
+                update_callback()
+        for zone_name in slot_names:
+            for update_callback in list(self._slot_listeners.get(zone_name, ())):
+                update_callback()
+
+        if system:
+            super().async_update_listeners()
+
+        self.metrics.update_cycle.record(time.perf_counter() - start)
+
+    @callback
+    def _async_conditions_changed(self) -> None:
+        """Publish a new skip decision, pausing or resuming the program."""
+        self.weather_ok = self.skip_engine.allowed
+        if not self.weather_ok and self.system_state == STATE_RUNNING:
+            self.hass.async_create_task(self.async_pause_irrigation(automatic=True))
+        elif self.weather_ok and self.system_state == STATE_PAUSED and self.auto_resume:
+            _LOGGER.info("Conditions allow irrigation again, resuming")
+            self._async_resume()
+        if self.data is not None:
+            self.data["weather_ok"] = self.weather_ok
+        self._async_mark_dirty()
+        self.async_update_listeners()
+
+    def _irrigation_allowed(self, zones: Iterable[Tuple[Zone, float]] = ()) -> bool:
+        """Return the cached skip decision, logging the zones a skip drops."""
+        if not self.skip_engine.allowed:
+            reasons = ", ".join(self.skip_engine.reasons)
+            _LOGGER.info("Skipping irrigation: %s", reasons)
+            self.trace.record(GATE, False, reasons)
+            now = utcnow()
+            reason = self.skip_engine.reasons[0]
+            for zone, duration in zones:
+                self.run_log.async_record(zone.name, now, now, duration, reason)
+            return False
+
+        self.trace.record(GATE, True)
         return True
 
-    rain_sensor = self.hass.states.get(self.rain_sensor_entity)
-    if rain_sensor and rain_sensor.state == "on":
-        _LOGGER.info("Rain detected, irrigation will be paused")
-        return False
-
-    return True
-
-async def async_start_irrigation(self, duration: int = None) -> None:
-    """Start irrigation for all zones."""
-    if self.system_state == STATE_RUNNING:
-        _LOGGER.warning("Irrigation already running")
-        return
-
-    weather_ok = await self._check_weather_conditions()
-    if not weather_ok:
-        _LOGGER.warning("Weather conditions not suitable for irrigation")
-        return
-
-    self.system_state = STATE_RUNNING
-    self.start_time = utcnow()
-    self.total_duration = duration or sum(zone[CONF_ZONE_DURATION] for zone in self.zones)
-    self.remaining_time = self.total_duration
-    
-    # Queue all zones
-    self.zone_queue = [(zone[CONF_ZONE_NAME], zone[CONF_ZONE_DURATION]) for zone in self.zones]
-    
-    _LOGGER.info(f"Starting irrigation system with {len(self.zone_queue)} zones")
-    
-    # Start processing queue
-    await self._process_zone_queue()
-    
-    await self.async_update_listeners()
-
-async def async_stop_irrigation(self) -> None:
-    """Stop all irrigation."""
-    _LOGGER.info("Stopping irrigation system")
-    
-    # Cancel all running timers
-    for timer in self.zone_timers.values():
-        timer.cancel()
-    self.zone_timers.clear()
-    
-    # Turn off all zones
-    for zone in self.zones:
-        await self._turn_off_zone(zone[CONF_ZONE_ENTITY])
-    
-    # Reset state
-    self.system_state = STATE_IDLE
-    self.current_zone = None
-    self.current_program = None
-    self.start_time = None
-    self.total_duration = 0
-    self.remaining_time = 0
-    self.active_zones.clear()
-    self.zone_queue.clear()
-    
-    await self.async_update_listeners()
-
-async def async_run_zone(self, zone_name: str, duration: int) -> None:
-    """Run a specific zone."""
-    zone = next((z for z in self.zones if z[CONF_ZONE_NAME] == zone_name), None)
-    if not zone:
-        _LOGGER.error(f"Zone {zone_name} not found")
-        return
-
-    weather_ok = await self._check_weather_conditions()
-    if not weather_ok:
-        _LOGGER.warning("Weather conditions not suitable for irrigation")
-        return
-
-    entity_id = zone[CONF_ZONE_ENTITY]
-    
-    if entity_id in self.active_zones:
-        _LOGGER.warning(f"Zone {zone_name} is already running")
-        return
-
-    _LOGGER.info(f"Starting zone {zone_name} for {duration} minutes")
-    
-    self.active_zones.append(entity_id)
-    self.current_zone = zone_name
-    
-    # Turn on the zone
-    await self._turn_on_zone(entity_id)
-    
-    # Start timer
-    timer = asyncio.create_task(self._zone_timer(zone_name, entity_id, duration))
-    self.zone_timers[zone_name] = timer
-    
-    await self.async_update_listeners()
-
-async def async_run_program(self, program_name: str, zones: List[str]) -> None:
-    """Run a custom irrigation program."""
-    if not zones:
-        zones = [zone[CONF_ZONE_NAME] for zone in self.zones]
-
-    weather_ok = await self._check_weather_conditions()
-    if not weather_ok:
-        _LOGGER.warning("Weather conditions not suitable for irrigation")
-        return
-
-    _LOGGER.info(f"Starting program {program_name} with zones: {zones}")
-    
-    self.current_program = program_name
-    self.system_state = STATE_RUNNING
-    self.start_time = utcnow()
-    
-    # Queue selected zones
-    self.zone_queue = [
-        (zone_name, next(z[CONF_ZONE_DURATION] for z in self.zones if z[CONF_ZONE_NAME] == zone_name))
-        for zone_name in zones
-        if any(z[CONF_ZONE_NAME] == zone_name for z in self.zones)
-    ]
-    
-    self.total_duration = sum(duration for _, duration in self.zone_queue)
-    self.remaining_time = self.total_duration
-    
-    # Start processing queue
-    await self._process_zone_queue()
-    
-    await self.async_update_listeners()
-
-async def _process_zone_queue(self) -> None:
-    """Process the zone queue sequentially."""
-    while self.zone_queue and self.system_state == STATE_RUNNING:
-        zone_name, duration = self.zone_queue.pop(0)
-        
-        # Check weather before each zone
-        weather_ok = await self._check_weather_conditions()
-        if not weather_ok:
-            _LOGGER.info("Weather conditions changed, pausing irrigation")
-            self.system_state = STATE_PAUSED
-            break
-        
-        await self.async_run_zone(zone_name, duration)
-        
-        # Wait for zone to complete
-        if zone_name in self.zone_timers:
-            try:
-                await self.zone_timers[zone_name]
-            except asyncio.CancelledError:
-                break
-    
-    # If queue is empty and system was running, mark as idle
-    if not self.zone_queue and self.system_state == STATE_RUNNING:
+    @property
+    def zone_queue(self) -> List[Tuple[str, float]]:
+        """Return the pending zones of the run that goes next."""
+        run = self.runs.peek()
+        return run.items() if run is not None else []
+
+    @property
+    def queue_length(self) -> int:
+        """Return the number of pending zones over all runs."""
+        return self.runs.zone_count
+
+    async def async_start_irrigation(self, duration: Optional[int] = None) -> Optional[str]:
+        """Queue irrigation for all zones and return the run id.
+
+        A duration given in minutes replaces the duration of every zone.
+        """
+        if self.system_state == STATE_RUNNING:
+            _LOGGER.warning("Irrigation already running")
+            return None
+
+        zones = [(zone, duration or zone.duration) for zone in self.zones]
+        if not self._irrigation_allowed(zones):
+            return None
+
+        _LOGGER.info("Starting irrigation system with %d zones", len(self.zones))
+
+        run = self._async_enqueue("all_zones", zones, DEFAULT_PRIORITY)
+        if run is None:
+            return self._covering_run_id(list(self.zones))
+        return run.run_id
+
+    async def async_stop_irrigation(self) -> None:
+        """Stop all irrigation."""
+        _LOGGER.info("Stopping irrigation system")
+        self.trace.record(CANCEL, None, REASON_STOPPED)
+
+        # Every planned zone loses its slot, only the open ones switch off
+        self._dirty_slots.update(self.timeline.slots)
+        self._async_mark_dirty(*self._zone_started)
+
+        # Drop every queued run and cancel all running timers
+        self.runs.clear()
+        for zone_name, timer in self.zone_timers.items():
+            self._async_log_run(zone_name, timer.when, REASON_STOPPED)
+        self._cancel_zone_timers()
+
+        # Reset state before waiting for the valves, so a stop that comes in
+        # meanwhile finds nothing left to stop
         self.system_state = STATE_IDLE
+        self.auto_resume = False
+        self.active_run = None
         self.current_zone = None
         self.current_program = None
-        _LOGGER.info("Irrigation program completed")
-        await self.async_update_listeners()
-
-async def _zone_timer(self, zone_name: str, entity_id: str, duration: int) -> None:
-    """Timer for a specific zone."""
-    try:
-        await asyncio.sleep(duration * 60)  # Convert minutes to seconds
-        await self._turn_off_zone(entity_id)
-        
-        if entity_id in self.active_zones:
-            self.active_zones.remove(entity_id)
-        
-        if zone_name in self.zone_timers:
-            del self.zone_timers[zone_name]
-        
-        _LOGGER.info(f"Zone {zone_name} completed")
-        
+        self.start_time = None
+        self.total_duration = 0
+        self.remaining_time = 0
+        self.active_zones.clear()
+        self._zone_runs.clear()
+        self.timeline.clear()
+        self._async_wake()
+
+        # Stop the pump before the valves close, then turn off every zone that
+        # is not already off in one call
+        await self._async_set_master(False)
+        await self._async_close_valves(self.zones.entity_ids)
+
+        self._async_record_journal()
+        self._async_mark_dirty()
+        self.async_update_listeners()
+
+    async def async_pause_irrigation(self, automatic: bool = False) -> bool:
+        """Pause the program, keeping what every zone has left.
+
+        Open zones close and their remaining time goes back to the head of
+        their run, so resuming continues where the program stopped. A pause
+        the skip conditions caused resumes once they allow irrigation.
+        """
+        if self.system_state != STATE_RUNNING:
+            return False
+        if automatic and self.skip_engine.allowed:
+            # The conditions cleared before the pause got to run
+            return False
+
+        _LOGGER.info("Pausing irrigation with %d zones running", len(self.zone_timers))
+        self.trace.record(PAUSE, len(self.zone_timers), automatic)
+        self.system_state = STATE_PAUSED
+        self.auto_resume = automatic
+        self._async_schedule_soak_end(None)
+        # A valve that is still opening is left to the queue processor
+        for zone_name in list(self.zone_timers):
+            run = self._zone_runs.get(zone_name)
+            if run is not None:
+                await self._async_suspend_zone(zone_name, run, REASON_PAUSED)
+            else:
+                await self.async_stop_zone(zone_name, REASON_PAUSED)
+        self._async_wake()
+
+        self._async_rebuild_timeline()
+        self._async_record_journal()
+        self._async_mark_dirty()
+        self.async_update_listeners()
+        return True
+
+    async def async_resume_irrigation(self) -> bool:
+        """Resume a paused program, or once the skip conditions allow it."""
+        if self.system_state != STATE_PAUSED:
+            _LOGGER.warning("Irrigation is not paused")
+            return False
+        if not self._irrigation_allowed():
+            self.auto_resume = True
+            self._async_record_journal()
+            return False
+
+        self._async_resume()
+        return True
+
+    @callback
+    def _async_resume(self) -> None:
+        """Continue the paused runs from where they stopped."""
+        _LOGGER.info("Resuming irrigation with %d queued zones", self.queue_length)
+        self.trace.record(RESUME, self.queue_length)
+        self.system_state = STATE_RUNNING
+        self.auto_resume = False
+        self._async_start_worker()
+        self._async_rebuild_timeline()
+        self._async_record_journal()
+        self._async_mark_dirty()
+        self.async_update_listeners()
+
+    async def async_run_zone(
+        self, zone_name: str, duration: Optional[int] = None
+    ) -> Optional[str]:
+        """Queue a specific zone ahead of any running program."""
+        zone = self.zones.get(zone_name)
+        if zone is None:
+            _LOGGER.error("Zone %s not found", zone_name)
+            return None
+
+        if zone.entity_id in self.active_zones:
+            _LOGGER.warning("Zone %s is already running", zone_name)
+            return None
+
+        duration = duration or zone.duration
+        if not self._irrigation_allowed([(zone, duration)]):
+            return None
+
+        _LOGGER.info("Starting zone %s for %s minutes", zone_name, duration)
+
+        run = self._async_enqueue(zone_name, [(zone, duration)], PRIORITY_MANUAL)
+        return run.run_id if run is not None else self._covering_run_id([zone])
+
+    async def async_run_program(
+        self, program_name: str, zones: List[str], priority: int = DEFAULT_PRIORITY
+    ) -> Optional[str]:
+        """Queue a custom irrigation program and return the run id."""
+        selected = self._select_zones(zones)
+        if not self._irrigation_allowed([(zone, zone.duration) for zone in selected]):
+            return None
+
+        _LOGGER.info(
+            "Starting program %s with zones: %s", program_name, [zone.name for zone in selected]
+        )
+
+        # Queue selected zones
+        run = self._async_enqueue(
+            program_name, [(zone, zone.duration) for zone in selected], priority
+        )
+        return run.run_id if run is not None else self._covering_run_id(selected)
+
+    def _select_zones(self, zone_names: List[str]) -> List[Zone]:
+        """Return the known zones of a program, every zone for an empty one."""
+        if not zone_names:
+            return list(self.zones)
+        return [
+            zone for zone in map(self.zones.get, dict.fromkeys(zone_names)) if zone is not None
+        ]
+
+    @callback
+    def async_load_schedules(self) -> None:
+        """Compile the schedules of the entry and arm the timer for the next start."""
+        self.schedule_engine.async_load(self._schedules_config)
+        async_dispatcher_send(self.hass, SIGNAL_SCHEDULES_UPDATED.format(self.entry.entry_id))
+
+    @callback
+    def _async_start_schedule(self, schedule: Schedule, when: datetime) -> None:
+        """Queue the program of a schedule that is due, scaled for the season."""
+        scale = schedule.scale_on(as_local(when).date())
+        self.trace.record(SCHEDULE, schedule.name, scale)
+        zones = [(zone, zone.duration * scale) for zone in self._select_zones(schedule.zones)]
+        if zones and self._irrigation_allowed(zones):
+            _LOGGER.info("Starting scheduled program %s at %.0f%%", schedule.name, scale * 100)
+            self._async_enqueue(schedule.name, zones, schedule.priority)
+        async_dispatcher_send(self.hass, SIGNAL_SCHEDULES_UPDATED.format(self.entry.entry_id))
+
+    def schedule_duration(self, schedule: Schedule, when: datetime) -> float:
+        """Return an estimate in minutes of how long a scheduled program runs.
+
+        Zones are assumed to share the concurrency limit evenly, flow
+        limits and soak periods are left out.
+        """
+        scale = schedule.scale_on(as_local(when).date())
+        durations = [zone.duration * scale for zone in self._select_zones(schedule.zones)]
+        if not durations:
+            return 0
+        if not self.max_concurrent_zones:
+            return max(durations)
+        return max(max(durations), sum(durations) / self.max_concurrent_zones)
+
+    def _covering_run_id(self, zones: List[Zone]) -> Optional[str]:
+        """Return the run a request merged into, by its first zone."""
+        if not zones:
+            return None
+        owner = self.runs.owner(zones[0].name)
+        if owner is None:
+            owner = self._zone_runs.get(zones[0].name)
+        return owner.run_id if owner is not None else None
+
+    @callback
+    def async_get_run_status(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Return the status of a queued, running or recently finished run."""
+        run = self.runs.lookup(run_id)
+        if run is None:
+            return None
+
+        running = [
+            zone_name for zone_name, owner in self._zone_runs.items() if owner is run
+        ]
+        end = self._run_end(run, running)
+        status = run.as_dict()
+        status["running"] = running
+        status["eta"] = end.isoformat() if end is not None and not run.finished else None
+        return status
+
+    def _run_end(self, run: ProgramRun, running: Iterable[str]) -> Optional[datetime]:
+        """Return when the planned zones of a run end, if any are planned."""
+        ends = [
+            slot.end
+            for zone_name in (*running, *run.durations)
+            if (slot := self.timeline.get(zone_name)) is not None
+        ]
+        return max(ends, default=None)
+
+    async def async_cancel_run(self, run_id: str) -> bool:
+        """Cancel a queued or running run and close the zones it opened."""
+        run = self.runs.get(run_id)
+        if run is None:
+            return False
+
+        _LOGGER.info("Cancelling program %s", run.name)
+        self.trace.record(CANCEL, run.name, run.run_id)
+        self.runs.finish(run, False)
+        for zone_name, owner in list(self._zone_runs.items()):
+            if owner is run:
+                await self.async_stop_zone(zone_name)
+
+        self._async_rebuild_timeline()
+        self._async_wake()
+        self._async_record_journal()
+        self._async_mark_dirty()
+        self.async_update_listeners()
+        return True
+
+    @callback
+    def _async_enqueue(
+        self, name: str, zones: List[Tuple[Zone, float]], priority: int
+    ) -> Optional[ProgramRun]:
+        """Queue a program run, merging zones other runs already cover."""
+        now = utcnow()
+        run = ProgramRun(name, priority, now)
+        for zone, duration in zones:
+            # A zone that is watering right now is not run a second time
+            if zone.name in self.zone_timers or zone.name in self._restored:
+                continue
+            self.runs.merge(run, zone.name, duration)
+        if self.active_run is not None:
+            self.total_duration = self.active_run.total_duration
+
+        if not run:
+            _LOGGER.info("Program %s merged into already queued runs", name)
+            self.trace.record(MERGE, name, len(zones))
+            # The merged durations may have changed
+            self._async_rebuild_timeline()
+            self._async_record_journal()
+            self._async_mark_dirty()
+            self.async_update_listeners()
+            return None
+
+        run.total_duration = sum(run.durations.values())
+        self.runs.push(run)
+        self.trace.record(ENQUEUE, name, run.run_id)
+
+        if self.system_state == STATE_IDLE:
+            self.start_time = now
+        # A new request also resumes a paused program
+        self.system_state = STATE_RUNNING
+        self.auto_resume = False
+        self._async_start_worker()
+
+        self._async_rebuild_timeline()
+        self._async_record_journal()
+        self._async_mark_dirty()
+        self.async_update_listeners()
+        return run
+
+    @callback
+    def _async_start_worker(self) -> None:
+        """Start the queue processor, or wake it up when it is running."""
+        self._async_schedule_tick()
+        if self._worker is None or self._worker.done():
+            self._worker = self.entry.async_create_background_task(
+                self.hass,
+                self._process_zone_queue(),
+                f"{DOMAIN}_queue_{self.entry.entry_id}",
+            )
+        else:
+            self._async_wake()
+
+    @callback
+    def _async_rebuild_timeline(self) -> None:
+        """Replan the start and end time of every queued zone."""
+        if self.system_state == STATE_RUNNING:
+            runs = self.runs
+        else:
+            runs = RunQueue()
+        changed = self.timeline.rebuild(
+            utcnow(),
+            {
+                **{zone_name: restored[0] for zone_name, restored in self._restored.items()},
+                **{zone_name: timer.when for zone_name, timer in self.zone_timers.items()},
+            },
+            runs,
+            self.zones,
+            self.max_concurrent_zones,
+            self.max_flow,
+            self.valve_overlap,
+        )
+        self._dirty_slots.update(changed)
+
+    @callback
+    def _async_wake(self) -> None:
+        """Wake up the queue processor."""
+        if self._wakeup is not None and not self._wakeup.done():
+            self._wakeup.set_result(None)
+
+    async def _async_open_zone(
+        self, zone: Zone, deadline: datetime, started: Optional[datetime] = None
+    ) -> bool:
+        """Turn on a zone and schedule its end at an absolute deadline.
+
+        Return if the zone opened. A stop or cancel that comes in while the
+        valve is opening drops the zone from active_zones, the valve is then
+        closed again without arming its timer or the pump.
+        """
+        run = self._zone_runs.get(zone.name)
+        self.active_zones.add(zone.entity_id)
+        self.current_zone = zone.name
+        self._zone_started[zone.name] = started or utcnow()
+
+        # Turn on the zone, and the pump once there is a valve to feed
+        confirmed = await self._turn_on_zone(zone.entity_id)
+        if zone.entity_id not in self.active_zones or (run is not None and run.finished):
+            await self._async_abort_zone(zone, run)
+            return False
+        if not confirmed:
+            self._async_valve_failed(zone, deadline)
+            return False
+        self.stuck_valves.discard(zone.entity_id)
+        await self._async_set_master(True)
+
+        self._zone_done[zone.name] = self.hass.loop.create_future()
+        self.zone_timers[zone.name] = self._scheduler.async_schedule(
+            deadline, partial(self._async_zone_expired, zone)
+        )
+        if self.valve_overlap:
+            handoff = deadline - self.valve_overlap
+            if handoff > utcnow():
+                self._handoff_timers[zone.name] = self._scheduler.async_schedule(
+                    handoff, partial(self._async_zone_handoff, zone)
+                )
+            else:
+                self._releasing.add(zone.entity_id)
+        more_cycles = self.runs.owner(zone.name) is not None
+        if not self.timeline.start_zone(zone.name, utcnow(), deadline, more_cycles):
+            self._async_rebuild_timeline()
+
+        self._async_record_journal()
+        self._async_mark_dirty(zone.name)
+        self.async_update_listeners()
+        return True
+
+    async def _async_abort_zone(self, zone: Zone, run: Optional[ProgramRun]) -> None:
+        """Close a valve whose run was stopped or cancelled while it opened."""
+        _LOGGER.info("Zone %s stopped while its valve opened", zone.name)
+        self.active_zones.discard(zone.entity_id)
+        self._zone_started.pop(zone.name, None)
+        if self._zone_runs.get(zone.name) is run:
+            self._zone_runs.pop(zone.name, None)
+        if self.current_zone == zone.name:
+            self.current_zone = None
+        await self._async_close_valves([zone.entity_id])
+        if not self.active_zones:
+            await self._async_set_master(False)
+        self._async_mark_dirty(zone.name)
+        self.async_update_listeners()
+
+    @callback
+    def _async_valve_failed(self, zone: Zone, deadline: datetime) -> None:
+        """Skip a zone whose valve did not open, so the program goes on."""
+        _LOGGER.error("Zone %s skipped, valve %s did not open", zone.name, zone.entity_id)
+        self.active_zones.discard(zone.entity_id)
+        self._zone_runs.pop(zone.name, None)
+        if self.current_zone == zone.name:
+            self.current_zone = None
+
+        now = utcnow()
+        started = self._zone_started.pop(zone.name, now)
+        self.run_log.async_record(
+            zone.name, now, now, (deadline - started).total_seconds() / 60, REASON_FAILED
+        )
+        # Its other cycles would fail the same way
+        self.runs.discard_zone(zone.name)
+        # The valve may still open late, close it without holding up the queue
+        self.hass.async_create_task(self._async_close_valves([zone.entity_id]))
+
+        self.timeline.finish_zone(zone.name)
+        self._async_rebuild_timeline()
+        self._async_record_journal()
+        self._async_mark_dirty(zone.name)
+        self.async_update_listeners()
+
+    async def async_stop_zone(self, zone_name: str, reason: str = REASON_STOPPED) -> None:
+        """Stop a running zone before its deadline."""
+        zone = self.zones.get(zone_name)
+        if zone is None:
+            return
+
+        timer = self.zone_timers.pop(zone_name, None)
+        if timer is not None:
+            timer.cancel()
+            self.trace.record(CANCEL, zone_name, reason)
+            self._async_log_run(zone_name, timer.when, reason)
+        self._cancel_handoff(zone_name)
+
+        await self._async_finish_zone(zone, completed=False)
+
+    async def _async_suspend_zone(self, zone_name: str, run: ProgramRun, reason: str) -> None:
+        """Stop a zone and queue the rest of its time at the head of its run."""
+        timer = self.zone_timers.get(zone_name)
+        remaining = (timer.when - utcnow()).total_seconds() / 60 if timer else 0
+        await self.async_stop_zone(zone_name, reason)
+        if remaining > 0 and not run.finished:
+            self.runs.push_front(run, zone_name, remaining)
+
+    @callback
+    def _async_log_run(self, zone_name: str, deadline: datetime, reason: str = "") -> None:
+        """Add a zone that closes now to the run log."""
+        started = self._zone_started.pop(zone_name, None)
+        if started is not None:
+            planned = (deadline - started).total_seconds() / 60
+            self.run_log.async_record(zone_name, started, utcnow(), planned, reason)
+
+    def _journal_data(self) -> Dict[str, Any]:
+        """Return the run state to persist."""
+        if self.system_state == STATE_IDLE and not self.zone_timers:
+            return {}
+
+        # Zones not reopened yet keep their place in the journal
+        running = {
+            zone_name: {
+                "deadline": when.isoformat(),
+                "started": started.isoformat() if started else None,
+                "run_id": owner.run_id if (owner := self._zone_runs.get(zone_name)) else None,
+            }
+            for zone_name, (when, started) in self._restored.items()
+        }
+        for zone_name, timer in self.zone_timers.items():
+            owner = self._zone_runs.get(zone_name)
+            started = self._zone_started.get(zone_name)
+            running[zone_name] = {
+                "deadline": timer.when.isoformat(),
+                "started": started.isoformat() if started else None,
+                "run_id": owner.run_id if owner is not None else None,
+            }
+
+        runs = []
+        for run in self.runs:
+            end = self._run_end(
+                run, [zone_name for zone_name, owner in self._zone_runs.items() if owner is run]
+            )
+            runs.append({**run.as_dict(), "end": end.isoformat() if end is not None else None})
+
+        return {
+            "saved_at": utcnow().isoformat(),
+            "state": self.system_state,
+            "auto_resume": self.auto_resume,
+            "start_time": self.start_time.isoformat() if self.start_time else None,
+            "runs": runs,
+            "running": running,
+        }
+
+    @callback
+    def _async_record_journal(self) -> None:
+        """Schedule a write of the run state."""
+        self._journal.async_record(self._journal_data)
+
+    async def async_restore(self) -> None:
+        """Rebuild the run state recorded before a restart or reload.
+
+        Nothing is switched here: valve integrations may still be loading
+        during setup, async_started reopens the zones that were running.
+        Like zones whose deadline passed, queued runs that should have ended
+        while we were down, or that were queued longer than JOURNAL_MAX_AGE
+        ago, are dropped instead of watering long after they were due.
+        """
+        await self.run_log.async_load()
+        data = await self._journal.async_load()
+        if not data:
+            return
+
+        now = utcnow()
+        saved_at = parse_datetime(data["saved_at"]) if data.get("saved_at") else None
+        stale = saved_at is not None and now - saved_at > JOURNAL_MAX_AGE
+        dropped = 0
+        for stored in data.get("runs", []):
+            created = parse_datetime(stored["created"]) or now
+            end = parse_datetime(stored["end"]) if stored.get("end") else None
+            if stale or now - created > JOURNAL_MAX_AGE or (end is not None and end <= now):
+                _LOGGER.info("Not restoring program %s, it was due by %s", stored["name"], end)
+                dropped += 1
+                continue
+            run = ProgramRun(
+                stored["name"],
+                stored["priority"],
+                created,
+                stored["run_id"],
+                stored.get("status", RUN_STATUS_QUEUED),
+            )
+            ready_at = stored.get("ready_at", {})
+            for zone_name, duration in stored["queue"]:
+                if zone_name in self.zones:
+                    when = ready_at.get(zone_name)
+                    run.append(zone_name, duration, parse_datetime(when) if when else None)
+            run.total_duration = stored.get("total_duration", 0)
+            self.runs.push(run)
+
+        for zone_name, running in data.get("running", {}).items():
+            when = parse_datetime(running["deadline"])
+            if zone_name not in self.zones or when is None:
+                continue
+            run = self.runs.get(running["run_id"]) if running["run_id"] else None
+            if run is not None:
+                self._zone_runs[zone_name] = run
+            started = running.get("started")
+            self._restored[zone_name] = (when, parse_datetime(started) if started else None)
+
+        self.system_state = data.get("state", STATE_IDLE)
+        self.auto_resume = data.get("auto_resume", False)
+        self.start_time = parse_datetime(data["start_time"]) if data.get("start_time") else None
+        if dropped and not self.runs and all(when <= now for when, _ in self._restored.values()):
+            # Nothing left to water
+            self.system_state = STATE_IDLE
+            self.auto_resume = False
+            self.start_time = None
+
+        if self.system_state == STATE_PAUSED and self.auto_resume and self.skip_engine.allowed:
+            # The conditions cleared while we were down
+            self.system_state = STATE_RUNNING
+            self.auto_resume = False
+
+        self._async_rebuild_timeline()
+        self._async_record_journal()
+        self._async_mark_dirty()
+        self.async_update_listeners()
+
+    def _valve_available(self, zone: Zone) -> bool:
+        """Return if the valve of a zone reports a state."""
+        state = self.hass.states.get(zone.entity_id)
+        return state is not None and state.state != STATE_UNAVAILABLE
+
+    async def _async_resume_restored(self) -> None:
+        """Reopen the zones that ran before the restart and resume the queue.
+
+        A zone whose valve does not report a state yet is reopened when it
+        shows up, as long as its deadline is ahead.
+        """
+        expired: List[str] = []
+        for zone_name, (when, _started) in list(self._restored.items()):
+            zone = self.zones.get(zone_name)
+            if zone is not None and not self._valve_available(zone):
+                # Give up on the zone at its deadline
+                self._restore_timers[zone_name] = self._scheduler.async_schedule(
+                    when, partial(self._async_restored_expired, zone_name)
+                )
+                continue
+            entity_id = await self._async_reopen_zone(zone_name)
+            if entity_id is not None:
+                expired.append(entity_id)
+
+        # Make sure valves whose run ended while we were down are closed
+        if expired:
+            await self._async_close_valves(expired)
+        if not self.active_zones:
+            await self._async_set_master(False)
+
+        if self.system_state == STATE_RUNNING:
+            _LOGGER.info("Resuming irrigation with %d queued zones", self.queue_length)
+            self._async_start_worker()
+
+        self._async_rebuild_timeline()
+        self._async_record_journal()
+        self._async_mark_dirty()
+        self.async_update_listeners()
+
+    @callback
+    def _async_drop_restored(self, zone_name: str) -> None:
+        """Forget a restored zone that will not be reopened."""
+        self._restored.pop(zone_name, None)
+        self._zone_runs.pop(zone_name, None)
+        timer = self._restore_timers.pop(zone_name, None)
+        if timer is not None:
+            timer.cancel()
+
+    @callback
+    def _async_restored_expired(self, zone_name: str, _now: datetime) -> None:
+        """Drop a restored zone whose valve did not show up before its deadline."""
+        self._restore_timers.pop(zone_name, None)
+        self.hass.async_create_task(self._async_reopen_restored_zone(zone_name))
+
+    async def _async_reopen_restored_zone(self, zone_name: str) -> None:
+        """Reopen a restored zone whose valve showed up late, or drop it at its deadline."""
+        entity_id = await self._async_reopen_zone(zone_name)
+        if entity_id is not None:
+            await self._async_close_valves([entity_id])
+        # The zone no longer holds its place in the budget
+        self._async_wake()
+        self._async_rebuild_timeline()
+        self._async_record_journal()
+        self.async_update_listeners()
+
+    async def _async_reopen_zone(self, zone_name: str) -> Optional[str]:
+        """Reopen a zone that ran before the restart.
+
+        Return the valve to close instead, when the zone ran out, was
+        stopped or its run was cancelled meanwhile. A zone of a paused
+        program goes back to the head of its run.
+        """
+        restored = self._restored.pop(zone_name, None)
+        timer = self._restore_timers.pop(zone_name, None)
+        if timer is not None:
+            timer.cancel()
+        zone = self.zones.get(zone_name)
+        if restored is None or zone is None:
+            return None
+        when, started = restored
+        run = self._zone_runs.get(zone_name)
+        remaining = (when - utcnow()).total_seconds() / 60
+        if remaining <= 0 or self.system_state == STATE_IDLE or (run is not None and run.finished):
+            self._zone_runs.pop(zone_name, None)
+            return zone.entity_id
+        if self.system_state == STATE_PAUSED:
+            self._zone_runs.pop(zone_name, None)
+            if run is not None:
+                self.runs.push_front(run, zone_name, remaining)
+            return zone.entity_id
+
+        _LOGGER.info("Resuming zone %s until %s", zone_name, when)
+        await self._async_open_zone(zone, when, started)
+        return None
+
+    async def async_flush_journal(self) -> None:
+        """Write the run state right away, before the coordinator stops."""
+        await self._journal.async_flush()
+
+    def _has_capacity(self, zone: Zone) -> bool:
+        """Return if the zone fits in the flow and concurrency budget.
+
+        Zones in their overlap with the next zone no longer count.
+        """
+        active_zones = self.active_zones - self._releasing if self._releasing else self.active_zones
+        if self._restored:
+            # Restored zones waiting for their valve keep their place
+            active_zones = active_zones | {
+                zone.entity_id
+                for zone_name in self._restored
+                if (zone := self.zones.get(zone_name)) is not None
+            }
+        if not active_zones:
+            return True
+
+        if self.max_concurrent_zones and len(active_zones) >= self.max_concurrent_zones:
+            return False
+
+        if self.max_flow:
+            active_flow = sum(
+                self.zones.get_by_entity(entity_id).flow for entity_id in active_zones
+            )
+            if active_flow + zone.flow > self.max_flow:
+                return False
+
+        return True
+
+    async def _async_activate_run(self, run: Optional[ProgramRun]) -> None:
+        """Make a run the active one, preempting the previous run."""
+        previous = self.active_run
+        self.active_run = run
+        if run is not None:
+            run.status = RUN_STATUS_RUNNING
+
+        if previous is not None and not previous.finished:
+            previous.status = RUN_STATUS_QUEUED
+            _LOGGER.info(
+                "Program %s preempted by %s", previous.name, run.name if run is not None else None
+            )
+            for zone_name, owner in list(self._zone_runs.items()):
+                # Resume the rest of the zone when the program continues
+                if owner is previous:
+                    await self._async_suspend_zone(zone_name, previous, REASON_STOPPED)
+            self._async_rebuild_timeline()
+
+        self.current_program = run.name if run is not None else None
+        self.total_duration = run.total_duration if run is not None else 0
+        self.remaining_time = self.total_duration
+
+    async def _process_zone_queue(self) -> None:
+        """Run queued programs by priority, as many zones as the budget allows."""
+        while self.system_state == STATE_RUNNING:
+            run = self.runs.peek()
+            if run is not self.active_run:
+                await self._async_activate_run(run)
+
+            if run is None and not self._zone_done:
+                break
+
+            if run is not None:
+                now = utcnow()
+                while (
+                    self.system_state == STATE_RUNNING
+                    and not run.finished
+                    and (zone_name := run.peek(now)) is not None
+                    and self._has_capacity(self.zones.get(zone_name))
+                ):
+                    # Check the skip conditions before each zone
+                    if not self._irrigation_allowed():
+                        _LOGGER.info("Conditions changed, pausing irrigation")
+                        await self.async_pause_irrigation(automatic=True)
+                        break
+
+                    zone_name, duration = self.runs.pop_zone(run, now)
+                    if zone_name in self.zone_timers or zone_name in self._restored:
+                        continue
+                    zone = self.zones.get(zone_name)
+                    length = zone.cycle_length(duration)
+                    self.trace.record(DEQUEUE, zone_name, length)
+                    if length < duration:
+                        # Queue the rest to run after the soak, other zones
+                        # of the run fill the gap
+                        self.runs.requeue(
+                            run,
+                            zone_name,
+                            duration - length,
+                            now + timedelta(minutes=length + zone.soak),
+                        )
+                    self._zone_runs[zone_name] = run
+                    await self._async_open_zone(zone, now + timedelta(minutes=length))
+                    if self.system_state == STATE_PAUSED:
+                        # Paused while the valve opened
+                        if zone_name in self.zone_timers:
+                            await self._async_suspend_zone(zone_name, run, REASON_PAUSED)
+                        break
+                    if self.system_state != STATE_RUNNING or run.finished:
+                        # Stopped or cancelled while the valve opened
+                        break
+                    now = utcnow()
+
+                if self.system_state != STATE_RUNNING:
+                    break
+                if run.finished:
+                    # Cancelled meanwhile, go on with the next run
+                    continue
+
+                if run and run.peek(now) is None:
+                    # Every pending zone is soaking, wake up when one is done
+                    self._async_schedule_soak_end(run.next_ready())
+
+                if not run and run not in self._zone_runs.values():
+                    _LOGGER.info("Program %s completed", run.name)
+                    self.runs.finish(run, True)
+                    continue
+
+            if not self.active_zones:
+                # Nothing opened after the last zone closed
+                await self._async_set_master(False)
+
+            # Wait for any zone to complete or for a new request
+            self._wakeup = self.hass.loop.create_future()
+            await asyncio.wait(
+                [self._wakeup, *self._zone_done.values()],
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            self._wakeup = None
+
+        # If nothing is left and system was running, mark as idle
+        if self.system_state == STATE_RUNNING and not self.runs and not self._zone_done:
+            self.system_state = STATE_IDLE
+            self.active_run = None
+            self.current_zone = None
+            self.current_program = None
+            self.timeline.clear()
+            await self._async_set_master(False)
+            _LOGGER.info("Irrigation program completed")
+            self._async_record_journal()
+            self._async_mark_dirty()
+            self.async_update_listeners()
+
+    @callback
+    def _async_schedule_soak_end(self, when: Optional[datetime]) -> None:
+        """Wake up the queue processor when a zone is done soaking."""
+        if self._soak_timer is not None:
+            if when is not None and self._soak_timer.when == when:
+                return
+            self._soak_timer.cancel()
+            self._soak_timer = None
+        if when is not None:
+            self._soak_timer = self._scheduler.async_schedule(when, self._async_soak_ended)
+
+    @callback
+    def _async_schedule_tick(self) -> None:
+        """Arm the periodic write of the remaining times, once."""
+        if self._tick_timer is None:
+            self._tick_timer = self._scheduler.async_schedule(
+                utcnow() + TICK_INTERVAL, self._async_tick
+            )
+
+    @callback
+    def _async_tick(self, _now: datetime) -> None:
+        """Write the remaining times, which change without a transition."""
+        self._tick_timer = None
+        if self.system_state != STATE_RUNNING:
+            return
+        self._dirty_slots.update(self.zone_timers)
+        self._system_dirty = True
+        self.async_update_listeners()
+        self._async_schedule_tick()
+
+    @callback
+    def _async_soak_ended(self, _now: datetime) -> None:
+        """Handle the end of a soak period."""
+        self._soak_timer = None
+        self.trace.record(TIMER, None, "soak")
+        self._async_wake()
+
+    @callback
+    def _async_zone_handoff(self, zone: Zone, _now: datetime) -> None:
+        """Let the next zone open while this one runs out its overlap."""
+        self._handoff_timers.pop(zone.name, None)
+        self.trace.record(TIMER, zone.name, "handoff")
+        self._releasing.add(zone.entity_id)
+        self._async_wake()
+
+    def _cancel_handoff(self, zone_name: str) -> None:
+        """Cancel the overlap deadline of a zone."""
+        timer = self._handoff_timers.pop(zone_name, None)
+        if timer is not None:
+            timer.cancel()
+
+    @callback
+    def _async_zone_expired(self, zone: Zone, _now: datetime) -> None:
+        """Handle a zone reaching its deadline."""
+        self.trace.record(TIMER, zone.name, "deadline")
+        self._cancel_handoff(zone.name)
+        timer = self.zone_timers.pop(zone.name, None)
+        if timer is not None:
+            self.metrics.scheduler_lag.record(
+                max((utcnow() - timer.when).total_seconds(), 0)
+            )
+            self._async_log_run(zone.name, timer.when)
+        self.hass.async_create_task(self._async_finish_zone(zone, completed=True))
+
+    async def _async_finish_zone(self, zone: Zone, completed: bool) -> None:
+        """Turn off a zone and resolve its run."""
+        if self.active_zones <= {zone.entity_id} and not self._zone_follows():
+            # The last valve closes, stop the pump first so it never runs
+            # against closed valves
+            await self._async_set_master(False)
+        await self._turn_off_zone(zone.entity_id)
+        self.active_zones.discard(zone.entity_id)
+        self._releasing.discard(zone.entity_id)
+        self._zone_runs.pop(zone.name, None)
+
+        if completed:
+            _LOGGER.info("Zone %s completed", zone.name)
+
         # Update current zone if this was the current one
-        if self.current_zone == zone_name:
+        if self.current_zone == zone.name:
             self.current_zone = None
-        
-        await self.async_update_listeners()
-        
-    except asyncio.CancelledError:
-        await self._turn_off_zone(entity_id)
-        if entity_id in self.active_zones:
-            self.active_zones.remove(entity_id)
-        raise
-
-async def _turn_on_zone(self, entity_id: str) -> None:
-    """Turn on a zone."""
-    await self.hass.services.async_call(
-        "switch", "turn_on", {"entity_id": entity_id}
-    )
-
-async def _turn_off_zone(self, entity_id: str) -> None:
-    """Turn off a zone."""
-    await self.hass.services.async_call(
-        "switch", "turn_off", {"entity_id": entity_id}
-    )
-
-def async_stop(self) -> None:
-    """Stop the coordinator."""
-    # Cancel all timers
-    for timer in self.zone_timers.values():
-        timer.cancel()
-    self.zone_timers.clear()
-```
+
+        self._resolve_zone(zone.name, completed)
+        self.timeline.finish_zone(zone.name)
+        if not completed or self.runs.owner(zone.name) is not None:
+            # Whatever was planned after this zone now moves up, or the zone
+            # soaks before its next cycle
+            self._async_rebuild_timeline()
+        self._async_record_journal()
+        self._async_mark_dirty(zone.name)
+        self.async_update_listeners()
+
+    def _zone_follows(self) -> bool:
+        """Return if the queue processor opens another zone right away."""
+        if self.system_state != STATE_RUNNING or not self.skip_engine.allowed:
+            return False
+        run = self.runs.peek()
+        return run is not None and run.peek(utcnow()) is not None
+
+    async def _async_set_master(self, is_on: bool) -> None:
+        """Open or close the master valve or pump relay, if there is one."""
+        if self.master_valve is None or self._master_open == is_on:
+            return
+        self._master_open = is_on
+        if is_on:
+            self.stuck_valves.discard(self.master_valve)
+            await self.actuator.async_turn_on((self.master_valve,))
+        else:
+            await self._async_close_valves((self.master_valve,))
+
+    def _resolve_zone(self, zone_name: str, completed: bool) -> None:
+        """Wake up whoever waits for a zone run to end."""
+        done = self._zone_done.pop(zone_name, None)
+        if done is not None and not done.done():
+            done.set_result(completed)
+
+    def _cancel_zone_timers(self) -> None:
+        """Cancel every zone and soak deadline and release the waiting queue."""
+        for zone_name, timer in self.zone_timers.items():
+            timer.cancel()
+            self._resolve_zone(zone_name, False)
+        self.zone_timers.clear()
+        for timer in self._restore_timers.values():
+            timer.cancel()
+        self._restore_timers.clear()
+        self._restored.clear()
+        for timer in self._handoff_timers.values():
+            timer.cancel()
+        self._handoff_timers.clear()
+        self._releasing.clear()
+        self._async_schedule_soak_end(None)
+        if self._tick_timer is not None:
+            self._tick_timer.cancel()
+            self._tick_timer = None
+
+    async def _turn_on_zone(self, entity_id: str) -> bool:
+        """Turn on a zone and return if the valve confirmed."""
+        return not await self.actuator.async_turn_on((entity_id,))
+
+    async def _turn_off_zone(self, entity_id: str) -> None:
+        """Turn off a zone."""
+        await self._async_close_valves((entity_id,))
+
+    async def _async_close_valves(self, entity_ids: Iterable[str]) -> None:
+        """Close valves, keeping those that did not confirm for the next resync."""
+        entity_ids = list(entity_ids)
+        failed = await self.actuator.async_turn_off(entity_ids)
+        self.stuck_valves.difference_update(entity_ids)
+        self.stuck_valves.update(failed)
+        if self.stuck_valves and self._stuck_timer is None:
+            self._stuck_timer = self._scheduler.async_schedule(
+                utcnow() + STUCK_RETRY_INTERVAL, self._async_retry_stuck
+            )
+
+    @callback
+    def _async_retry_stuck(self, _now: datetime) -> None:
+        """Try closing the stuck valves again, in the background."""
+        self._stuck_timer = None
+        if self.stuck_valves:
+            self.entry.async_create_background_task(
+                self.hass,
+                self._async_close_valves(list(self.stuck_valves)),
+                f"{DOMAIN}_stuck_{self.entry.entry_id}",
+            )
+
+    def async_stop(self) -> None:
+        """Stop the coordinator."""
+        if self._unsub_state_listener:
+            self._unsub_state_listener()
+            self._unsub_state_listener = None
+
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+        self.skip_engine.async_stop()
+        self.schedule_engine.async_stop()
+        if self._stuck_timer is not None:
+            self._stuck_timer.cancel()
+            self._stuck_timer = None
+
+        # Cancel all timers and close the valves they were guarding
+        self._cancel_zone_timers()
+        self._zone_started.clear()
+        valves = list(self.active_zones)
+        if self.master_valve is not None and self._master_open is not False:
+            valves.insert(0, self.master_valve)
+        if valves:
+            self.hass.async_create_task(self.actuator.async_turn_off(valves))
+        self.active_zones.clear()
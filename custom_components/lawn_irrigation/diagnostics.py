@@ -0,0 +1,52 @@
+"""Diagnostics support for Lawn Irrigation System."""
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .coordinator import LawnIrrigationCoordinator
+
+# Newest run log records included
+RUN_LOG_DIAGNOSTICS = 50
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> Dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: LawnIrrigationCoordinator = hass.data[DOMAIN][entry.entry_id]
+    records = await coordinator.run_log.async_read(RUN_LOG_DIAGNOSTICS)
+
+    return {
+        "entry": {
+            "title": entry.title,
+            "data": dict(entry.data),
+            "options": dict(entry.options),
+        },
+        "state": {
+            "system_state": coordinator.system_state,
+            "active_zones": sorted(coordinator.active_zones),
+            "current_program": coordinator.current_program,
+            "runs": [run.as_dict() for run in coordinator.runs],
+            "timeline": {
+                zone_name: [slot.start.isoformat(), slot.end.isoformat()]
+                for zone_name, slot in coordinator.timeline.slots.items()
+            },
+        },
+        "conditions": coordinator.skip_engine.as_dict(),
+        "schedules": coordinator.schedule_engine.as_dict(),
+        "metrics": coordinator.metrics.as_dict(),
+        "actuation": {
+            **coordinator.actuator.as_dict(),
+            "stuck_valves": sorted(coordinator.stuck_valves),
+        },
+        "run_log": {
+            "written": coordinator.run_log.written,
+            "capacity": coordinator.run_log.capacity,
+            "recent": records,
+        },
+        "trace": coordinator.trace.as_dict(),
+    }
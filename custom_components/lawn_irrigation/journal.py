@@ -0,0 +1,58 @@
+"""Persistent run journal for Lawn Irrigation System."""
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+from typing import Any, Callable, Dict, Optional
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+JOURNAL_SAVE_DELAY = 5
+# Queued programs older than this are not restored, they are long overdue
+JOURNAL_MAX_AGE = timedelta(hours=12)
+
+
+class RunJournal:
+    """Persist the run state of a config entry across restarts.
+
+    The journal holds a single small document describing the running
+    program: the deadline of every open zone and the remaining queue with
+    the planned end of every run, stamped with the time it was saved.
+    Writes are debounced so bursts of zone transitions cost one write.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the journal."""
+        self._store: Store[Dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.journal"
+        )
+        self._data_func: Optional[Callable[[], Dict[str, Any]]] = None
+
+    async def async_load(self) -> Optional[Dict[str, Any]]:
+        """Load the last recorded run state."""
+        try:
+            return await self._store.async_load()
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.warning("Could not load irrigation run journal: %s", err)
+            return None
+
+    @callback
+    def async_record(self, data_func: Callable[[], Dict[str, Any]]) -> None:
+        """Schedule a debounced write of the current run state."""
+        self._data_func = data_func
+        self._store.async_delay_save(data_func, JOURNAL_SAVE_DELAY)
+
+    async def async_flush(self) -> None:
+        """Write a pending record immediately."""
+        if self._data_func is not None:
+            await self._store.async_save(self._data_func())
+
+    async def async_remove(self) -> None:
+        """Remove the journal from disk."""
+        await self._store.async_remove()
@@ -0,0 +1,152 @@
+"""Latency instrumentation for Lawn Irrigation System."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Upper bounds of the histogram buckets in seconds, the last one is open
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+class LatencyHistogram:
+    """Fixed-size histogram of durations in seconds.
+
+    Recording is a bisect and two additions, and memory does not grow with
+    the number of samples. Percentiles are reported as the upper bound of
+    the bucket they fall in.
+    """
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        """Initialize the histogram."""
+        self.counts: List[int] = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        """Add a sample."""
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Return an upper estimate of a percentile."""
+        if not self.count:
+            return None
+        rank = self.count * percent / 100
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        """Return the mean of the samples."""
+        return self.total / self.count if self.count else None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return a summary and the bucket counts."""
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "max": self.max if self.count else None,
+            "buckets": {
+                **{str(bound): count for bound, count in zip(LATENCY_BUCKETS, self.counts)},
+                "inf": self.counts[-1],
+            },
+        }
+
+
+class IrrigationMetrics:
+    """Latency histograms of a controller.
+
+    actuation: command sent until the valve switch reported the new state
+    service_call: duration of the switch service call
+    scheduler_lag: zone deadline until the expiry ran
+    update_cycle: time spent notifying entities of a change
+    refresh: duration of the periodic resync
+    setup: seconds the config entry took to set up
+    """
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self.actuation = LatencyHistogram()
+        self.service_call = LatencyHistogram()
+        self.scheduler_lag = LatencyHistogram()
+        self.update_cycle = LatencyHistogram()
+        self.refresh = LatencyHistogram()
+        self.zone_actuation: Dict[str, LatencyHistogram] = {}
+        self.setup: Optional[float] = None
+        # Commands waiting for the switch to report: entity_id -> (state, sent)
+        self._pending: Dict[str, Tuple[str, float]] = {}
+        # Commands superseded before the switch ever reported the state
+        self.unconfirmed: Dict[str, int] = {}
+
+    def command_sent(self, entity_ids: Iterable[str], state: str, now: float) -> None:
+        """Start timing a command to switch valves."""
+        for entity_id in entity_ids:
+            if entity_id in self._pending:
+                self.unconfirmed[entity_id] = self.unconfirmed.get(entity_id, 0) + 1
+            self._pending[entity_id] = (state, now)
+
+    def state_observed(self, entity_id: str, state: str, now: float) -> None:
+        """Stop timing a command once the switch reports its state."""
+        pending = self._pending.get(entity_id)
+        if pending is None or pending[0] != state:
+            return
+        del self._pending[entity_id]
+        elapsed = now - pending[1]
+        self.actuation.record(elapsed)
+        histogram = self.zone_actuation.get(entity_id)
+        if histogram is None:
+            histogram = self.zone_actuation[entity_id] = LatencyHistogram()
+        histogram.record(elapsed)
+
+    def slowest_zones(self, count: int = 3) -> Dict[str, Optional[float]]:
+        """Return the zones with the highest 95th percentile response."""
+        ranked = sorted(
+            self.zone_actuation.items(),
+            key=lambda item: item[1].percentile(95) or 0,
+            reverse=True,
+        )
+        return {entity_id: histogram.percentile(95) for entity_id, histogram in ranked[:count]}
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return every histogram."""
+        return {
+            "actuation": self.actuation.as_dict(),
+            "service_call": self.service_call.as_dict(),
+            "scheduler_lag": self.scheduler_lag.as_dict(),
+            "update_cycle": self.update_cycle.as_dict(),
+            "refresh": self.refresh.as_dict(),
+            "setup": self.setup,
+            "zone_actuation": {
+                entity_id: histogram.as_dict()
+                for entity_id, histogram in self.zone_actuation.items()
+            },
+            "pending_commands": len(self._pending),
+            "unconfirmed_commands": dict(self.unconfirmed),
+        }
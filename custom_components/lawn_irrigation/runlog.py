@@ -0,0 +1,338 @@
+"""Run history and long-term statistics for Lawn Irrigation System."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import struct
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import UnitOfTime
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import STORAGE_DIR, Store
+
+from .const import (
+    DOMAIN,
+    DEFAULT_RUN_LOG_SIZE,
+    REASON_FAILED,
+    REASON_PAUSED,
+    REASON_STOPPED,
+    SKIP_RAIN,
+    SKIP_RAIN_DELAY,
+    SKIP_FORECAST,
+    SKIP_WIND,
+    SKIP_FREEZE,
+    SKIP_SOIL_MOISTURE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+RUN_LOG_SAVE_DELAY = 30
+
+# Reasons stored as their index, the empty reason is a zone that ran to its end
+REASONS: Tuple[str, ...] = (
+    "",
+    REASON_STOPPED,
+    SKIP_RAIN,
+    SKIP_RAIN_DELAY,
+    SKIP_FORECAST,
+    SKIP_WIND,
+    SKIP_FREEZE,
+    SKIP_SOIL_MOISTURE,
+    REASON_FAILED,
+    REASON_PAUSED,
+)
+
+# Magic, format version, capacity and number of records ever written
+HEADER = struct.Struct("<4sHIQ")
+# Zone index, start and end in epoch seconds, planned and actual minutes, reason
+RECORD = struct.Struct("<HIIffB")
+MAGIC = b"LIRL"
+FORMAT_VERSION = 1
+
+Record = Tuple[int, int, int, float, float, int]
+
+
+class RingFile:
+    """Fixed-size records in a bounded ring buffer on disk.
+
+    Appending writes the new records in place and then the header, so a
+    write interrupted halfway leaves the previous records readable. Once
+    the buffer is full the oldest records are overwritten. Every method
+    does blocking I/O and runs in the executor.
+    """
+
+    def __init__(self, path: str, capacity: int) -> None:
+        """Initialize the file."""
+        self.path = path
+        self.capacity = capacity
+
+    def _written(self, file: Any) -> int:
+        """Return the number of records written, 0 for a missing or foreign file."""
+        header = file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return 0
+        magic, version, capacity, written = HEADER.unpack(header)
+        if magic != MAGIC or version != FORMAT_VERSION or capacity != self.capacity:
+            _LOGGER.warning("Starting a new run log, %s has another format", self.path)
+            return 0
+        return written
+
+    def append(self, records: List[bytes]) -> int:
+        """Write packed records and return the number written in total."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "r+b" if os.path.exists(self.path) else "w+b") as file:
+            written = self._written(file)
+            # Only the newest records of a batch larger than the buffer survive
+            batch = records[-self.capacity:]
+            written += len(records) - len(batch)
+            while batch:
+                slot = written % self.capacity
+                chunk = batch[: self.capacity - slot]
+                file.seek(HEADER.size + slot * RECORD.size)
+                file.write(b"".join(chunk))
+                written += len(chunk)
+                batch = batch[len(chunk):]
+            file.seek(0)
+            file.write(HEADER.pack(MAGIC, FORMAT_VERSION, self.capacity, written))
+        return written
+
+    def read(self, limit: Optional[int] = None) -> Tuple[int, List[Record]]:
+        """Return the number of records written and the kept ones, oldest first.
+
+        With a limit only the newest records are read, the file is seeked
+        to them instead of reading the whole buffer.
+        """
+        if not os.path.exists(self.path):
+            return 0, []
+        with open(self.path, "rb") as file:
+            written = self._written(file)
+            count = min(written, self.capacity)
+            if limit is not None:
+                count = min(count, limit)
+            slot = (written - count) % self.capacity
+            # The newest records may wrap around the end of the buffer
+            first = min(count, self.capacity - slot)
+            file.seek(HEADER.size + slot * RECORD.size)
+            body = file.read(first * RECORD.size)
+            if count > first:
+                file.seek(HEADER.size)
+                body += file.read((count - first) * RECORD.size)
+        return written, list(RECORD.iter_unpack(body))
+
+    def remove(self) -> None:
+        """Delete the file."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class RunLog:
+    """Append-only log of zone runs, aggregated into hourly statistics.
+
+    Every opening of a zone and every zone a skipped request would have
+    run becomes one record. Records are buffered and written in batches.
+    The minutes a zone ran are summed per hour and imported as external
+    statistics, one statistic per zone, when the recorder is loaded.
+    Zones are stored by index, the names live in a small table next to
+    the running sums.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, entry: ConfigEntry, capacity: int = DEFAULT_RUN_LOG_SIZE
+    ) -> None:
+        """Initialize the log."""
+        self.hass = hass
+        self.entry = entry
+        self._file = RingFile(
+            hass.config.path(STORAGE_DIR, f"{DOMAIN}.{entry.entry_id}.run_log"), capacity
+        )
+        self._store: Store[Dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.run_totals"
+        )
+        self._zones: List[str] = []
+        self._index: Dict[str, int] = {}
+        # Zone index -> [hour, minutes in that hour, minutes ever]
+        self._totals: Dict[int, List[float]] = {}
+        # Hourly rows not exported yet: zone index -> hour -> (minutes, sum)
+        self._rows: Dict[int, Dict[float, Tuple[float, float]]] = {}
+        self._pending: List[bytes] = []
+        self._unsub_flush: Optional[CALLBACK_TYPE] = None
+        self._lock = asyncio.Lock()
+        self.written = 0
+
+    @property
+    def capacity(self) -> int:
+        """Return the number of records kept."""
+        return self._file.capacity
+
+    async def async_load(self) -> None:
+        """Load the zone table and the running sums."""
+        try:
+            data = await self._store.async_load() or {}
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.warning("Could not load irrigation run totals: %s", err)
+            data = {}
+        self._zones = data.get("zones", [])
+        self._index = {zone_name: index for index, zone_name in enumerate(self._zones)}
+        self._totals = {int(index): total for index, total in data.get("totals", {}).items()}
+
+    def _data(self) -> Dict[str, Any]:
+        """Return the zone table and running sums to persist."""
+        return {"zones": self._zones, "totals": self._totals}
+
+    def _zone_index(self, zone_name: str) -> int:
+        """Return the index of a zone, adding it to the table."""
+        index = self._index.get(zone_name)
+        if index is None:
+            index = self._index[zone_name] = len(self._zones)
+            self._zones.append(zone_name)
+        return index
+
+    @callback
+    def async_record(
+        self,
+        zone_name: str,
+        start: datetime,
+        end: datetime,
+        planned: float,
+        reason: str = "",
+    ) -> None:
+        """Buffer a record, planned in minutes, and add the run time to the sums."""
+        index = self._zone_index(zone_name)
+        start_ts = int(start.timestamp())
+        end_ts = int(end.timestamp())
+        actual = max(end_ts - start_ts, 0) / 60
+        self._pending.append(
+            RECORD.pack(index, start_ts, end_ts, planned, actual, REASONS.index(reason))
+        )
+        if actual:
+            self._add_run_time(index, start_ts, end_ts)
+
+        if self._unsub_flush is None:
+            self._unsub_flush = async_call_later(
+                self.hass, RUN_LOG_SAVE_DELAY, self._async_flush_later
+            )
+
+    def _add_run_time(self, index: int, start: float, end: float) -> None:
+        """Split a run into the hours it covers and add it to their rows."""
+        total = self._totals.get(index)
+        while start < end:
+            hour = start - start % 3600
+            until = min(end, hour + 3600)
+            # A run from before the last hour, after a clock change, counts there
+            if total is None or hour > total[0]:
+                total = self._totals[index] = [hour, 0.0, total[2] if total else 0.0]
+            minutes = (until - start) / 60
+            total[1] += minutes
+            total[2] += minutes
+            self._rows.setdefault(index, {})[total[0]] = (total[1], total[2])
+            start = until
+
+    @callback
+    def _async_flush_later(self, _now: datetime) -> None:
+        """Write the buffered records after the save delay."""
+        self._unsub_flush = None
+        self.hass.async_create_task(self.async_flush())
+
+    async def async_flush(self) -> None:
+        """Write the buffered records and export the changed statistics."""
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+
+        rows, self._rows = self._rows, {}
+        if rows:
+            self._async_export(rows)
+
+        async with self._lock:
+            records, self._pending = self._pending, []
+            if not records:
+                return
+            try:
+                self.written = await self.hass.async_add_executor_job(
+                    self._file.append, records
+                )
+            except OSError as err:
+                _LOGGER.error("Could not write the irrigation run log: %s", err)
+            # The zone table and the sums belong to the records just written
+            await self._store.async_save(self._data())
+
+    @callback
+    def _async_export(self, rows: Dict[int, Dict[float, Tuple[float, float]]]) -> None:
+        """Import hourly run time as external statistics."""
+        if "recorder" not in self.hass.config.components:
+            return
+
+        # The recorder is an optional dependency, only import it when loaded
+        from homeassistant.components.recorder.models import (  # pylint: disable=import-outside-toplevel
+            StatisticData,
+            StatisticMetaData,
+        )
+        from homeassistant.components.recorder.statistics import (  # pylint: disable=import-outside-toplevel
+            async_add_external_statistics,
+        )
+
+        for index, hours in rows.items():
+            metadata = StatisticMetaData(
+                has_mean=False,
+                has_sum=True,
+                name=f"{self.entry.title} {self._zones[index]} run time",
+                source=DOMAIN,
+                statistic_id=self.statistic_id(index),
+                unit_of_measurement=UnitOfTime.MINUTES,
+            )
+            statistics = [
+                StatisticData(
+                    start=datetime.fromtimestamp(hour, timezone.utc),
+                    state=minutes,
+                    sum=total,
+                )
+                for hour, (minutes, total) in sorted(hours.items())
+            ]
+            async_add_external_statistics(self.hass, metadata, statistics)
+
+    def statistic_id(self, index: int) -> str:
+        """Return the external statistic id of a zone index."""
+        return f"{DOMAIN}:{self.entry.entry_id.lower()}_zone_{index}_run_time"
+
+    async def async_read(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return the kept records, oldest first, including buffered ones.
+
+        With a limit only the newest records are returned. Reading and
+        formatting run in the executor.
+        """
+        async with self._lock:
+            written, records = await self.hass.async_add_executor_job(
+                self._read, limit, list(self._pending), list(self._zones)
+            )
+        self.written = written
+        return records
+
+    def _read(
+        self, limit: Optional[int], pending: List[bytes], zones: List[str]
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """Read and format the newest records, run in the executor."""
+        count = self.capacity if limit is None else min(limit, self.capacity)
+        pending = pending[-count:] if count else []
+        written, records = self._file.read(count - len(pending))
+        records.extend(RECORD.unpack(record) for record in pending)
+        return written, [
+            {
+                "zone": zones[index] if index < len(zones) else index,
+                "start": datetime.fromtimestamp(start, timezone.utc).isoformat(),
+                "end": datetime.fromtimestamp(end, timezone.utc).isoformat(),
+                "planned": round(planned, 2),
+                "actual": round(actual, 2),
+                "reason": REASONS[reason] if reason < len(REASONS) else reason,
+            }
+            for index, start, end, planned, actual, reason in records
+        ]
+
+    async def async_remove(self) -> None:
+        """Remove the log and the sums from disk."""
+        await self.hass.async_add_executor_job(self._file.remove)
+        await self._store.async_remove()
@@ -0,0 +1,282 @@
+"""Priority run queue for Lawn Irrigation System."""
+from __future__ import annotations
+
+import heapq
+from collections import OrderedDict, deque
+from datetime import datetime
+from itertools import count
+from typing import Any, Deque, Dict, Iterator, List, Optional, Set, Tuple
+from uuid import uuid4
+
+from .const import RUN_STATUS_CANCELLED, RUN_STATUS_COMPLETED, RUN_STATUS_QUEUED
+
+# Finished runs kept so their status can still be looked up
+RUN_HISTORY_SIZE = 50
+
+
+class ProgramRun:
+    """A requested program: an ordered set of zones with durations."""
+
+    __slots__ = (
+        "run_id",
+        "name",
+        "priority",
+        "seq",
+        "order",
+        "durations",
+        "_dropped",
+        "ready_at",
+        "total_duration",
+        "created",
+        "finished",
+        "status",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        priority: int,
+        created: datetime,
+        run_id: Optional[str] = None,
+        status: str = RUN_STATUS_QUEUED,
+    ) -> None:
+        """Initialize the run."""
+        self.run_id = run_id or uuid4().hex
+        self.name = name
+        self.priority = priority
+        self.seq = 0
+        # Zone order plus the pending duration of each zone in minutes. A
+        # zone taken over by another run is dropped from durations only and
+        # skipped lazily when it reaches the head of order, or removed from
+        # order when it is queued in this run again.
+        self.order: Deque[str] = deque()
+        self.durations: Dict[str, float] = {}
+        self._dropped: Set[str] = set()
+        # Zones soaking between cycles and when they may run again
+        self.ready_at: Dict[str, datetime] = {}
+        self.total_duration: float = 0
+        self.created = created
+        self.finished = False
+        self.status = status
+
+    def __len__(self) -> int:
+        """Return the number of pending zones."""
+        return len(self.durations)
+
+    def __contains__(self, zone_name: object) -> bool:
+        """Return if a zone is pending in this run."""
+        return zone_name in self.durations
+
+    def append(
+        self, zone_name: str, duration: float, ready_at: Optional[datetime] = None
+    ) -> None:
+        """Queue a zone at the end of the run, optionally not before a time."""
+        self._revive(zone_name)
+        self.order.append(zone_name)
+        self.durations[zone_name] = duration
+        if ready_at is not None:
+            self.ready_at[zone_name] = ready_at
+
+    def push_front(self, zone_name: str, duration: float) -> None:
+        """Queue a zone to run next, e.g. the rest of a preempted zone."""
+        if zone_name in self.durations:
+            # The zone still has cycles queued, add to them
+            self.durations[zone_name] += duration
+            return
+        self._revive(zone_name)
+        self.order.appendleft(zone_name)
+        self.durations[zone_name] = duration
+
+    def discard(self, zone_name: str) -> Optional[float]:
+        """Drop a pending zone and return its duration."""
+        self.ready_at.pop(zone_name, None)
+        duration = self.durations.pop(zone_name, None)
+        if duration is not None:
+            self._dropped.add(zone_name)
+        return duration
+
+    def _revive(self, zone_name: str) -> None:
+        """Remove the stale place in order of a dropped zone that is queued again."""
+        if zone_name in self._dropped:
+            self._dropped.discard(zone_name)
+            self.order.remove(zone_name)
+
+    def peek(self, now: Optional[datetime] = None) -> Optional[str]:
+        """Return the next pending zone, the next one done soaking if now is given."""
+        while self.order and self.order[0] not in self.durations:
+            self._dropped.discard(self.order.popleft())
+        if now is None or not self.ready_at:
+            return self.order[0] if self.order else None
+
+        for zone_name in self.order:
+            if zone_name not in self.durations:
+                continue
+            ready_at = self.ready_at.get(zone_name)
+            if ready_at is None or ready_at <= now:
+                return zone_name
+        return None
+
+    def next_ready(self) -> Optional[datetime]:
+        """Return when the first soaking zone may run again."""
+        return min(self.ready_at.values(), default=None)
+
+    def pop(self, now: Optional[datetime] = None) -> Optional[Tuple[str, float]]:
+        """Take the next pending zone."""
+        zone_name = self.peek(now)
+        if zone_name is None:
+            return None
+        if self.order[0] == zone_name:
+            self.order.popleft()
+        else:
+            self.order.remove(zone_name)
+        self.ready_at.pop(zone_name, None)
+        return zone_name, self.durations.pop(zone_name)
+
+    def items(self) -> List[Tuple[str, float]]:
+        """Return the pending zones in order."""
+        return [
+            (zone_name, self.durations[zone_name])
+            for zone_name in self.order
+            if zone_name in self.durations
+        ]
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the run as JSON-serializable data."""
+        return {
+            "run_id": self.run_id,
+            "name": self.name,
+            "priority": self.priority,
+            "status": self.status,
+            "total_duration": self.total_duration,
+            "created": self.created.isoformat(),
+            "queue": self.items(),
+            "ready_at": {
+                zone_name: ready_at.isoformat() for zone_name, ready_at in self.ready_at.items()
+            },
+        }
+
+
+class RunQueue:
+    """Program runs ordered by priority, then by arrival."""
+
+    def __init__(self) -> None:
+        """Initialize the queue."""
+        self._heap: List[Tuple[int, int, ProgramRun]] = []
+        self._runs: Dict[str, ProgramRun] = {}
+        # Which run a pending zone belongs to, for request merging
+        self._pending: Dict[str, ProgramRun] = {}
+        self._history: OrderedDict[str, ProgramRun] = OrderedDict()
+        self._seq = count()
+
+    def __len__(self) -> int:
+        """Return the number of queued runs."""
+        return len(self._runs)
+
+    def __iter__(self) -> Iterator[ProgramRun]:
+        """Iterate over the runs in priority order."""
+        return iter(sorted(self._runs.values(), key=lambda run: (-run.priority, run.seq)))
+
+    def get(self, run_id: str) -> Optional[ProgramRun]:
+        """Return a run by id."""
+        return self._runs.get(run_id)
+
+    def lookup(self, run_id: str) -> Optional[ProgramRun]:
+        """Return a queued or recently finished run by id."""
+        run = self._runs.get(run_id)
+        return run if run is not None else self._history.get(run_id)
+
+    def owner(self, zone_name: str) -> Optional[ProgramRun]:
+        """Return the run a zone is pending in."""
+        return self._pending.get(zone_name)
+
+    @property
+    def zone_count(self) -> int:
+        """Return the number of pending zones over all runs."""
+        return len(self._pending)
+
+    def push(self, run: ProgramRun) -> None:
+        """Add a run to the queue."""
+        run.seq = next(self._seq)
+        self._runs[run.run_id] = run
+        heapq.heappush(self._heap, (-run.priority, run.seq, run))
+        for zone_name in run.durations:
+            self._pending[zone_name] = run
+
+    def peek(self) -> Optional[ProgramRun]:
+        """Return the run with the highest priority."""
+        while self._heap and self._heap[0][2].finished:
+            heapq.heappop(self._heap)
+        return self._heap[0][2] if self._heap else None
+
+    def pop_zone(
+        self, run: ProgramRun, now: Optional[datetime] = None
+    ) -> Optional[Tuple[str, float]]:
+        """Take the next pending zone of a run."""
+        item = run.pop(now)
+        if item is not None and self._pending.get(item[0]) is run:
+            del self._pending[item[0]]
+        return item
+
+    def requeue(
+        self, run: ProgramRun, zone_name: str, duration: float, ready_at: datetime
+    ) -> None:
+        """Queue the remaining cycles of a zone once it has soaked."""
+        run.append(zone_name, duration, ready_at)
+        self._pending[zone_name] = run
+
+    def push_front(self, run: ProgramRun, zone_name: str, duration: float) -> None:
+        """Requeue a zone at the head of a run."""
+        run.push_front(zone_name, duration)
+        self._pending[zone_name] = run
+
+    def discard_zone(self, zone_name: str) -> None:
+        """Drop a pending zone from whichever run it is in."""
+        owner = self._pending.pop(zone_name, None)
+        if owner is not None:
+            owner.discard(zone_name)
+
+    def merge(self, run: ProgramRun, zone_name: str, duration: float) -> bool:
+        """Add a zone to a new run unless another run already has it pending.
+
+        A zone pending in a run of higher priority is left as it is. A zone
+        pending in a run of equal priority keeps its place there but takes
+        the duration of the newer request. A zone pending in a lower-priority
+        run moves to the new run with the new duration. The total duration
+        of the run the zone was pending in follows. Returns if the zone was
+        added to the new run.
+        """
+        owner = self._pending.get(zone_name)
+        if owner is None or owner is run:
+            run.append(zone_name, duration)
+            return True
+
+        if owner.priority > run.priority:
+            return False
+
+        if owner.priority == run.priority:
+            owner.total_duration += duration - owner.durations[zone_name]
+            owner.durations[zone_name] = duration
+            return False
+
+        ready_at = owner.ready_at.get(zone_name)
+        owner.total_duration -= owner.discard(zone_name) or 0
+        run.append(zone_name, duration, ready_at)
+        return True
+
+    def finish(self, run: ProgramRun, completed: bool) -> None:
+        """Remove a run and keep it in the history."""
+        run.finished = True
+        run.status = RUN_STATUS_COMPLETED if completed else RUN_STATUS_CANCELLED
+        self._runs.pop(run.run_id, None)
+        for zone_name in list(run.durations):
+            if self._pending.get(zone_name) is run:
+                del self._pending[zone_name]
+        self._history[run.run_id] = run
+        if len(self._history) > RUN_HISTORY_SIZE:
+            self._history.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove every run."""
+        for run in list(self._runs.values()):
+            self.finish(run, False)
+        self._heap.clear()
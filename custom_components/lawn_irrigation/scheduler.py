@@ -0,0 +1,161 @@
+"""Deadline scheduler for Lawn Irrigation System."""
+from __future__ import annotations
+
+import heapq
+import logging
+from datetime import datetime
+from itertools import count
+from typing import Callable, List, Optional
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.util.dt import utcnow
+
+from .const import DATA_SCHEDULER
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ScheduledDeadline:
+    """Handle for an action scheduled at an absolute UTC deadline."""
+
+    __slots__ = ("when", "seq", "action", "cancelled", "_scheduler")
+
+    def __init__(
+        self,
+        scheduler: DeadlineScheduler,
+        when: datetime,
+        seq: int,
+        action: Callable[[datetime], None],
+    ) -> None:
+        """Initialize the handle."""
+        self._scheduler = scheduler
+        self.when = when
+        self.seq = seq
+        self.action = action
+        self.cancelled = False
+
+    def __lt__(self, other: ScheduledDeadline) -> bool:
+        """Order handles by deadline, then by insertion."""
+        return (self.when, self.seq) < (other.when, other.seq)
+
+    @callback
+    def cancel(self) -> None:
+        """Cancel the scheduled action."""
+        self._scheduler.async_cancel(self)
+
+
+class DeadlineScheduler:
+    """Run actions at absolute UTC deadlines from a single timer.
+
+    Deadlines are kept in a min-heap. Only the earliest one is tracked with
+    async_track_point_in_utc_time, so any number of pending deadlines costs
+    one timer. Cancelled handles are dropped lazily when they reach the top
+    of the heap, or all at once when they make up most of it.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the scheduler."""
+        self.hass = hass
+        self._heap: List[ScheduledDeadline] = []
+        self._seq = count()
+        self._cancelled = 0
+        self._armed_at: Optional[datetime] = None
+        self._unsub_timer: Optional[CALLBACK_TYPE] = None
+
+    def __len__(self) -> int:
+        """Return the number of pending deadlines."""
+        return len(self._heap) - self._cancelled
+
+    @callback
+    def async_schedule(
+        self, when: datetime, action: Callable[[datetime], None]
+    ) -> ScheduledDeadline:
+        """Schedule a callback to run at an absolute UTC deadline."""
+        handle = ScheduledDeadline(self, when, next(self._seq), action)
+        heapq.heappush(self._heap, handle)
+        if self._armed_at is None or when < self._armed_at:
+            self._async_arm()
+        return handle
+
+    @callback
+    def async_cancel(self, handle: ScheduledDeadline) -> None:
+        """Cancel a scheduled deadline."""
+        if handle.cancelled:
+            return
+        handle.cancelled = True
+        self._cancelled += 1
+
+        if self._cancelled > len(self._heap) // 2:
+            self._heap = [entry for entry in self._heap if not entry.cancelled]
+            heapq.heapify(self._heap)
+            self._cancelled = 0
+
+        if handle.when == self._armed_at:
+            self._async_arm()
+
+    @callback
+    def _async_arm(self) -> None:
+        """Track the earliest pending deadline."""
+        while self._heap and self._heap[0].cancelled:
+            heapq.heappop(self._heap)
+            self._cancelled -= 1
+
+        if self._unsub_timer:
+            self._unsub_timer()
+            self._unsub_timer = None
+        self._armed_at = None
+
+        if not self._heap:
+            return
+
+        self._armed_at = self._heap[0].when
+        self._unsub_timer = async_track_point_in_utc_time(
+            self.hass, self._async_fire, self._armed_at
+        )
+
+    @callback
+    def _async_fire(self, _now: datetime) -> None:
+        """Run every action whose deadline has passed."""
+        self._unsub_timer = None
+        self._armed_at = None
+        # Compare against the wall clock rather than the tracked point so a
+        # clock change never runs a deadline early.
+        now = utcnow()
+        due: List[ScheduledDeadline] = []
+        while self._heap and (self._heap[0].cancelled or self._heap[0].when <= now):
+            handle = heapq.heappop(self._heap)
+            if handle.cancelled:
+                self._cancelled -= 1
+                continue
+            # Mark as done so a late cancel() is a no-op.
+            handle.cancelled = True
+            due.append(handle)
+
+        for handle in due:
+            try:
+                handle.action(now)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error running scheduled irrigation action")
+
+        if self._armed_at is None:
+            self._async_arm()
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Drop all pending deadlines."""
+        if self._unsub_timer:
+            self._unsub_timer()
+            self._unsub_timer = None
+        self._armed_at = None
+        self._heap.clear()
+        self._cancelled = 0
+
+
+@callback
+def async_get_scheduler(hass: HomeAssistant) -> DeadlineScheduler:
+    """Return the scheduler shared by all config entries."""
+    scheduler: Optional[DeadlineScheduler] = hass.data.get(DATA_SCHEDULER)
+    if scheduler is None:
+        scheduler = hass.data[DATA_SCHEDULER] = DeadlineScheduler(hass)
+    return scheduler
@@ -0,0 +1,408 @@
+"""Recurring schedules for Lawn Irrigation System."""
+from __future__ import annotations
+
+import heapq
+import logging
+import re
+from datetime import date, datetime, time, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import yaml
+
+from homeassistant.const import SUN_EVENT_SUNRISE, SUN_EVENT_SUNSET
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.sun import get_astral_event_date
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_SCHEDULE_NAME,
+    CONF_SCHEDULE_ZONES,
+    CONF_SCHEDULE_DAYS,
+    CONF_SCHEDULE_INTERVAL,
+    CONF_SCHEDULE_START_DATE,
+    CONF_SCHEDULE_TIMES,
+    CONF_SCHEDULE_SCALE,
+    CONF_SCHEDULE_PRIORITY,
+    DEFAULT_PRIORITY,
+)
+from .scheduler import DeadlineScheduler, ScheduledDeadline
+
+_LOGGER = logging.getLogger(__name__)
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+# Days searched for the next start, a full year of seasons and then some
+SEARCH_DAYS = 400
+
+# Keys of a schedule, in the order they are formatted
+SCHEDULE_FIELDS = (
+    CONF_SCHEDULE_NAME,
+    CONF_SCHEDULE_ZONES,
+    CONF_SCHEDULE_DAYS,
+    CONF_SCHEDULE_INTERVAL,
+    CONF_SCHEDULE_START_DATE,
+    CONF_SCHEDULE_TIMES,
+    CONF_SCHEDULE_SCALE,
+    CONF_SCHEDULE_PRIORITY,
+)
+
+# "06:30", or sunrise or sunset with an optional offset in minutes or h:mm
+START_PATTERN = re.compile(
+    r"(?:(?P<event>sunrise|sunset)\s*(?:(?P<sign>[+-])\s*(?P<offset>\d{1,3})(?::(?P<offset_minutes>\d{2}))?)?"
+    r"|(?P<hour>\d{1,2}):(?P<minute>\d{2}))"
+)
+
+
+def _as_list(value: Any) -> List[Any]:
+    """Wrap a single value in a list."""
+    return value if isinstance(value, list) else [value]
+
+
+def _weekday(value: Any) -> int:
+    """Return the weekday index of a day name."""
+    day = str(value).strip().lower()[:3]
+    if day not in WEEKDAYS:
+        raise ValueError(f"invalid day: {value}")
+    return WEEKDAYS.index(day)
+
+
+def _start(value: Any) -> str:
+    """Validate a start time and return it in its stored form."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        # YAML reads an unquoted 6:30 as sexagesimal minutes
+        value = f"{value // 60}:{value % 60:02d}"
+    text = str(value).strip().lower()
+    match = START_PATTERN.fullmatch(text)
+    if match is None:
+        raise ValueError(f"invalid start time: {value}")
+    if match["hour"] is not None:
+        hour, minute = int(match["hour"]), int(match["minute"])
+        if hour > 23 or minute > 59:
+            raise ValueError(f"invalid start time: {value}")
+        return f"{hour:02d}:{minute:02d}"
+    return text.replace(" ", "")
+
+
+def _start_date(value: Any) -> str:
+    """Validate a date and return it as an ISO string."""
+    if isinstance(value, date):
+        return value.isoformat()
+    try:
+        return date.fromisoformat(str(value)).isoformat()
+    except ValueError as err:
+        raise ValueError(f"invalid start_date: {value}") from err
+
+
+def _number(value: Any, key: str, low: float, high: float) -> float:
+    """Return a number within bounds."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError) as err:
+        raise ValueError(f"invalid {key}: {value}") from err
+    if not low <= number <= high:
+        raise ValueError(f"{key} must be between {low:g} and {high:g}: {value}")
+    return number
+
+
+def _schedule(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate one schedule and return its config entry data."""
+    name = str(row.get(CONF_SCHEDULE_NAME) or "").strip()
+    if not name:
+        raise ValueError(f"name is required: {row}")
+    unknown = set(row) - set(SCHEDULE_FIELDS)
+    if unknown:
+        raise ValueError(f"{name}: unknown keys: {', '.join(sorted(map(str, unknown)))}")
+    if not row.get(CONF_SCHEDULE_TIMES):
+        raise ValueError(f"{name}: times are required")
+
+    try:
+        config: Dict[str, Any] = {
+            CONF_SCHEDULE_NAME: name,
+            CONF_SCHEDULE_ZONES: [
+                str(zone_name).strip()
+                for zone_name in _as_list(row.get(CONF_SCHEDULE_ZONES) or [])
+            ],
+            CONF_SCHEDULE_INTERVAL: int(
+                _number(row.get(CONF_SCHEDULE_INTERVAL, 1), CONF_SCHEDULE_INTERVAL, 1, 365)
+            ),
+            CONF_SCHEDULE_TIMES: [_start(value) for value in _as_list(row[CONF_SCHEDULE_TIMES])],
+            CONF_SCHEDULE_PRIORITY: int(
+                _number(
+                    row.get(CONF_SCHEDULE_PRIORITY, DEFAULT_PRIORITY),
+                    CONF_SCHEDULE_PRIORITY,
+                    -100,
+                    100,
+                )
+            ),
+        }
+        if row.get(CONF_SCHEDULE_DAYS) is not None:
+            config[CONF_SCHEDULE_DAYS] = sorted(
+                {_weekday(day) for day in _as_list(row[CONF_SCHEDULE_DAYS])}
+            )
+        if row.get(CONF_SCHEDULE_START_DATE) is not None:
+            config[CONF_SCHEDULE_START_DATE] = _start_date(row[CONF_SCHEDULE_START_DATE])
+        if row.get(CONF_SCHEDULE_SCALE) is not None:
+            scale = _as_list(row[CONF_SCHEDULE_SCALE])
+            if len(scale) != 12:
+                raise ValueError("scale needs 12 monthly percentages")
+            config[CONF_SCHEDULE_SCALE] = [
+                _number(percent, CONF_SCHEDULE_SCALE, 0, 300) for percent in scale
+            ]
+    except ValueError as err:
+        raise ValueError(f"{name}: {err}") from err
+    return config
+
+
+def parse_schedules(text: str) -> List[Dict[str, Any]]:
+    """Parse a YAML list of schedules into config entry data.
+
+    Every schedule needs a name and start times. Days are stored as
+    weekday indexes and an interval without a start date counts from
+    today. Raises ValueError on bad input.
+    """
+    text = text.strip()
+    if not text:
+        return []
+
+    try:
+        loaded = yaml.safe_load(text)
+    except yaml.YAMLError as err:
+        raise ValueError(f"invalid YAML: {err}") from err
+    if not isinstance(loaded, list) or not all(isinstance(item, dict) for item in loaded):
+        raise ValueError("YAML must be a list of schedules")
+
+    schedules = []
+    names = set()
+    for row in loaded:
+        config = _schedule(row)
+        if config[CONF_SCHEDULE_NAME] in names:
+            raise ValueError(f"listed more than once: {config[CONF_SCHEDULE_NAME]}")
+        names.add(config[CONF_SCHEDULE_NAME])
+        if config[CONF_SCHEDULE_INTERVAL] > 1 and CONF_SCHEDULE_START_DATE not in config:
+            config[CONF_SCHEDULE_START_DATE] = dt_util.now().date().isoformat()
+        schedules.append(config)
+    return schedules
+
+
+def format_schedules(schedules: List[Dict[str, Any]]) -> str:
+    """Format schedule config entry data as YAML that parse_schedules reads back."""
+    if not schedules:
+        return ""
+    defaults = {CONF_SCHEDULE_ZONES: [], CONF_SCHEDULE_INTERVAL: 1, CONF_SCHEDULE_PRIORITY: DEFAULT_PRIORITY}
+    rows = []
+    for config in schedules:
+        # Leave out what is the default, in field order
+        row = {
+            key: config[key]
+            for key in SCHEDULE_FIELDS
+            if key in config and config[key] != defaults.get(key, ...)
+        }
+        if CONF_SCHEDULE_DAYS in row:
+            row[CONF_SCHEDULE_DAYS] = [WEEKDAYS[day] for day in row[CONF_SCHEDULE_DAYS]]
+        rows.append(row)
+    return yaml.safe_dump(rows, sort_keys=False, allow_unicode=True)
+
+
+class StartTime:
+    """A time of day, or an offset from sunrise or sunset."""
+
+    __slots__ = ("event", "offset", "clock")
+
+    def __init__(self, text: str) -> None:
+        """Initialize from the stored form."""
+        match = START_PATTERN.fullmatch(text)
+        if match is None:
+            raise ValueError(f"invalid start time: {text}")
+        self.event: Optional[str] = None
+        self.offset = timedelta(0)
+        self.clock: Optional[time] = None
+        if match["hour"] is not None:
+            self.clock = time(int(match["hour"]), int(match["minute"]))
+            return
+
+        self.event = SUN_EVENT_SUNRISE if match["event"] == "sunrise" else SUN_EVENT_SUNSET
+        if match["offset"] is not None:
+            if match["offset_minutes"] is not None:
+                offset = timedelta(
+                    hours=int(match["offset"]), minutes=int(match["offset_minutes"])
+                )
+            else:
+                offset = timedelta(minutes=int(match["offset"]))
+            self.offset = -offset if match["sign"] == "-" else offset
+
+    def on(self, hass: HomeAssistant, day: date) -> Optional[datetime]:
+        """Return the start on a local day in UTC, None without a sunrise or sunset."""
+        if self.clock is not None:
+            local = datetime.combine(day, self.clock, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+            return dt_util.as_utc(local)
+        when = get_astral_event_date(hass, self.event, day)
+        return when + self.offset if when is not None else None
+
+
+class Schedule:
+    """A program that runs on recurring days at set times."""
+
+    __slots__ = ("index", "name", "zones", "priority", "days", "interval", "anchor", "starts", "scale")
+
+    def __init__(self, index: int, config: Dict[str, Any]) -> None:
+        """Initialize from config entry data."""
+        self.index = index
+        self.name: str = config[CONF_SCHEDULE_NAME]
+        self.zones: List[str] = config.get(CONF_SCHEDULE_ZONES, [])
+        self.priority: int = config.get(CONF_SCHEDULE_PRIORITY, DEFAULT_PRIORITY)
+        days = config.get(CONF_SCHEDULE_DAYS)
+        self.days = frozenset(days) if days is not None else None
+        self.interval: int = config.get(CONF_SCHEDULE_INTERVAL, 1)
+        start_date = config.get(CONF_SCHEDULE_START_DATE)
+        self.anchor = date.fromisoformat(start_date) if start_date else date(1970, 1, 1)
+        self.starts = [StartTime(text) for text in config[CONF_SCHEDULE_TIMES]]
+        self.scale: Optional[List[float]] = config.get(CONF_SCHEDULE_SCALE)
+
+    def scale_on(self, day: date) -> float:
+        """Return the factor the zone durations are scaled by on a day."""
+        return self.scale[day.month - 1] / 100 if self.scale else 1.0
+
+    def runs_on(self, day: date) -> bool:
+        """Return if the schedule runs on a local day."""
+        if self.days is not None and day.weekday() not in self.days:
+            return False
+        if self.interval > 1 and (day - self.anchor).days % self.interval:
+            return False
+        return self.scale_on(day) > 0
+
+    def starts_on(self, hass: HomeAssistant, day: date) -> List[datetime]:
+        """Return the starts on a local day, in order."""
+        return sorted(
+            when for when in (start.on(hass, day) for start in self.starts) if when is not None
+        )
+
+    def next_start(self, hass: HomeAssistant, after: datetime) -> Optional[datetime]:
+        """Return the first start after a time, None if there is none within a year."""
+        # Start a day early, a sunrise offset may reach into the next day
+        first = dt_util.as_local(after).date() - timedelta(days=1)
+        for offset in range(SEARCH_DAYS):
+            day = first + timedelta(days=offset)
+            if not self.runs_on(day):
+                continue
+            for when in self.starts_on(hass, day):
+                if when > after:
+                    return when
+        return None
+
+    def starts_between(
+        self, hass: HomeAssistant, start: datetime, end: datetime
+    ) -> List[datetime]:
+        """Return the starts in a time range."""
+        starts = []
+        day = dt_util.as_local(start).date() - timedelta(days=1)
+        last = dt_util.as_local(end).date() + timedelta(days=1)
+        while day <= last:
+            if self.runs_on(day):
+                starts.extend(when for when in self.starts_on(hass, day) if start <= when < end)
+            day += timedelta(days=1)
+        return starts
+
+
+class ScheduleEngine:
+    """Start schedules from one timer over a sorted index of their next starts.
+
+    The next start of every schedule is kept in a min-heap and only the
+    earliest one has a deadline on the shared scheduler, so any number of
+    schedules costs one timer and starting one is a heap pop and push.
+    Starts missed while Home Assistant was down are not made up.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        scheduler: DeadlineScheduler,
+        on_start: Callable[[Schedule, datetime], None],
+    ) -> None:
+        """Initialize the engine."""
+        self.hass = hass
+        self._scheduler = scheduler
+        self._on_start = on_start
+        self.schedules: List[Schedule] = []
+        self._heap: List[Tuple[datetime, int]] = []
+        self._timer: Optional[ScheduledDeadline] = None
+        # The last schedule that started and when
+        self.last_start: Optional[Tuple[datetime, Schedule]] = None
+
+    @callback
+    def async_load(self, schedules_config: List[Dict[str, Any]]) -> None:
+        """Compile the schedules and arm the timer for the first start."""
+        self.schedules = [
+            Schedule(index, config) for index, config in enumerate(schedules_config)
+        ]
+        self.last_start = None
+        now = dt_util.utcnow()
+        self._heap = []
+        for schedule in self.schedules:
+            when = schedule.next_start(self.hass, now)
+            if when is not None:
+                self._heap.append((when, schedule.index))
+        heapq.heapify(self._heap)
+        self._async_arm()
+
+    @callback
+    def _async_arm(self) -> None:
+        """Track the earliest start."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._heap:
+            self._timer = self._scheduler.async_schedule(self._heap[0][0], self._async_fire)
+
+    @callback
+    def _async_fire(self, now: datetime) -> None:
+        """Start every schedule that is due and index its next start."""
+        self._timer = None
+        while self._heap and self._heap[0][0] <= now:
+            when, index = self._heap[0]
+            schedule = self.schedules[index]
+            following = schedule.next_start(self.hass, max(when, now))
+            if following is not None:
+                heapq.heapreplace(self._heap, (following, index))
+            else:
+                heapq.heappop(self._heap)
+            self.last_start = (when, schedule)
+            try:
+                self._on_start(schedule, when)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error starting schedule %s", schedule.name)
+        self._async_arm()
+
+    @property
+    def next_start(self) -> Optional[Tuple[datetime, Schedule]]:
+        """Return the next start and its schedule."""
+        if not self._heap:
+            return None
+        when, index = self._heap[0]
+        return when, self.schedules[index]
+
+    def starts_between(self, start: datetime, end: datetime) -> List[Tuple[datetime, Schedule]]:
+        """Return the starts of every schedule in a time range, in order."""
+        starts = [
+            (when, schedule)
+            for schedule in self.schedules
+            for when in schedule.starts_between(self.hass, start, end)
+        ]
+        starts.sort(key=lambda item: (item[0], item[1].index))
+        return starts
+
+    @callback
+    def async_stop(self) -> None:
+        """Cancel the timer."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._heap.clear()
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the next start of every schedule for diagnostics."""
+        upcoming = {index: when for when, index in self._heap}
+        return {
+            schedule.name: upcoming[schedule.index].isoformat()
+            if schedule.index in upcoming
+            else None
+            for schedule in self.schedules
+        }
@@ -1,142 +1,324 @@
-“”“Sensor platform for Lawn Irrigation System.”””
-from **future** import annotations
+"""Sensor platform for Lawn Irrigation System."""
+from __future__ import annotations
 
 import logging
-from typing import Any
+from datetime import datetime
+from typing import Any, List, Optional
 
 from homeassistant.components.sensor import SensorEntity, SensorDeviceClass
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EntityCategory
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.util.dt import utcnow
 
-from .const import DOMAIN, STATE_RUNNING, STATE_IDLE
-from .coordinator import LawnIrrigationCoordinator
+from .const import DOMAIN, SIGNAL_ZONES_ADDED, STATE_RUNNING
+from .coordinator import LawnIrrigationCoordinator, slot_context
+from .zones import Zone
+
+_LOGGER = logging.getLogger(__name__)
+
+# Metrics histograms with an optional sensor for their 95th percentile
+LATENCY_SENSORS = {
+    "actuation": "Valve Response",
+    "service_call": "Valve Service Call",
+    "scheduler_lag": "Scheduler Lag",
+    "update_cycle": "Update Cycle",
+}
 
-_LOGGER = logging.getLogger(**name**)
 
 async def async_setup_entry(
-hass: HomeAssistant,
-config_entry: ConfigEntry,
-async_add_entities: AddEntitiesCallback,
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
 ) -> None:
-“”“Set up the lawn irrigation sensor platform.”””
-coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    """Set up the lawn irrigation sensor platform."""
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+    entities = [
+        LawnIrrigationStateSensor(coordinator),
+        LawnIrrigationRemainingTimeSensor(coordinator),
+        LawnIrrigationActiveZonesSensor(coordinator),
+        LawnIrrigationProgramEtaSensor(coordinator),
+        LawnIrrigationDetailSensor(coordinator),
+    ]
+
+    # Latency diagnostics, disabled by default
+    for key, label in LATENCY_SENSORS.items():
+        entities.append(LawnIrrigationLatencySensor(coordinator, key, label))
 
-```
-entities = [
-    LawnIrrigationStateSensor(coordinator),
-    LawnIrrigationRemainingTimeSensor(coordinator),
-    LawnIrrigationActiveZonesSensor(coordinator),
-]
+    # Per-zone timeline sensors, disabled by default
+    for zone in coordinator.zones:
+        entities.extend(_zone_sensors(coordinator, zone))
+
+    # The coordinator data is already seeded, no update before adding
+    async_add_entities(entities)
+
+    @callback
+    def async_add_zones(zones: List[Zone]) -> None:
+        """Add sensors for zones added in the options."""
+        async_add_entities(
+            [sensor for zone in zones for sensor in _zone_sensors(coordinator, zone)]
+        )
+
+    config_entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_ZONES_ADDED.format(config_entry.entry_id), async_add_zones
+        )
+    )
+
+
+def _zone_sensors(coordinator: LawnIrrigationCoordinator, zone: Zone) -> List[SensorEntity]:
+    """Return the sensors of one zone."""
+    return [
+        LawnIrrigationZoneRemainingTimeSensor(coordinator, zone),
+        LawnIrrigationZoneNextStartSensor(coordinator, zone),
+    ]
 
-async_add_entities(entities, True)
-```
 
 class LawnIrrigationStateSensor(CoordinatorEntity, SensorEntity):
-“”“Sensor for irrigation system state.”””
-
-```
-def __init__(self, coordinator: LawnIrrigationCoordinator) -> None:
-    """Initialize the sensor."""
-    super().__init__(coordinator)
-    self._attr_name = f"{coordinator.entry.title} State"
-    self._attr_unique_id = f"{coordinator.entry.entry_id}_state"
-    self._attr_icon = "mdi:information-outline"
-
-@property
-def native_value(self) -> str:
-    """Return the state of the sensor."""
-    return self.coordinator.system_state
-
-@property
-def extra_state_attributes(self) -> dict[str, Any]:
-    """Return additional state attributes."""
-    attrs = {
-        "current_zone": self.coordinator.current_zone,
-        "current_program": self.coordinator.current_program,
-        "active_zones_count": len(self.coordinator.active_zones),
-        "queue_length": len(self.coordinator.zone_queue),
-    }
-    
-    if self.coordinator.start_time:
-        attrs["start_time"] = self.coordinator.start_time.isoformat()
-    
-    return attrs
-```
+    """Sensor for irrigation system state."""
+
+    _unrecorded_attributes = frozenset({"active_zones_count", "queue_length", "start_time"})
+
+    def __init__(self, coordinator: LawnIrrigationCoordinator) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._attr_name = f"{coordinator.entry.title} State"
+        self._attr_unique_id = f"{coordinator.entry.entry_id}_state"
+        self._attr_icon = "mdi:information-outline"
+
+    @property
+    def native_value(self) -> str:
+        """Return the state of the sensor."""
+        return self.coordinator.system_state
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return additional state attributes."""
+        attrs = {
+            "current_zone": self.coordinator.current_zone,
+            "current_program": self.coordinator.current_program,
+            "active_zones_count": len(self.coordinator.active_zones),
+            "queue_length": self.coordinator.queue_length,
+            "skip_reasons": self.coordinator.skip_engine.reasons,
+        }
+
+        if self.coordinator.start_time:
+            attrs["start_time"] = self.coordinator.start_time.isoformat()
+
+        return attrs
+
 
 class LawnIrrigationRemainingTimeSensor(CoordinatorEntity, SensorEntity):
-“”“Sensor for remaining irrigation time.”””
-
-```
-def __init__(self, coordinator: LawnIrrigationCoordinator) -> None:
-    """Initialize the sensor."""
-    super().__init__(coordinator)
-    self._attr_name = f"{coordinator.entry.title} Remaining Time"
-    self._attr_unique_id = f"{coordinator.entry.entry_id}_remaining_time"
-    self._attr_icon = "mdi:timer-outline"
-    self._attr_native_unit_of_measurement = "min"
-    self._attr_device_class = SensorDeviceClass.DURATION
-
-@property
-def native_value(self) -> int:
-    """Return the remaining time in minutes."""
-    if self.coordinator.system_state != STATE_RUNNING:
-        return 0
-    
-    # Calculate remaining time based on queue and current zone
-    remaining = sum(duration for _, duration in self.coordinator.zone_queue)
-    
-    # Add remaining time from current zone if any
-    if self.coordinator.current_zone and self.coordinator.start_time:
-        elapsed = (utcnow() - self.coordinator.start_time).total_seconds() / 60
-        current_zone_duration = next(
-            (zone["zone_duration"] for zone in self.coordinator.zones 
-             if zone["zone_name"] == self.coordinator.current_zone), 0
-        )
-        remaining += max(0, current_zone_duration - elapsed)
-    
-    return int(remaining)
-
-@property
-def extra_state_attributes(self) -> dict[str, Any]:
-    """Return additional state attributes."""
-    attrs = {
-        "total_duration": self.coordinator.total_duration,
-        "system_state": self.coordinator.system_state,
-    }
-    
-    if self.coordinator.start_time:
-        elapsed = (utcnow() - self.coordinator.start_time).total_seconds() / 60
-        attrs["elapsed_time"] = int(elapsed)
-    
-    return attrs
-```
+    """Sensor for remaining irrigation time."""
+
+    _unrecorded_attributes = frozenset({"elapsed_time", "system_state", "total_duration"})
+
+    def __init__(self, coordinator: LawnIrrigationCoordinator) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._attr_name = f"{coordinator.entry.title} Remaining Time"
+        self._attr_unique_id = f"{coordinator.entry.entry_id}_remaining_time"
+        self._attr_icon = "mdi:timer-outline"
+        self._attr_native_unit_of_measurement = "min"
+        self._attr_device_class = SensorDeviceClass.DURATION
+
+    @property
+    def native_value(self) -> int:
+        """Return the remaining time in minutes."""
+        end = self.coordinator.timeline.end
+        if self.coordinator.system_state != STATE_RUNNING or end is None:
+            return 0
+
+        return max(0, int((end - utcnow()).total_seconds() / 60))
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return additional state attributes."""
+        attrs = {
+            "total_duration": self.coordinator.total_duration,
+            "system_state": self.coordinator.system_state,
+        }
+
+        if self.coordinator.start_time:
+            elapsed = (utcnow() - self.coordinator.start_time).total_seconds() / 60
+            attrs["elapsed_time"] = int(elapsed)
+
+        return attrs
+
 
 class LawnIrrigationActiveZonesSensor(CoordinatorEntity, SensorEntity):
-“”“Sensor for active zones count.”””
-
-```
-def __init__(self, coordinator: LawnIrrigationCoordinator) -> None:
-    """Initialize the sensor."""
-    super().__init__(coordinator)
-    self._attr_name = f"{coordinator.entry.title} Active Zones"
-    self._attr_unique_id = f"{coordinator.entry.entry_id}_active_zones"
-    self._attr_icon = "mdi:sprinkler-variant"
-
-@property
-def native_value(self) -> int:
-    """Return the number of active zones."""
-    return len(self.coordinator.active_zones)
-
-@property
-def extra_state_attributes(self) -> dict[str, Any]:
-    """Return additional state attributes."""
-    return {
-        "active_zone_entities": self.coordinator.active_zones,
-        "current_zone": self.coordinator.current_zone,
-        "total_zones": len(self.coordinator.zones),
-        "queue_length": len(self.coordinator.zone_queue),
-    }
-```
+    """Sensor for active zones count."""
+
+    _unrecorded_attributes = frozenset({"active_zone_ids", "queue_length", "total_zones"})
+
+    def __init__(self, coordinator: LawnIrrigationCoordinator) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._attr_name = f"{coordinator.entry.title} Active Zones"
+        self._attr_unique_id = f"{coordinator.entry.entry_id}_active_zones"
+        self._attr_icon = "mdi:sprinkler-variant"
+
+    @property
+    def native_value(self) -> int:
+        """Return the number of active zones."""
+        return len(self.coordinator.active_zones)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return additional state attributes."""
+        zones = self.coordinator.zones
+        return {
+            "active_zone_ids": sorted(
+                zone.index
+                for zone in map(zones.get_by_entity, self.coordinator.active_zones)
+                if zone is not None
+            ),
+            "current_zone": self.coordinator.current_zone,
+            "total_zones": len(zones),
+            "queue_length": self.coordinator.queue_length,
+        }
+
+
+class LawnIrrigationProgramEtaSensor(CoordinatorEntity, SensorEntity):
+    """Sensor for the planned end of everything that is queued."""
+
+    def __init__(self, coordinator: LawnIrrigationCoordinator) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._attr_name = f"{coordinator.entry.title} Program End"
+        self._attr_unique_id = f"{coordinator.entry.entry_id}_program_end"
+        self._attr_icon = "mdi:timer-check-outline"
+        self._attr_device_class = SensorDeviceClass.TIMESTAMP
+
+    @property
+    def native_value(self) -> Optional[datetime]:
+        """Return when the last queued zone is planned to close."""
+        return self.coordinator.timeline.end
+
+
+class LawnIrrigationZoneRemainingTimeSensor(CoordinatorEntity, SensorEntity):
+    """Sensor for the remaining run time of a zone."""
+
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, coordinator: LawnIrrigationCoordinator, zone: Zone) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, context=slot_context(zone.name))
+        self._zone_name = zone.name
+        self._attr_name = f"{coordinator.entry.title} {zone.name} Remaining Time"
+        self._attr_unique_id = f"{coordinator.entry.entry_id}_zone_{zone.name}_remaining_time"
+        self._attr_icon = "mdi:timer-sand"
+        self._attr_native_unit_of_measurement = "min"
+        self._attr_device_class = SensorDeviceClass.DURATION
+
+    @property
+    def native_value(self) -> int:
+        """Return the minutes until the zone is planned to close."""
+        slot = self.coordinator.timeline.get(self._zone_name)
+        if slot is None:
+            return 0
+
+        now = utcnow()
+        return max(0, int((slot.end - max(now, slot.start)).total_seconds() / 60))
+
+
+class LawnIrrigationZoneNextStartSensor(CoordinatorEntity, SensorEntity):
+    """Sensor for the planned start of a zone."""
+
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, coordinator: LawnIrrigationCoordinator, zone: Zone) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, context=slot_context(zone.name))
+        self._zone_name = zone.name
+        self._attr_name = f"{coordinator.entry.title} {zone.name} Next Start"
+        self._attr_unique_id = f"{coordinator.entry.entry_id}_zone_{zone.name}_next_start"
+        self._attr_icon = "mdi:calendar-clock"
+        self._attr_device_class = SensorDeviceClass.TIMESTAMP
+
+    @property
+    def native_value(self) -> Optional[datetime]:
+        """Return when the zone is planned to start."""
+        slot = self.coordinator.timeline.get(self._zone_name)
+        return slot.start if slot is not None else None
+
+
+class LawnIrrigationDetailSensor(CoordinatorEntity, SensorEntity):
+    """Opt-in sensor with the full run lists, kept out of the recorder."""
+
+    _attr_entity_registry_enabled_default = False
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _unrecorded_attributes = frozenset({"active_zones", "runs", "timeline"})
+
+    def __init__(self, coordinator: LawnIrrigationCoordinator) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._attr_name = f"{coordinator.entry.title} Details"
+        self._attr_unique_id = f"{coordinator.entry.entry_id}_details"
+        self._attr_icon = "mdi:format-list-bulleted"
+
+    @property
+    def native_value(self) -> int:
+        """Return the number of queued zones."""
+        return self.coordinator.queue_length
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the full lists of active zones, queued runs and the plan."""
+        return {
+            "active_zones": list(self.coordinator.active_zones),
+            "runs": [
+                {
+                    "run_id": run.run_id,
+                    "name": run.name,
+                    "priority": run.priority,
+                    "zones": [zone_name for zone_name, _ in run.items()],
+                }
+                for run in self.coordinator.runs
+            ],
+            "timeline": {
+                zone_name: [slot.start.isoformat(), slot.end.isoformat()]
+                for zone_name, slot in self.coordinator.timeline.slots.items()
+            },
+        }
+
+
+class LawnIrrigationLatencySensor(CoordinatorEntity, SensorEntity):
+    """Diagnostic sensor for the 95th percentile of a latency histogram."""
+
+    _attr_entity_registry_enabled_default = False
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _unrecorded_attributes = frozenset({"count", "mean", "max", "slowest_zones"})
+
+    def __init__(self, coordinator: LawnIrrigationCoordinator, key: str, label: str) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._key = key
+        self._attr_name = f"{coordinator.entry.title} {label}"
+        self._attr_unique_id = f"{coordinator.entry.entry_id}_latency_{key}"
+        self._attr_icon = "mdi:timer-sand"
+        self._attr_native_unit_of_measurement = "s"
+        self._attr_device_class = SensorDeviceClass.DURATION
+
+    @property
+    def native_value(self) -> Optional[float]:
+        """Return the 95th percentile in seconds."""
+        value = getattr(self.coordinator.metrics, self._key).percentile(95)
+        return round(value, 3) if value is not None else None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the sample count, mean and maximum."""
+        histogram = getattr(self.coordinator.metrics, self._key)
+        attrs = {
+            "count": histogram.count,
+            "mean": histogram.mean,
+            "max": histogram.max,
+        }
+        if self._key == "actuation":
+            attrs["slowest_zones"] = self.coordinator.metrics.slowest_zones()
+        return attrs
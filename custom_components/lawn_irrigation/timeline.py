@@ -0,0 +1,197 @@
+"""Planned zone timeline for Lawn Irrigation System."""
+from __future__ import annotations
+
+import heapq
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from .runqueue import ProgramRun
+from .zones import Zone, ZoneRegistry
+
+# A zone that starts within this margin of its planned time keeps the plan
+PLAN_TOLERANCE = timedelta(seconds=5)
+
+
+class ZoneSlot:
+    """Planned start and end of a zone run."""
+
+    __slots__ = ("start", "end")
+
+    def __init__(self, start: datetime, end: datetime) -> None:
+        """Initialize the slot."""
+        self.start = start
+        self.end = end
+
+
+class Timeline:
+    """Absolute start and end times of every running and queued zone.
+
+    The plan is rebuilt when the queue or the running set deviates from
+    it and adjusted in place on ordinary transitions, so reading the ETA
+    of the program or of a zone is a dict lookup.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the timeline."""
+        self.slots: Dict[str, ZoneSlot] = {}
+        self.end: Optional[datetime] = None
+
+    def get(self, zone_name: str) -> Optional[ZoneSlot]:
+        """Return the planned slot of a zone."""
+        return self.slots.get(zone_name)
+
+    def clear(self) -> None:
+        """Drop the plan."""
+        self.slots.clear()
+        self.end = None
+
+    def rebuild(
+        self,
+        now: datetime,
+        running_zones: Mapping[str, datetime],
+        runs: Iterable[ProgramRun],
+        zones: ZoneRegistry,
+        max_concurrent_zones: int,
+        max_flow: float,
+        overlap: timedelta = timedelta(0),
+    ) -> Set[str]:
+        """Plan the queued runs after the zones that are running now.
+
+        This mirrors the queue processor: runs go in priority order, and
+        within a run the first zone that is done soaking starts whenever
+        it fits the flow and concurrency budget, so the soak gaps of one
+        zone fill with cycles of the others. A run only starts once the
+        previous one has finished. running_zones maps each open zone to
+        the end of its current cycle. A zone frees its place in the budget
+        overlap before it closes, so the next one opens while it still
+        runs. Returns the zones whose slot changed.
+        """
+        previous = self.slots
+        self.slots = {}
+
+        active: List[Tuple[datetime, float]] = []
+        active_flow = 0.0
+        for name, deadline in running_zones.items():
+            zone = zones.get(name)
+            flow = zone.flow if zone is not None else 0
+            heapq.heappush(active, (deadline - overlap, flow))
+            active_flow += flow
+            old = previous.get(name)
+            self.slots[name] = ZoneSlot(old.start if old is not None else now, deadline)
+
+        def fits(zone: Zone) -> bool:
+            if not active:
+                return True
+            if max_concurrent_zones and len(active) >= max_concurrent_zones:
+                return False
+            if max_flow and active_flow + zone.flow > max_flow:
+                return False
+            return True
+
+        cursor = now
+        run_end = max(running_zones.values(), default=now)
+        for run in runs:
+            # Cycles in queue order: the zones as queued, cycles that wait
+            # for their soak to end, and those that are done soaking. Each
+            # carries its position so the first ready one in queue order is
+            # picked, without scanning the run for every cycle.
+            queued: Deque[Tuple[int, Zone, float]] = deque()
+            waiting: List[Tuple[datetime, int, Zone, float]] = []
+            ready: List[Tuple[int, Zone, float]] = []
+            seq = 0
+            for zone_name, duration in run.items():
+                zone = zones.get(zone_name)
+                if zone is None:
+                    continue
+                ready_at = run.ready_at.get(zone_name)
+                if ready_at is not None and ready_at > cursor:
+                    heapq.heappush(waiting, (ready_at, seq, zone, duration))
+                else:
+                    queued.append((seq, zone, duration))
+                seq += 1
+
+            while queued or waiting or ready:
+                while waiting and waiting[0][0] <= cursor:
+                    _, order, zone, duration = heapq.heappop(waiting)
+                    heapq.heappush(ready, (order, zone, duration))
+
+                if ready and (not queued or ready[0][0] < queued[0][0]):
+                    source = ready
+                elif queued:
+                    source = queued
+                else:
+                    source = None
+
+                if source is None or not fits(source[0][1]):
+                    if source is not None and not waiting:
+                        # Nothing is soaking, wait for zones to close
+                        zone = source[0][1]
+                        while not fits(zone):
+                            end, flow = heapq.heappop(active)
+                            active_flow -= flow
+                            cursor = max(cursor, end)
+                    else:
+                        # Move on to the next zone closing or the next soak ending
+                        if active and (not waiting or active[0][0] < waiting[0][0]):
+                            cursor = max(cursor, active[0][0])
+                        else:
+                            cursor = max(cursor, waiting[0][0])
+                        while active and active[0][0] <= cursor:
+                            active_flow -= heapq.heappop(active)[1]
+                        continue
+
+                _, zone, duration = queued.popleft() if source is queued else heapq.heappop(ready)
+                length = zone.cycle_length(duration) if zone.cycle else duration
+                end = cursor + timedelta(minutes=length)
+                heapq.heappush(active, (max(cursor, end - overlap), zone.flow))
+                active_flow += zone.flow
+                slot = self.slots.get(zone.name)
+                self.slots[zone.name] = ZoneSlot(slot.start if slot else cursor, end)
+                run_end = max(run_end, end)
+                if length < duration:
+                    heapq.heappush(
+                        waiting, (end + timedelta(minutes=zone.soak), seq, zone, duration - length)
+                    )
+                    seq += 1
+
+            # The next run starts once every zone of this one has closed
+            cursor = max(cursor, run_end)
+            while active and active[0][0] <= cursor:
+                active_flow -= heapq.heappop(active)[1]
+
+        self.end = max((slot.end for slot in self.slots.values()), default=None)
+
+        changed = previous.keys() ^ self.slots.keys()
+        for name, slot in self.slots.items():
+            old = previous.get(name)
+            if old is not None and (old.start, old.end) != (slot.start, slot.end):
+                changed.add(name)
+        return changed
+
+    def start_zone(
+        self, zone_name: str, start: datetime, end: datetime, more_cycles: bool = False
+    ) -> bool:
+        """Record the actual start of a zone cycle.
+
+        Returns if the zone started as planned, so later slots still hold.
+        A zone with more cycles to go keeps its planned final end.
+        """
+        planned = self.slots.get(zone_name)
+        as_planned = planned is not None and abs(planned.start - start) <= PLAN_TOLERANCE
+        if as_planned and more_cycles:
+            as_planned = end <= planned.end + PLAN_TOLERANCE
+            end = planned.end
+        elif as_planned:
+            as_planned = abs(planned.end - end) <= PLAN_TOLERANCE
+
+        self.slots[zone_name] = ZoneSlot(start, end)
+        if self.end is None or end > self.end:
+            self.end = end
+        return as_planned
+
+    def finish_zone(self, zone_name: str) -> None:
+        """Drop the slot of a zone that closed."""
+        self.slots.pop(zone_name, None)
+        if not self.slots:
+            self.end = None
@@ -0,0 +1,103 @@
+"""Decision trace for Lawn Irrigation System."""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from time import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Events stored as their index
+ENQUEUE = 0
+MERGE = 1
+DEQUEUE = 2
+GATE = 3
+SENT = 4
+CONFIRMED = 5
+TIMEOUT = 6
+TIMER = 7
+CANCEL = 8
+PAUSE = 9
+RESUME = 10
+SCHEDULE = 11
+
+EVENTS: Tuple[str, ...] = (
+    "enqueue",
+    "merge",
+    "dequeue",
+    "gate",
+    "sent",
+    "confirmed",
+    "timeout",
+    "timer",
+    "cancel",
+    "pause",
+    "resume",
+    "schedule",
+)
+
+# Epoch seconds, event, what it concerns and one detail value
+Record = Tuple[float, int, Any, Any]
+
+
+class DecisionTrace:
+    """Recent coordinator decisions in a bounded ring buffer.
+
+    A record is a tuple of references to values the caller already has,
+    so recording is one clock read and a list store. Nothing is formatted
+    until the trace is read. Once the buffer is full the oldest records
+    are overwritten, a capacity of 0 turns the trace off.
+    """
+
+    __slots__ = ("capacity", "written", "_records")
+
+    def __init__(self, capacity: int = 0) -> None:
+        """Initialize the trace."""
+        self.capacity = capacity
+        self.written = 0
+        self._records: List[Optional[Record]] = [None] * capacity
+
+    def record(self, event: int, subject: Any = None, detail: Any = None) -> None:
+        """Add a decision."""
+        if self.capacity:
+            self._records[self.written % self.capacity] = (time(), event, subject, detail)
+            self.written += 1
+
+    def resize(self, capacity: int) -> None:
+        """Change the number of records kept, keeping the newest ones."""
+        if capacity == self.capacity:
+            return
+        records = self.records()[-capacity:] if capacity else []
+        self.capacity = capacity
+        self.written = len(records)
+        self._records = records + [None] * (capacity - len(records))
+
+    def clear(self) -> None:
+        """Drop every record."""
+        self.written = 0
+        self._records = [None] * self.capacity
+
+    def records(self) -> List[Record]:
+        """Return the kept records, oldest first."""
+        if self.written <= self.capacity:
+            return self._records[: self.written]
+        split = self.written % self.capacity
+        return self._records[split:] + self._records[:split]
+
+    def as_list(self) -> List[Dict[str, Any]]:
+        """Return the kept records, oldest first, for diagnostics and services."""
+        return [
+            {
+                "time": datetime.fromtimestamp(when, timezone.utc).isoformat(),
+                "event": EVENTS[event],
+                "subject": list(subject) if isinstance(subject, tuple) else subject,
+                "detail": detail,
+            }
+            for when, event, subject, detail in self.records()
+        ]
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the trace for diagnostics."""
+        return {
+            "written": self.written,
+            "capacity": self.capacity,
+            "records": self.as_list(),
+        }
@@ -0,0 +1,209 @@
+"""Zone registry for Lawn Irrigation System."""
+from __future__ import annotations
+
+import csv
+import io
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import yaml
+
+from .const import (
+    CONF_ZONE_NAME,
+    CONF_ZONE_ENTITY,
+    CONF_ZONE_DURATION,
+    CONF_ZONE_FLOW,
+    CONF_ZONE_CYCLE,
+    CONF_ZONE_SOAK,
+    DEFAULT_DURATION,
+)
+
+
+class Zone:
+    """A configured irrigation zone."""
+
+    __slots__ = ("index", "name", "entity_id", "duration", "flow", "cycle", "soak")
+
+    def __init__(
+        self,
+        index: int,
+        name: str,
+        entity_id: str,
+        duration: int,
+        flow: float = 0,
+        cycle: float = 0,
+        soak: float = 0,
+    ) -> None:
+        """Initialize the zone."""
+        self.index = index
+        self.name = name
+        self.entity_id = entity_id
+        self.duration = duration
+        self.flow = flow
+        # Cycle and soak: water at most cycle minutes at a time and let the
+        # soil soak for at least soak minutes in between. 0 runs in one go.
+        self.cycle = cycle
+        self.soak = soak
+
+    def cycle_length(self, duration: float) -> float:
+        """Return how long the next cycle of a pending duration runs."""
+        if self.cycle and duration > self.cycle:
+            return self.cycle
+        return duration
+
+    @classmethod
+    def from_config(
+        cls, index: int, config: Dict[str, Any], default_duration: int = DEFAULT_DURATION
+    ) -> Zone:
+        """Create a zone from its config entry data."""
+        return cls(
+            index,
+            config[CONF_ZONE_NAME],
+            config[CONF_ZONE_ENTITY],
+            config.get(CONF_ZONE_DURATION, default_duration),
+            config.get(CONF_ZONE_FLOW, 0),
+            config.get(CONF_ZONE_CYCLE, 0),
+            config.get(CONF_ZONE_SOAK, 0),
+        )
+
+    def __repr__(self) -> str:
+        """Return the representation of the zone."""
+        return f"Zone({self.index}, {self.name!r}, {self.entity_id!r})"
+
+
+class ZoneRegistry:
+    """Zones indexed by name, entity_id and position."""
+
+    __slots__ = ("_zones", "_by_name", "_by_entity")
+
+    def __init__(
+        self,
+        zones_config: List[Dict[str, Any]],
+        default_duration: int = DEFAULT_DURATION,
+        previous: Optional[ZoneRegistry] = None,
+    ) -> None:
+        """Initialize the registry from config entry data.
+
+        Zones that keep their name keep the Zone object of the previous
+        registry, updated in place, so entities holding it stay current.
+        """
+        self._zones: List[Zone] = []
+        for index, config in enumerate(zones_config):
+            zone = Zone.from_config(index, config, default_duration)
+            existing = previous.get(zone.name) if previous is not None else None
+            if existing is not None:
+                for attr in Zone.__slots__:
+                    setattr(existing, attr, getattr(zone, attr))
+                zone = existing
+            self._zones.append(zone)
+        self._by_name: Dict[str, Zone] = {zone.name: zone for zone in self._zones}
+        self._by_entity: Dict[str, Zone] = {zone.entity_id: zone for zone in self._zones}
+
+    def __iter__(self) -> Iterator[Zone]:
+        """Iterate over the zones in configured order."""
+        return iter(self._zones)
+
+    def __len__(self) -> int:
+        """Return the number of zones."""
+        return len(self._zones)
+
+    def __getitem__(self, index: int) -> Zone:
+        """Return the zone at a position."""
+        return self._zones[index]
+
+    def __contains__(self, name: object) -> bool:
+        """Return if a zone with this name exists."""
+        return name in self._by_name
+
+    def get(self, name: str) -> Optional[Zone]:
+        """Return a zone by name."""
+        return self._by_name.get(name)
+
+    def get_by_entity(self, entity_id: str) -> Optional[Zone]:
+        """Return a zone by its switch entity_id."""
+        return self._by_entity.get(entity_id)
+
+    @property
+    def names(self) -> List[str]:
+        """Return the zone names in configured order."""
+        return [zone.name for zone in self._zones]
+
+    @property
+    def entity_ids(self) -> List[str]:
+        """Return the zone switch entity_ids in configured order."""
+        return [zone.entity_id for zone in self._zones]
+
+
+# A YAML list starts with a "- " item or a flow sequence, a CSV name
+# that starts with "-" does not
+YAML_LIST = re.compile(r"\[|-(\s|$)")
+
+# Columns of a zone definition, in CSV order, and their short YAML keys
+ZONE_FIELDS = (
+    ("name", CONF_ZONE_NAME, str),
+    ("entity", CONF_ZONE_ENTITY, str),
+    ("duration", CONF_ZONE_DURATION, int),
+    ("flow", CONF_ZONE_FLOW, float),
+    ("cycle", CONF_ZONE_CYCLE, int),
+    ("soak", CONF_ZONE_SOAK, int),
+)
+
+
+def parse_zones(text: str, default_duration: int = DEFAULT_DURATION) -> List[Dict[str, Any]]:
+    """Parse pasted zone definitions into config entry data.
+
+    Either a YAML list of mappings with the keys name, entity, duration,
+    flow, cycle and soak, or one CSV line per zone in that column order.
+    Only name and entity are required. Raises ValueError on bad input.
+    """
+    text = text.strip()
+    if not text:
+        return []
+
+    rows: List[Dict[str, Any]] = []
+    if YAML_LIST.match(text):
+        try:
+            loaded = yaml.safe_load(text)
+        except yaml.YAMLError as err:
+            raise ValueError(f"invalid YAML: {err}") from err
+        if not isinstance(loaded, list) or not all(isinstance(item, dict) for item in loaded):
+            raise ValueError("YAML must be a list of zones")
+        rows = loaded
+    else:
+        lines = [line for line in text.splitlines() if line.strip() and not line.lstrip().startswith("#")]
+        for values in csv.reader(lines, skipinitialspace=True):
+            if len(values) > len(ZONE_FIELDS):
+                raise ValueError(f"too many columns: {', '.join(values)}")
+            rows.append({key: value for (key, _, _), value in zip(ZONE_FIELDS, values) if value != ""})
+
+    zones = []
+    for row in rows:
+        config: Dict[str, Any] = {CONF_ZONE_DURATION: default_duration}
+        for key, conf_key, convert in ZONE_FIELDS:
+            value = row.get(key, row.get(conf_key))
+            if value is None:
+                continue
+            try:
+                config[conf_key] = convert(value).strip() if convert is str else convert(value)
+            except (TypeError, ValueError) as err:
+                raise ValueError(f"invalid {key}: {value}") from err
+        if not config.get(CONF_ZONE_NAME) or not config.get(CONF_ZONE_ENTITY):
+            raise ValueError(f"name and entity are required: {row}")
+        zones.append(config)
+    return zones
+
+
+def format_zones(zones_config: Iterable[Dict[str, Any]]) -> str:
+    """Format zone config entry data as CSV lines that parse_zones reads back.
+
+    Names and entities are always quoted, so commas, quotes and a leading
+    "-" or "#" in a name survive the round trip.
+    """
+    output = io.StringIO()
+    writer = csv.writer(output, quoting=csv.QUOTE_NONNUMERIC, lineterminator="\n")
+    for config in zones_config:
+        writer.writerow([
+            config.get(conf_key, DEFAULT_DURATION if conf_key == CONF_ZONE_DURATION else 0)
+            for _, conf_key, _ in ZONE_FIELDS
+        ])
+    return output.getvalue().rstrip("\n")
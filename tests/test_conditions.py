@@ -0,0 +1,174 @@
+"""Skip condition tests on the simulated clock of the benchmark fake core."""
+from __future__ import annotations
+
+import asyncio
+import importlib
+from datetime import timedelta
+from typing import Any, List, Optional
+
+import pytest
+
+from benchmarks.fake_core import utcnow
+from benchmarks.harness import PACKAGE, Bench
+
+RAIN = "binary_sensor.rain"
+WIND = "sensor.wind"
+OPTIONS = {
+    "enable_weather_check": True,
+    "rain_sensor_entity": RAIN,
+    "rain_delay": 2,
+    "wind_sensor_entity": WIND,
+    "max_wind_speed": 20,
+}
+
+
+def _engine(bench: Bench, changes: List[int]) -> Any:
+    """Return a started skip engine on the bench that counts its decision changes."""
+    conditions = importlib.import_module(f"{PACKAGE}.conditions")
+    engine = conditions.SkipEngine(bench.hass, OPTIONS, lambda: changes.append(1))
+    engine.async_start()
+    return engine
+
+
+def _update(bench: Bench, engine: Any, entity_id: str, state: Optional[str]) -> None:
+    """Set or remove the state of an input and pass it to the engine."""
+    if state is None:
+        bench.hass.states._states.pop(entity_id, None)
+    else:
+        bench.set_state(entity_id, state)
+    engine.async_update(entity_id, bench.hass.states.get(entity_id))
+
+
+@pytest.mark.parametrize(
+    ("readings", "blocked"),
+    [
+        # Past the limit, then back under it but within the 3 unit band
+        (["25", "18"], True),
+        # Back under the limit by more than the band
+        (["25", "16"], False),
+        # The band only holds once blocked
+        (["18", "19"], False),
+        # Blocked again once the reading is past the limit
+        (["25", "16", "21"], True),
+    ],
+)
+def test_threshold_hysteresis(readings: List[str], blocked: bool) -> None:
+    """A blocked threshold only clears once the reading is past the hysteresis band."""
+    bench = Bench(1)
+    try:
+        changes: List[int] = []
+        engine = _engine(bench, changes)
+        for reading in readings:
+            _update(bench, engine, WIND, reading)
+        assert ("wind" in engine.reasons) is blocked
+        assert engine.allowed is not blocked
+    finally:
+        bench.close()
+
+
+@pytest.mark.parametrize("reading", ["unavailable", "unknown", "calm", None])
+def test_unreadable_input_never_blocks(reading: Optional[str]) -> None:
+    """An input that is not a number, or has no state, does not skip irrigation."""
+    bench = Bench(1)
+    try:
+        changes: List[int] = []
+        engine = _engine(bench, changes)
+        _update(bench, engine, WIND, "25")
+        assert not engine.allowed
+        _update(bench, engine, WIND, reading)
+        assert engine.allowed
+        assert changes == [1, 1]
+    finally:
+        bench.close()
+
+
+def test_rain_stop_starts_delay() -> None:
+    """Irrigation stays skipped for the rain delay after the rain sensor clears."""
+    bench = Bench(1)
+
+    async def main() -> Any:
+        changes: List[int] = []
+        engine = _engine(bench, changes)
+        _update(bench, engine, RAIN, "on")
+        assert engine.reasons == ["rain"]
+        _update(bench, engine, RAIN, "off")
+        assert engine.reasons == ["rain_delay"]
+        assert engine.delay_until == utcnow() + timedelta(hours=2)
+
+        await asyncio.sleep(2 * 3600 - 60)
+        assert not engine.allowed
+        await asyncio.sleep(120)
+        return engine
+
+    try:
+        engine = bench.loop.run_until_complete(main())
+        assert engine.allowed
+        assert engine.delay_until is None
+    finally:
+        bench.close()
+
+
+def test_auto_resume_after_gate_clears() -> None:
+    """A program the rain paused resumes by itself once the rain delay is over."""
+    bench = Bench(2, duration=10, options={**OPTIONS, "max_concurrent_zones": 1})
+
+    async def main() -> Any:
+        bench.set_state(RAIN, "off")
+        bench.set_state(WIND, "5")
+        await bench.async_setup()
+        coordinator = bench.coordinator
+        await coordinator.async_start_irrigation()
+        await asyncio.sleep(60)
+
+        bench.set_state(RAIN, "on")
+        await bench.hass.async_block_till_done()
+        assert coordinator.system_state == "paused"
+        assert coordinator.auto_resume
+        assert not coordinator.zone_timers
+
+        bench.set_state(RAIN, "off")
+        await asyncio.sleep(3600)
+        assert coordinator.system_state == "paused"
+        await asyncio.sleep(3600 + 60)
+        return coordinator
+
+    try:
+        coordinator = bench.loop.run_until_complete(main())
+        assert coordinator.system_state == "running"
+        assert not coordinator.auto_resume
+        assert list(coordinator.zone_timers) == ["Zone 0"]
+    finally:
+        bench.close()
+
+
+@pytest.mark.parametrize(
+    ("options", "delay"),
+    [
+        ({}, timedelta(hours=2)),
+        ({"rain_delay": 1}, timedelta(hours=1)),
+        ({"rain_sensor_entity": None}, None),
+        ({"enable_weather_check": False}, None),
+    ],
+)
+def test_carry_over(options: dict, delay: Optional[timedelta]) -> None:
+    """A rebuilt engine keeps the blocked inputs and the rain delay that still apply."""
+    bench = Bench(1)
+    try:
+        changes: List[int] = []
+        previous = _engine(bench, changes)
+        _update(bench, previous, RAIN, "on")
+        _update(bench, previous, WIND, "25")
+        _update(bench, previous, RAIN, "off")
+        _update(bench, previous, WIND, "18")
+        stopped = utcnow()
+        previous.async_stop()
+
+        conditions = importlib.import_module(f"{PACKAGE}.conditions")
+        engine = conditions.SkipEngine(bench.hass, {**OPTIONS, **options}, lambda: changes.append(1))
+        engine.async_carry_over(previous)
+        engine.async_start()
+        weather = options.get("enable_weather_check", True)
+        assert engine.delay_until == (stopped + delay if delay else None)
+        assert ("wind" in engine.reasons) is weather
+    finally:
+        bench.close()
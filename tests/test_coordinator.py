@@ -0,0 +1,344 @@
+"""Coordinator tests on the simulated clock of the benchmark fake core."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import pytest
+
+from benchmarks.harness import Bench
+
+PUMP = "switch.pump"
+# Seconds a valve takes to follow a command
+SLOW_VALVE = 2.0
+
+
+def _open_valves(bench: Bench) -> List[str]:
+    """Return the valves and the pump that are on."""
+    entity_ids = [PUMP] + [zone["zone_entity"] for zone in bench.zones]
+    return [entity_id for entity_id in entity_ids if bench.hass.states.get(entity_id).state == "on"]
+
+
+def _run(bench: Bench, scenario: Callable[[Any], Awaitable[None]]) -> Any:
+    """Set up the bench, run a scenario against the coordinator and return it."""
+
+    async def main() -> Any:
+        await bench.async_setup()
+        await scenario(bench.coordinator)
+        # Long enough for every retry, short of the zone duration
+        await asyncio.sleep(60)
+        return bench.coordinator
+
+    return bench.loop.run_until_complete(main())
+
+
+def _slow_bench(max_concurrent_zones: int) -> Bench:
+    """Return a bench with slow valves and a pump."""
+    bench = Bench(
+        4,
+        duration=10,
+        latency=SLOW_VALVE,
+        options={"max_concurrent_zones": max_concurrent_zones, "master_valve": PUMP},
+    )
+    bench.set_state(PUMP, "off")
+    return bench
+
+
+@pytest.mark.parametrize("max_concurrent_zones", [1, 3])
+def test_stop_during_slow_turn_on(max_concurrent_zones: int) -> None:
+    """A stop while valves are still opening closes them and ends the run."""
+    bench = _slow_bench(max_concurrent_zones)
+
+    async def scenario(coordinator: Any) -> None:
+        await coordinator.async_start_irrigation()
+        await asyncio.sleep(SLOW_VALVE / 2)
+        await coordinator.async_stop_irrigation()
+
+    try:
+        coordinator = _run(bench, scenario)
+        assert coordinator.system_state == "idle"
+        assert not coordinator.zone_timers
+        assert not coordinator.active_zones
+        assert _open_valves(bench) == []
+        # An aborted command is not a valve failure
+        assert coordinator.actuator.as_dict() == {"failures": {}, "tripped": {}}
+    finally:
+        bench.close()
+
+
+def test_cancel_during_slow_turn_on() -> None:
+    """Cancelling a run while its valve opens closes it, the next run goes on."""
+    bench = _slow_bench(1)
+
+    async def scenario(coordinator: Any) -> None:
+        run_id = await coordinator.async_start_irrigation()
+        await asyncio.sleep(SLOW_VALVE / 2)
+        await coordinator.async_cancel_run(run_id)
+        assert coordinator.async_get_run_status(run_id)["status"] == "cancelled"
+
+    try:
+        coordinator = _run(bench, scenario)
+        assert not coordinator.zone_timers
+        assert _open_valves(bench) == []
+        assert coordinator.actuator.as_dict() == {"failures": {}, "tripped": {}}
+    finally:
+        bench.close()
+
+
+async def _async_restart(
+    bench: Bench, missing: Optional[str] = None, downtime: float = 0
+) -> Tuple[Any, Dict[str, datetime]]:
+    """Restart the coordinator a minute into a program, optionally with one valve not loaded yet.
+
+    Returns the new coordinator and the zone deadlines from before the restart.
+    """
+    await bench.async_setup()
+    previous = bench.coordinator
+    await previous.async_start_irrigation()
+    await asyncio.sleep(60)
+    await previous.async_flush_journal()
+    deadlines = {zone_name: timer.when for zone_name, timer in previous.zone_timers.items()}
+    previous.async_stop()
+    await bench.hass.async_block_till_done()
+    await asyncio.sleep(downtime)
+
+    if missing is not None:
+        del bench.hass.states._states[missing]
+    calls = bench.hass.services.calls
+    coordinator = bench.coordinator = bench.coordinator_module.LawnIrrigationCoordinator(
+        bench.hass, bench.entry
+    )
+    coordinator.async_seed()
+    coordinator.async_setup_listeners()
+    await coordinator.async_restore()
+    assert bench.hass.services.calls == calls
+    assert not coordinator.zone_timers
+
+    await coordinator.async_started(bench.hass)
+    await bench.hass.async_block_till_done()
+    return coordinator, deadlines
+
+
+def test_restore_reopens_zones_once_started() -> None:
+    """Setup restores the journal without switching, valves loading late still reopen."""
+    bench = Bench(3, duration=10, options={"max_concurrent_zones": 2})
+
+    async def main() -> Any:
+        coordinator, deadlines = await _async_restart(bench, "switch.valve_1")
+        assert list(coordinator.zone_timers) == ["Zone 0"]
+
+        bench.set_state("switch.valve_1", "off")
+        await bench.hass.async_block_till_done()
+        # The deadlines from before the restart are kept
+        assert {
+            zone_name: timer.when for zone_name, timer in coordinator.zone_timers.items()
+        } == deadlines
+        return coordinator
+
+    try:
+        coordinator = bench.loop.run_until_complete(main())
+        assert coordinator.actuator.as_dict() == {"failures": {}, "tripped": {}}
+    finally:
+        bench.close()
+
+
+@pytest.mark.parametrize(("downtime", "restored"), [(5 * 60, True), (40 * 60, False)])
+def test_restore_drops_overdue_runs(downtime: float, restored: bool) -> None:
+    """Queued zones that should have finished while we were down are not watered late."""
+    bench = Bench(3, duration=10, options={"max_concurrent_zones": 1})
+
+    async def main() -> Any:
+        coordinator, _deadlines = await _async_restart(bench, downtime=downtime)
+        await asyncio.sleep(60)
+        return coordinator
+
+    try:
+        coordinator = bench.loop.run_until_complete(main())
+        assert bool(coordinator.zone_timers) is restored
+        assert (coordinator.system_state == "idle") is not restored
+        valves = [zone["zone_entity"] for zone in bench.zones]
+        assert [entity_id for entity_id in valves if bench.hass.states.get(entity_id).state == "on"] == (
+            ["switch.valve_0"] if restored else []
+        )
+    finally:
+        bench.close()
+
+
+@pytest.mark.parametrize("moved", [False, True])
+def test_options_change_drops_restored_zone(moved: bool) -> None:
+    """A restored zone removed or moved before its valve showed up does not block the queue."""
+    bench = Bench(3, duration=10, options={"max_concurrent_zones": 2})
+
+    async def main() -> Any:
+        coordinator, _deadlines = await _async_restart(bench, "switch.valve_1")
+        zones = [zone for zone in bench.zones if zone["zone_name"] != "Zone 1"]
+        if moved:
+            zones.append({**bench.zones[1], "zone_entity": "switch.valve_2"})
+            zones = [zone for zone in zones if zone["zone_name"] != "Zone 2"]
+        bench.entry.data = {**bench.entry.data, "zones": zones}
+        await coordinator.async_apply_entry()
+        assert ("Zone 1" in coordinator.zone_timers) is moved
+
+        await coordinator.async_run_program("again", ["Zone 0"])
+        await asyncio.sleep(60)
+        return coordinator
+
+    try:
+        coordinator = bench.loop.run_until_complete(main())
+        assert sorted(coordinator.zone_timers) == ["Zone 0", "Zone 1" if moved else "Zone 2"]
+        assert not coordinator._worker.done()
+    finally:
+        bench.close()
+
+
+@pytest.mark.parametrize(("first", "second"), [(10, 3), (3, 10)])
+def test_newer_manual_duration_wins(first: float, second: float) -> None:
+    """A second manual run of a queued zone replaces its duration."""
+    bench = Bench(2, duration=10, options={"max_concurrent_zones": 1})
+
+    async def scenario(coordinator: Any) -> None:
+        await coordinator.async_run_zone("Zone 0", 5)
+        await coordinator.async_run_zone("Zone 1", first)
+        await coordinator.async_run_zone("Zone 1", second)
+
+    try:
+        coordinator = _run(bench, scenario)
+        owner = coordinator.runs.owner("Zone 1")
+        assert owner.durations == {"Zone 1": second}
+        assert owner.total_duration == second
+        slot = coordinator.timeline.get("Zone 1")
+        assert (slot.end - slot.start).total_seconds() == second * 60
+    finally:
+        bench.close()
+
+
+def test_options_change_keeps_rain_delay() -> None:
+    """Rebuilding the skip conditions keeps a rain delay that is running."""
+    rain = "binary_sensor.rain"
+    wind = "sensor.wind"
+    options = {
+        "enable_weather_check": True,
+        "rain_sensor_entity": rain,
+        "rain_delay": 2,
+        "wind_sensor_entity": wind,
+    }
+    bench = Bench(2, options=options)
+
+    async def main() -> Any:
+        bench.set_state(rain, "on")
+        bench.set_state(wind, "30")
+        await bench.async_setup()
+        bench.set_state(rain, "off")
+        # Under the limit but not by the hysteresis margin
+        bench.set_state(wind, "18")
+        await bench.hass.async_block_till_done()
+        delay_until = bench.coordinator.skip_engine.delay_until
+        assert delay_until is not None
+
+        bench.entry.options = {**options, "rain_delay": 3}
+        await bench.coordinator.async_apply_entry()
+        engine = bench.coordinator.skip_engine
+        assert engine.delay_until == delay_until + timedelta(hours=1)
+        assert engine.reasons == ["wind", "rain_delay"]
+
+        await asyncio.sleep(3 * 3600)
+        return engine
+
+    try:
+        engine = bench.loop.run_until_complete(main())
+        assert engine.delay_until is None
+        assert engine.reasons == ["wind"]
+    finally:
+        bench.close()
+
+
+def test_stop_skips_unavailable_valve() -> None:
+    """Stopping does not wait on a valve that is gone, it is closed when it is back."""
+    bench = Bench(2, duration=10)
+
+    async def main() -> Any:
+        await bench.async_setup()
+        coordinator = bench.coordinator
+        await coordinator.async_start_irrigation()
+        await asyncio.sleep(60)
+        bench.set_state("switch.valve_0", "unavailable")
+        await bench.hass.async_block_till_done()
+
+        start = bench.loop.time()
+        await coordinator.async_stop_irrigation()
+        await coordinator.async_refresh()
+        assert bench.loop.time() - start < 1
+        assert coordinator.stuck_valves == {"switch.valve_0"}
+
+        bench.set_state("switch.valve_0", "on")
+        await bench.hass.async_block_till_done()
+        return coordinator
+
+    try:
+        coordinator = bench.loop.run_until_complete(main())
+        assert bench.hass.states.get("switch.valve_0").state == "off"
+        assert not coordinator.stuck_valves
+        assert coordinator.actuator.as_dict() == {"failures": {}, "tripped": {}}
+    finally:
+        bench.close()
+
+
+def test_stuck_valve_retried_in_background() -> None:
+    """A valve that did not close is retried on a timer, the resync does not wait for it."""
+    bench = Bench(2, duration=1, options={"max_concurrent_zones": 1})
+    call = bench.hass.services.async_call
+    broken = [True]
+
+    async def ignore_valve_0(
+        domain: str, service: str, data: Any = None, blocking: bool = False, **kwargs: Any
+    ) -> None:
+        """Drop turn_off for valve 0 while it is broken."""
+        entity_ids = [
+            entity_id
+            for entity_id in data["entity_id"]
+            if not (broken[0] and service == "turn_off" and entity_id == "switch.valve_0")
+        ]
+        if entity_ids:
+            await call(domain, service, {"entity_id": entity_ids}, blocking, **kwargs)
+
+    bench.hass.services.async_call = ignore_valve_0
+
+    async def main() -> Any:
+        await bench.async_setup()
+        coordinator = bench.coordinator
+        await coordinator.async_start_irrigation()
+        await bench.async_wait_idle()
+        assert coordinator.stuck_valves == {"switch.valve_0"}
+
+        broken[0] = False
+        start = bench.loop.time()
+        await coordinator.async_refresh()
+        assert bench.loop.time() - start < 1
+        assert coordinator.stuck_valves == {"switch.valve_0"}
+
+        await asyncio.sleep(300)
+        return coordinator
+
+    try:
+        coordinator = bench.loop.run_until_complete(main())
+        assert not coordinator.stuck_valves
+        assert bench.hass.states.get("switch.valve_0").state == "off"
+    finally:
+        bench.close()
+
+
+@pytest.mark.parametrize(("duration", "expected"), [(None, 10), (3, 3)])
+def test_start_irrigation_duration(duration: Optional[int], expected: float) -> None:
+    """A start duration applies to every zone, the total is their sum."""
+    bench = Bench(3, duration=10, options={"max_concurrent_zones": 1})
+
+    async def scenario(coordinator: Any) -> None:
+        await coordinator.async_start_irrigation(duration)
+
+    try:
+        coordinator = _run(bench, scenario)
+        assert coordinator.total_duration == 3 * expected
+        assert coordinator.zone_queue == [("Zone 1", expected), ("Zone 2", expected)]
+    finally:
+        bench.close()
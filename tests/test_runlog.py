@@ -0,0 +1,35 @@
+"""Run log ring file tests."""
+from __future__ import annotations
+
+import importlib
+from pathlib import Path
+
+import pytest
+
+from benchmarks.harness import PACKAGE, load
+
+CAPACITY = 5
+
+
+def _records(count: int) -> list:
+    """Return packed records whose zone index is their position."""
+    runlog = importlib.import_module(f"{PACKAGE}.runlog")
+    return [runlog.RECORD.pack(index, 0, 60, 1.0, 1.0, 0) for index in range(count)]
+
+
+@pytest.mark.parametrize("written", [3, 5, 7, 12])
+@pytest.mark.parametrize("limit", [None, 0, 2, 4, 9])
+def test_read_tail(tmp_path: Path, written: int, limit: int) -> None:
+    """A limited read returns the same newest records as a full read."""
+    load()
+    runlog = importlib.import_module(f"{PACKAGE}.runlog")
+    ring = runlog.RingFile(str(tmp_path / "run_log"), CAPACITY)
+    for record in _records(written):
+        ring.append([record])
+
+    total, records = ring.read(limit)
+    kept = list(range(max(written - CAPACITY, 0), written))
+    if limit is not None:
+        kept = kept[-limit:] if limit else []
+    assert total == written
+    assert [record[0] for record in records] == kept
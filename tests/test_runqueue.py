@@ -0,0 +1,52 @@
+"""Run queue tests."""
+from __future__ import annotations
+
+import importlib
+from datetime import datetime, timezone
+
+import pytest
+
+from benchmarks.harness import PACKAGE, load
+
+CREATED = datetime(2026, 6, 1, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize("front", [False, True])
+def test_discard_then_requeue(front: bool) -> None:
+    """A zone dropped from a run and queued in it again is listed once."""
+    load()
+    runqueue = importlib.import_module(f"{PACKAGE}.runqueue")
+    run = runqueue.ProgramRun("program", 0, CREATED)
+    for zone_name in ("Zone 0", "Zone 1", "Zone 2"):
+        run.append(zone_name, 10)
+
+    assert run.discard("Zone 1") == 10
+    if front:
+        run.push_front("Zone 1", 4)
+        assert run.items() == [("Zone 1", 4), ("Zone 0", 10), ("Zone 2", 10)]
+    else:
+        run.append("Zone 1", 4)
+        assert run.items() == [("Zone 0", 10), ("Zone 2", 10), ("Zone 1", 4)]
+    expected = [zone_name for zone_name, _ in run.items()]
+    assert [run.pop()[0] for _ in range(len(run))] == expected
+    assert run.pop() is None
+    assert not run.order
+
+
+def test_merge_back_into_lower_priority_run() -> None:
+    """A zone taken over by a higher-priority run and queued in its old run again is not doubled."""
+    load()
+    runqueue = importlib.import_module(f"{PACKAGE}.runqueue")
+    queue = runqueue.RunQueue()
+    low = runqueue.ProgramRun("low", 0, CREATED)
+    for zone_name in ("Zone 0", "Zone 1"):
+        queue.merge(low, zone_name, 10)
+    queue.push(low)
+
+    high = runqueue.ProgramRun("high", 5, CREATED)
+    assert queue.merge(high, "Zone 1", 3)
+    queue.push(high)
+    queue.pop_zone(high)
+
+    queue.push_front(low, "Zone 1", 2)
+    assert low.items() == [("Zone 1", 2), ("Zone 0", 10)]
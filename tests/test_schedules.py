@@ -0,0 +1,105 @@
+"""Schedule next start tests."""
+from __future__ import annotations
+
+import importlib
+from datetime import datetime, timezone
+from typing import Any, List
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from benchmarks.harness import PACKAGE, Bench
+
+BERLIN = ZoneInfo("Europe/Berlin")
+
+
+@pytest.fixture
+def bench() -> Any:
+    """Return a bench for its fake core."""
+    bench = Bench(1)
+    yield bench
+    bench.close()
+
+
+@pytest.fixture
+def berlin(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Use a local time zone with daylight saving time."""
+    load_schedules()
+    dt_util = importlib.import_module("homeassistant.util.dt")
+    monkeypatch.setattr(dt_util, "DEFAULT_TIME_ZONE", BERLIN)
+    monkeypatch.setattr(dt_util, "as_local", lambda value: value.astimezone(BERLIN))
+    monkeypatch.setattr(dt_util, "as_utc", lambda value: value.astimezone(timezone.utc))
+
+
+def load_schedules() -> Any:
+    """Return the schedules module."""
+    return importlib.import_module(f"{PACKAGE}.schedules")
+
+
+def _schedule(text: str) -> Any:
+    """Parse one schedule from YAML."""
+    schedules = load_schedules()
+    return schedules.Schedule(0, schedules.parse_schedules(text)[0])
+
+
+def _starts(bench: Bench, schedule: Any, after: datetime, count: int) -> List[datetime]:
+    """Return the next starts of a schedule after a time."""
+    starts = []
+    for _ in range(count):
+        after = schedule.next_start(bench.hass, after)
+        starts.append(after)
+    return starts
+
+
+@pytest.mark.parametrize(
+    ("after", "expected"),
+    [
+        # Clocks go forward on 29 March, 06:00 CEST is 04:00 UTC
+        (
+            datetime(2026, 3, 28, 5, 0, tzinfo=timezone.utc),
+            [datetime(2026, 3, 29, 4, 0, tzinfo=timezone.utc), datetime(2026, 3, 30, 4, 0, tzinfo=timezone.utc)],
+        ),
+        # Clocks go back on 25 October, 06:00 CET is 05:00 UTC
+        (
+            datetime(2026, 10, 24, 4, 0, tzinfo=timezone.utc),
+            [datetime(2026, 10, 25, 5, 0, tzinfo=timezone.utc), datetime(2026, 10, 26, 5, 0, tzinfo=timezone.utc)],
+        ),
+    ],
+)
+def test_next_start_across_dst(
+    bench: Bench, berlin: None, after: datetime, expected: List[datetime]
+) -> None:
+    """A clock time keeps its local time of day across a daylight saving change."""
+    schedule = _schedule("- name: Morning\n  times: '06:00'\n")
+    assert _starts(bench, schedule, after, 2) == expected
+
+
+def test_sun_offsets(bench: Bench) -> None:
+    """Starts relative to sunrise and sunset apply their offsets."""
+    schedule = _schedule("- name: Sun\n  times: [sunrise-30, sunset+1:00]\n")
+    after = datetime(2026, 6, 1, tzinfo=timezone.utc)
+    # The fake core has sunrise at 06:00 and sunset at 20:00 UTC
+    assert _starts(bench, schedule, after, 3) == [
+        datetime(2026, 6, 1, 5, 30, tzinfo=timezone.utc),
+        datetime(2026, 6, 1, 21, 0, tzinfo=timezone.utc),
+        datetime(2026, 6, 2, 5, 30, tzinfo=timezone.utc),
+    ]
+
+
+def test_interval_from_start_date(bench: Bench) -> None:
+    """An interval counts its days from the start date."""
+    schedule = _schedule("- name: Every third\n  times: '07:00'\n  interval: 3\n  start_date: 2026-06-02\n")
+    after = datetime(2026, 6, 1, tzinfo=timezone.utc)
+    assert [when.day for when in _starts(bench, schedule, after, 3)] == [2, 5, 8]
+
+
+def test_scale_zero_skips_month(bench: Bench) -> None:
+    """A month scaled to 0 has no starts, the next month runs at its own scale."""
+    scale = [100] * 12
+    scale[5] = 0
+    scale[6] = 150
+    schedule = _schedule(f"- name: Summer\n  times: '07:00'\n  scale: {scale}\n")
+    after = datetime(2026, 5, 31, 8, 0, tzinfo=timezone.utc)
+    start = schedule.next_start(bench.hass, after)
+    assert start == datetime(2026, 7, 1, 7, 0, tzinfo=timezone.utc)
+    assert schedule.scale_on(start.date()) == 1.5
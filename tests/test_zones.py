@@ -0,0 +1,36 @@
+"""Zone list parsing tests."""
+from __future__ import annotations
+
+import importlib
+
+import pytest
+
+from benchmarks.harness import PACKAGE, load
+
+
+@pytest.mark.parametrize(
+    "name",
+    ["Front lawn", "Front, left", 'The "big" bed', "-Back", "- Back", "#3", "[Side]"],
+)
+def test_format_round_trip(name: str) -> None:
+    """Formatted zones parse back to the same config."""
+    load()
+    zones = importlib.import_module(f"{PACKAGE}.zones")
+    config = [
+        {"zone_name": name, "zone_entity": "switch.valve_0", "zone_duration": 10},
+        {"zone_name": "Zone 1", "zone_entity": "switch.valve_1", "zone_duration": 5, "zone_flow": 1.5},
+    ]
+    parsed = zones.parse_zones(zones.format_zones(config))
+    assert [(zone["zone_name"], zone["zone_entity"]) for zone in parsed] == [
+        (name, "switch.valve_0"),
+        ("Zone 1", "switch.valve_1"),
+    ]
+    assert parsed[1]["zone_flow"] == 1.5
+
+
+def test_parse_yaml_list() -> None:
+    """A YAML list is still told apart from CSV."""
+    load()
+    zones = importlib.import_module(f"{PACKAGE}.zones")
+    parsed = zones.parse_zones("- name: Front\n  entity: switch.valve_0\n")
+    assert parsed[0]["zone_name"] == "Front"